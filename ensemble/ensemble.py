@@ -12,7 +12,17 @@ import numpy as np  # Misc. numerical tools
 import pickle  # To save and load information
 from glob import glob
 import datetime as dt
+import time
+import queue
+import heapq
+import hashlib
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from itertools import chain
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
 from tqdm.auto import tqdm
+import psutil
 from p_tqdm import p_map
 import logging
 
@@ -23,6 +33,262 @@ from pipt.misc_tools import cov_regularization
 from pipt.misc_tools import wavelet_tools as wt
 from misc import read_input_csv as rcsv
 from misc.system_tools.environ_var import OpenBlasSingleThread  # Single threaded OpenBLAS runs
+from misc.checkpoint import save_checkpoint, load_checkpoint, remove_checkpoint
+from simulator.batch import get_backend
+from ensemble.fwd_cache import FwdRunCache
+
+
+# Simulator instance held by each worker in the persistent forward-run pool. It is unpickled once when the worker
+# starts, such that the tasks sent to the worker only need to carry the state of a single ensemble member.
+_worker_sim = None
+
+# Attributes of the worker simulator as it was started, which are restored before each forward run
+_worker_setup = None
+
+# Shared memory block with the ensemble state that the worker is currently attached to
+_worker_shm = None
+
+# Queue where the worker reports when it starts a forward run (used to find stragglers)
+_worker_queue = None
+
+
+def _init_worker(sim_dump, start_queue=None):
+    """
+    Initialize a worker in the persistent forward-run pool.
+
+    Parameters
+    ----------
+    sim_dump : bytes
+        Pickled simulator instance, including the setup from setup_fwd_run.
+    start_queue : multiprocessing.Queue, optional
+        Queue for reporting the start of each forward run.
+    """
+    global _worker_sim, _worker_setup, _worker_queue
+    _worker_sim = pickle.loads(sim_dump)
+    _worker_setup = dict(vars(_worker_sim))
+    _worker_queue = start_queue
+
+
+def _reset_worker_sim():
+    """
+    Restore the simulator of the worker to the set-up it was started with, such that nothing the forward run of one
+    ensemble member leaves in the simulator (e.g., its predicted data, or a coarsened grid) is seen by the next run.
+    The predicted data are filled in place by the simulator, hence they are copied from the set-up.
+    """
+    attrs = vars(_worker_sim)
+    attrs.clear()
+    attrs.update(_worker_setup)
+    if 'pred_data' in attrs:
+        attrs['pred_data'] = deepcopy(_worker_setup['pred_data'])
+
+
+def _attach_state(shm_name, layout, column):
+    """
+    Get the state of one ensemble member from the shared memory block made by Ensemble._share_state. The member gets
+    its own writable copy of its part of the block, such that the simulator may change the state in place. Only the
+    data of this member are copied, within the worker, instead of being sent with the task.
+
+    Parameters
+    ----------
+    shm_name : str
+        Name of the shared memory block.
+    layout : list of tuple
+        Key, byte offset, shape and data type of each state array in the block. Ensemble arrays are stored with one
+        row per member.
+    column : int
+        Column of the ensemble member in the state matrices.
+
+    Returns
+    -------
+    state : dict
+        State of the ensemble member.
+    """
+    global _worker_shm
+    if _worker_shm is None or _worker_shm.name.lstrip('/') != shm_name.lstrip('/'):
+        if _worker_shm is not None:
+            _worker_shm.close()
+        # the worker shares the resource tracker of the main process (see Ensemble._get_pool), such that the block stays
+        # registered, and is unlinked, by the main process only
+        _worker_shm = SharedMemory(name=shm_name)
+
+    state = {}
+    for key, offset, shape, dtype in layout:
+        arr = np.ndarray(shape, dtype=dtype, buffer=_worker_shm.buf, offset=offset)
+        state[key] = (arr[column] if len(shape) == 2 else arr).copy()
+        del arr
+
+    return state
+
+
+def _run_member(shared, state, column, member_index, nosim=False, run_id=None):
+    """
+    Run the forward simulator, kept by the worker, for a single ensemble member.
+
+    Parameters
+    ----------
+    shared : tuple
+        Name and layout of the shared memory block with the ensemble state (see _attach_state).
+    state : dict
+        Entries of the member state that are not in the shared memory block, e.g., the auxiliary input.
+    column : int
+        Column of the ensemble member in the state matrices.
+    member_index : int
+        Index of the ensemble member given to the simulator.
+    nosim : bool, optional
+        Only make the run folder and input files (for simulations run by a batch scheduler).
+    run_id : tuple, optional
+        Forecast id and run index, reported on the queue when the run starts. A run index other than member_index
+        marks a speculative copy of the member, which is run in a working folder of its own (see _run_copy).
+
+    Returns
+    -------
+    pred_data : list of dict or bool
+        Predicted data from the simulator, or False if the simulation failed.
+    run_time : float
+        Wall time of the forward run in seconds.
+    """
+    _reset_worker_sim()
+    state = {**_attach_state(*shared, column), **state}
+    t_start = time.time()
+    if nosim:
+        return _worker_sim.run_fwd_sim(state, member_index, nosim=True), time.time() - t_start
+    if _worker_queue is not None and run_id is not None:
+        _worker_queue.put((run_id, os.getpid(), t_start))
+    if run_id is not None and run_id[1] != member_index:
+        pred_data = _run_copy(state, member_index)
+    else:
+        pred_data = _worker_sim.run_fwd_sim(state, member_index)
+    return pred_data, time.time() - t_start
+
+
+def _run_copy(state, member_index):
+    """
+    Run a speculative copy of an ensemble member. The copy is given the index of the member, like the original run,
+    but runs in a working folder of its own, En_<member>_copy, such that its run folder (En_<member>) is not the one of
+    the original run. The copy folder links to the files and folders in the working folder (templates, include files,
+    scripts), apart from the run folders. Files that the copy writes in its working folder (e.g., by saveinfo scripts)
+    are moved to the working folder if the run succeeds, and the copy folder is removed.
+
+    Parameters
+    ----------
+    state : dict
+        State of the ensemble member.
+    member_index : int
+        Index of the ensemble member.
+
+    Returns
+    -------
+    pred_data : list of dict or bool
+        Predicted data from the simulator, or False if the simulation failed.
+    """
+    cwd = os.getcwd()
+    folder = os.path.join(cwd, f'En_{member_index}_copy')
+    rmtree(folder, ignore_errors=True)
+    os.mkdir(folder)
+    linked = [name for name in os.listdir(cwd) if not name.startswith('En_')]
+    for name in linked:
+        os.symlink(os.path.join(cwd, name), os.path.join(folder, name))
+
+    os.chdir(folder)
+    try:
+        pred_data = _worker_sim.run_fwd_sim(state, member_index)
+    finally:
+        os.chdir(cwd)
+    if pred_data is not False:
+        for name in set(os.listdir(folder)).difference(linked):
+            if not name.startswith('En_'):
+                os.replace(os.path.join(folder, name), os.path.join(cwd, name))
+    rmtree(folder, ignore_errors=True)
+
+    return pred_data
+
+
+def _extract_member(member_index):
+    """
+    Extract the results of a simulation run by a batch scheduler, and remove the run folder.
+
+    Parameters
+    ----------
+    member_index : int
+        Index of the ensemble member.
+
+    Returns
+    -------
+    pred_data : list of dict
+        Predicted data from the simulator.
+    """
+    _reset_worker_sim()
+    _worker_sim.extract_data(member_index)
+    pred_data = deepcopy(_worker_sim.pred_data)
+    _worker_sim.remove_folder(member_index)
+    return pred_data
+
+
+def _makespan(run_times, num_cpus):
+    """
+    Makespan when the runs are handed out, in the given order, to the first free of num_cpus workers.
+
+    Parameters
+    ----------
+    run_times : list of float
+        Run time of each run, in dispatch order.
+    num_cpus : int
+        Number of workers.
+
+    Returns
+    -------
+    makespan : float
+        Time until the last run is finished.
+    """
+    workers = [0.0] * max(min(num_cpus, len(run_times)), 1)
+    for run_time in run_times:
+        heapq.heappush(workers, heapq.heappop(workers) + run_time)
+    return max(workers)
+
+
+class _PredictionBuffer:
+    """
+    Preallocated ensemble prediction, filled in as the forward runs of the ensemble members finish. The arrays are
+    allocated from the first successful run, with the ensemble members along the second axis, which gives the same
+    pred_data as concatenating the predictions of all members. Members that do not predict a data type (None) are
+    left as NaN; integer data are therefore stored as floats.
+    """
+
+    def __init__(self, ne):
+        self.ne = ne
+        self.pred_data = None
+
+    def add(self, column, member_pred):
+        """
+        Copy the prediction of one ensemble member into its column.
+
+        Parameters
+        ----------
+        column : int
+            Column of the ensemble member.
+        member_pred : list of dict
+            Prediction from run_fwd_sim, with one dictionary for each assimilation step.
+        """
+        if self.pred_data is None:
+            self.pred_data = [dict.fromkeys(el.keys()) for el in member_pred]
+        for ind, el in enumerate(member_pred):
+            for typ, val in el.items():
+                if val is None:
+                    continue
+                if self.pred_data[ind].get(typ) is None:
+                    val = np.asarray(val)
+                    dtype = val.dtype if np.issubdtype(val.dtype, np.inexact) else float
+                    self.pred_data[ind][typ] = np.full(val.shape[:1] + (self.ne,) + val.shape[1:], np.nan, dtype=dtype)
+                self.pred_data[ind][typ][:, column] = val
+
+    def copy_member(self, column, from_column):
+        """
+        Replace the prediction in one column with the prediction in another, e.g., for a crashed ensemble member.
+        """
+        for el in self.pred_data:
+            for arr in el.values():
+                if arr is not None:
+                    arr[:, column] = arr[:, from_column]
 
 
 class Ensemble:
@@ -51,10 +317,38 @@ class Ensemble:
         self.sim.redund_sim = redund_sim
         self.pred_data = None
 
+        # Persistent pool of forward-run workers (see _get_pool). It is started at the first parallel forecast and
+        # reused until the simulator changes, or close_pool is called.
+        self._pool = None
+        self._pool_key = None
+        self._pool_queue = None
+        self._pool_futures = set()
+        self._forecast_id = 0
+
         # Auxilliary input to the simulator - can be used e.g.,
         # to allow for different models when optimizing.
         self.aux_input = None
 
+        # Optional on-disk cache of forward-run results, such that members with unchanged state are not re-simulated
+        self.fwd_cache = FwdRunCache.from_keys(self.keys_en.get('fwd_cache'))
+
+        # Optional folder where the results of the finished members are stored as they finish, such that an
+        # interrupted forecast can be resumed without running these members again
+        self.checkpoint = self.keys_en.get('checkpoint')
+        if self.checkpoint is True or self.checkpoint == 'yes':
+            self.checkpoint = 'fwd_results'
+        elif self.checkpoint is False or self.checkpoint == 'no':
+            self.checkpoint = None
+
+        # Optional handling of straggling members in parallel forecasts, and wall time of the latest forward runs
+        self._ext_straggler_info()
+        self.run_times = {}
+
+        # Optional cost-aware ordering of the parallel forward runs, based on the run time history
+        self._ext_schedule_info()
+        self.run_time_history = {}  # member index -> smoothed run time
+        self.run_time_samples = []  # (state features, run time) for the run time regression
+
         # Setup logger
         logging.basicConfig(level=logging.INFO,
                             filename='pet_logger.log',
@@ -66,7 +360,8 @@ class Ensemble:
         # Check if folder contains any En_ files, and remove them!
         for folder in glob('En_*'):
             try:
-                if len(folder.split('_')) == 2:
+                # run folders, and working folders of speculative copies (En_<member>_copy)
+                if len(folder.split('_')) == 2 or folder.split('_')[2:] == ['copy']:
                     int(folder.split('_')[1])
                     rmtree(folder)
             except:
@@ -102,7 +397,7 @@ class Ensemble:
         else:
             # delete potential restart files to avoid any problems
             if self.pickle_restart_file in [f for f in os.listdir('.') if os.path.isfile(f)]:
-                os.remove(self.pickle_restart_file)
+                remove_checkpoint(self.pickle_restart_file)
 
             # initialize sim limit
             if 'sim_limit' in self.keys_en:
@@ -145,6 +440,66 @@ class Ensemble:
                 self.ne = min(tmp_ne)
         self._ext_ml_info()
 
+    def _ext_straggler_info(self):
+        """
+        Extract the options for handling straggling ensemble members in parallel forecasts. Once a fraction
+        (min_finished) of the members have finished, a deadline is set to factor times the given quantile of their run
+        times. Members running past the deadline are either killed, and treated as crashed members (action = 'kill'),
+        or duplicated on an idle worker, where the first copy to finish is used (action = 'speculate'). If the
+        duplicate also runs past the deadline, both copies are killed. The deadline is checked every poll seconds.
+
+        Only simulators running as a separate process (e.g., OPM flow or Eclipse) can be killed.
+        """
+        self.straggler = None
+        opts = self.keys_en.get('straggler')
+        if opts is None or opts is False or opts == 'no':
+            return
+
+        self.straggler = {'quantile': 0.9, 'factor': 2.0, 'min_finished': 0.5, 'action': 'kill', 'poll': 1.0}
+        if opts is True or opts == 'yes':
+            return
+        if isinstance(opts, dict):
+            opts = list(opts.items())
+        elif not isinstance(opts[0], (list, tuple)):  # only one option given
+            opts = [opts]
+        for opt, val in opts:
+            if opt == 'action':
+                assert val in ('kill', 'speculate'), 'Straggler action must be "kill" or "speculate"'
+                self.straggler[opt] = val
+            else:
+                self.straggler[opt] = float(val)
+
+    def _ext_schedule_info(self):
+        """
+        Extract the options for ordering the parallel forward runs. With order = 'lpt', the members are handed to the
+        workers longest-expected-first, using the run times of the previous forecasts. The expected run time of a
+        member is its run times smoothed over the forecasts (new = smoothing * latest + (1 - smoothing) * old). With
+        regression = 'yes', the expected run time is instead found from a linear regression of the log run time on
+        the member mean of each state variable (e.g., the mean permeability), fitted to the latest max_samples runs.
+        """
+        self.schedule = None
+        opts = self.keys_en.get('schedule')
+        if opts is None or opts is False or opts == 'no':
+            return
+
+        self.schedule = {'order': 'lpt', 'regression': False, 'smoothing': 0.5, 'max_samples': 1000}
+        if opts is True or opts in ('yes', 'lpt'):
+            return
+        if isinstance(opts, dict):
+            opts = list(opts.items())
+        elif not isinstance(opts[0], (list, tuple)):  # only one option given
+            opts = [opts]
+        for opt, val in opts:
+            if opt == 'order':
+                assert val in ('index', 'lpt'), 'Schedule order must be "index" or "lpt"'
+                self.schedule[opt] = val
+            elif opt == 'regression':
+                self.schedule[opt] = val is True or val == 'yes'
+            elif opt == 'max_samples':
+                self.schedule[opt] = int(val)
+            else:
+                self.schedule[opt] = float(val)
+
     def _ext_ml_info(self):
         '''
         Extract the info needed for ML simulations. Note if the ML keyword is not in keys_en we initialize
@@ -504,7 +859,7 @@ class Ensemble:
         # Return tot. assim. steps
         return list_assim
 
-    def calc_prediction(self, input_state=None, save_prediction=None):
+    def calc_prediction(self, input_state=None, save_prediction=None, progress_callback=None):
         """
         Method for making predictions using the state variable. Will output the simulator response for all report steps
         and all data values provided to the simulator.
@@ -515,6 +870,8 @@ class Ensemble:
             Use an input state instead of internal state (stored in self) to run predictions
         save_prediction :
             Save the predictions as a <save_prediction>.npz file (numpy compressed file)
+        progress_callback : callable, optional
+            Called as progress_callback(n_done, n_total, member_index, success) each time a forward run finishes.
 
         Returns
         -------
@@ -540,57 +897,60 @@ class Ensemble:
                 self.sim.redund_sim.setup_fwd_run()
             self.sim.setup_fwd_run(redund_sim=self.sim.redund_sim)
 
-            # Ensure that we put all the states in a list
-            list_state = [deepcopy({}) for _ in range(self.ne)]
-            for i in range(self.ne):
-                if input_state is None:
-                    for key in self.state.keys():
-                        if self.state[key].ndim == 1:
-                            list_state[i][key] = deepcopy(self.state[key])
-                        elif self.state[key].ndim == 2:
-                            list_state[i][key] = deepcopy(self.state[key][:, i])
-                        # elif self.state[key].ndim == 3:
-                        #     list_state[i][key] = deepcopy(self.state[key][level,:, i])
-                else:
-                    for key in self.state.keys():
-                        if input_state[key].ndim == 1:
-                            list_state[i][key] = deepcopy(input_state[key])
-                        elif input_state[key].ndim == 2:
-                            list_state[i][key] = deepcopy(input_state[key][:, i])
-                        # elif input_state[key].ndim == 3:
-                        #     list_state[i][key] = deepcopy(input_state[key][:,:, i])
-                if self.aux_input is not None:  # several models are used
-                    list_state[i]['aux_input'] = self.aux_input[i]
-
             # Index list of ensemble members
             list_member_index = list(range(self.ne))
 
+            # Take the members that were finished before an interruption from the checkpoint, and the members with
+            # unchanged state from the forward-run cache. Only the others are run.
+            cached_pred = {}
+            cache_keys = None
+            if self.fwd_cache is not None or self.checkpoint is not None:
+                cache_keys = self._member_keys(input_state)
+                if self.checkpoint is not None:
+                    cached_pred.update(self._load_checkpoint(cache_keys))
+                if self.fwd_cache is not None:
+                    for member_index in list_member_index:
+                        if member_index in cached_pred:
+                            continue
+                        member_pred = self.fwd_cache.get(cache_keys[member_index])
+                        if member_pred is not None:
+                            cached_pred[member_index] = member_pred
+                list_member_index = [el for el in list_member_index if el not in cached_pred]
+
             if no_tot_run==1: # if not in parallel we use regular loop
-                en_pred = [self.sim.run_fwd_sim(state, member_index) for state, member_index in
-                           tqdm(zip(list_state, list_member_index), total=len(list_state))]
+                list_state = self._get_list_state(input_state)
+                en_pred = ((member_index, self.sim.run_fwd_sim(list_state[member_index], member_index))
+                           for member_index in tqdm(list_member_index))
             elif self.sim.input_dict.get('hpc', False): # Run prediction in parallel on hpc
-                _ = [self.sim.run_fwd_sim(state, member_index, nosim=True) for state, member_index in
-                           zip(list_state, list_member_index)]
-                # Run call_sim on the hpc
-                job_id=self.sim.SLURM_HPC_run(self.ne, filename=self.sim.input_dict['runfile'])
-                # Wait for the simulations to finish
-                if job_id:
-                    self.sim.wait_for_jobs(job_id)
+                en_pred = self._run_batch(input_state, list_member_index, no_tot_run)
+
+            else: # Run prediction in parallel using the persistent pool of workers
+                en_pred = self._run_pool(input_state, list_member_index, no_tot_run)
+
+            # Copy the predictions into the ensemble matrices as the runs finish, and list successful runs and crashes
+            buffer = _PredictionBuffer(self.ne)
+            list_crash = []
+            list_success = []
+            for count, (indx, member_pred) in enumerate(chain(cached_pred.items(), en_pred), 1):
+                member_success = member_pred is not False
+                if member_success:
+                    buffer.add(indx, member_pred)
+                    list_success.append(indx)
+                    if cache_keys is not None and indx not in cached_pred:
+                        if self.checkpoint is not None:
+                            self._write_checkpoint(indx, cache_keys[indx], member_pred)
+                        if self.fwd_cache is not None:
+                            self.fwd_cache.put(cache_keys[indx], member_pred)
                 else:
-                    print("Job submission failed. Exiting.")
-                # Extract the results
-                en_pred = []
-                for member_i in list_member_index:
-                    self.sim.extract_data(member_i)
-                    en_pred.append(deepcopy(self.sim.pred_data))
-                    self.sim.remove_folder(member_i)
-
-            else: # Run prediction in parallel using p_map
-                en_pred = p_map(self.sim.run_fwd_sim, list_state,
-                                list_member_index, num_cpus=no_tot_run, disable=self.disable_tqdm)
-            # List successful runs and crashes
-            list_crash = [indx for indx, el in enumerate(en_pred) if el is False]
-            list_success = [indx for indx, el in enumerate(en_pred) if el is not False]
+                    list_crash.append(indx)
+                del member_pred  # the member prediction is not needed after it is copied
+                if progress_callback is not None:
+                    progress_callback(count, self.ne, indx, member_success)
+            del cached_pred
+            if self.fwd_cache is not None:
+                self.fwd_cache.log_stats()
+            list_crash.sort()
+            list_success.sort()
             success = True
 
             # Dump all information and print error if all runs have crashed
@@ -626,12 +986,14 @@ class Ensemble:
                         if self.state[key].ndim > 1:
                             self.state[key][:, list_crash[indx]] = deepcopy(
                                 self.state[key][:, el])
-                    en_pred[list_crash[indx]] = deepcopy(en_pred[el])
- 
-            # Convert ensemble specific result into pred_data, and filter for NONE data
-            self.pred_data.extend([{typ: np.concatenate(tuple((el[ind][typ][:, np.newaxis]) for el in en_pred), axis=1)
-                                    if any(elem is not None for elem in tuple((el[ind][typ]) for el in en_pred))
-                                    else None for typ in en_pred[0][0].keys()} for ind in range(len(en_pred[0]))])
+                    buffer.copy_member(list_crash[indx], el)
+
+            # Ensemble prediction, with None for data types that were not predicted
+            self.pred_data.extend(buffer.pred_data)
+
+            # The forecast is done, hence only its own member results are kept in the checkpoint
+            if self.checkpoint is not None and cache_keys is not None:
+                self._prune_checkpoint(cache_keys)
 
         # some predicted data might need to be adjusted (e.g. scaled or compressed if it is 4D seis data). Do not
         # include this here.
@@ -642,29 +1004,707 @@ class Ensemble:
 
         return success
 
+    def _get_list_state(self, input_state=None):
+        """
+        Make a list with a separate copy of the state for each ensemble member.
+
+        Parameters
+        ----------
+        input_state : dict, optional
+            Use an input state instead of internal state (stored in self)
+
+        Returns
+        -------
+        list_state : list of dict
+            State of each ensemble member, including the auxiliary input if it is used.
+        """
+        # Ensure that we put all the states in a list
+        list_state = [deepcopy({}) for _ in range(self.ne)]
+        for i in range(self.ne):
+            if input_state is None:
+                for key in self.state.keys():
+                    if self.state[key].ndim == 1:
+                        list_state[i][key] = deepcopy(self.state[key])
+                    elif self.state[key].ndim == 2:
+                        list_state[i][key] = deepcopy(self.state[key][:, i])
+                    # elif self.state[key].ndim == 3:
+                    #     list_state[i][key] = deepcopy(self.state[key][level,:, i])
+            else:
+                for key in self.state.keys():
+                    if input_state[key].ndim == 1:
+                        list_state[i][key] = deepcopy(input_state[key])
+                    elif input_state[key].ndim == 2:
+                        list_state[i][key] = deepcopy(input_state[key][:, i])
+                    # elif input_state[key].ndim == 3:
+                    #     list_state[i][key] = deepcopy(input_state[key][:,:, i])
+            if self.aux_input is not None:  # several models are used
+                list_state[i]['aux_input'] = self.aux_input[i]
+
+        return list_state
+
+    def _member_keys(self, input_state=None):
+        """
+        Make the key of each ensemble member in the forward-run cache and checkpoint, which is a hash of the member
+        state, the auxiliary input and the simulator set-up.
+
+        Parameters
+        ----------
+        input_state : dict, optional
+            Use an input state instead of internal state (stored in self)
+
+        Returns
+        -------
+        keys : list of str
+            Key of each ensemble member.
+        """
+        state = self.state if input_state is None else input_state
+        signature = FwdRunCache.sim_signature(self.sim)
+        keys = []
+        for i in range(self.ne):
+            member_state = {key: state[key] if state[key].ndim == 1 else state[key][:, i]
+                            for key in self.state.keys() if state[key].ndim in (1, 2)}
+            aux_input = self.aux_input[i] if self.aux_input is not None else None
+            keys.append(FwdRunCache.member_key(member_state, aux_input, signature))
+
+        return keys
+
+    def _checkpoint_folder(self):
+        """
+        Folder with the member results of the current forecast: <checkpoint>/iter_<iteration>, or
+        <checkpoint>/forecast if the ensemble does not count iterations.
+        """
+        if hasattr(self, 'iteration'):
+            return os.path.join(self.checkpoint, f'iter_{self.iteration}')
+        return os.path.join(self.checkpoint, 'forecast')
+
+    def _load_checkpoint(self, keys):
+        """
+        Load the results of the members that were finished before the forecast was interrupted. A result is only used
+        if the member key (state and simulator set-up) is the same as in the current forecast.
+
+        Parameters
+        ----------
+        keys : list of str
+            Key of each ensemble member (see _member_keys).
+
+        Returns
+        -------
+        member_pred : dict
+            Member index -> predicted data, for the members found in the checkpoint.
+        """
+        folder = self._checkpoint_folder()
+        member_pred = {}
+        for member_index, key in enumerate(keys):
+            try:
+                with open(os.path.join(folder, f'member_{member_index}_{key}.pkl'), 'rb') as f:
+                    member_pred[member_index] = pickle.load(f)
+            except (OSError, EOFError, pickle.UnpicklingError):
+                continue
+        if member_pred:
+            self.logger.info(f'Resumed {len(member_pred)} of {self.ne} ensemble members from the checkpoint in '
+                             f'{folder}')
+        return member_pred
+
+    def _write_checkpoint(self, member_index, key, member_pred):
+        """
+        Store the result of a finished member in the checkpoint folder. The files are only added, never changed, and
+        written to a temporary file first, such that an interruption does not leave a partly written result.
+
+        Parameters
+        ----------
+        member_index : int
+            Index of the ensemble member.
+        key : str
+            Key of the ensemble member (see _member_keys).
+        member_pred : list of dict
+            Predicted data of the ensemble member.
+        """
+        folder = self._checkpoint_folder()
+        os.makedirs(folder, exist_ok=True)
+        path = os.path.join(folder, f'member_{member_index}_{key}.pkl')
+        with open(path + '.tmp', 'wb') as f:
+            pickle.dump(member_pred, f, protocol=4)
+        os.replace(path + '.tmp', path)
+
+    def _prune_checkpoint(self, keys):
+        """
+        Remove the checkpoint results that are not from the current forecast, after the forecast has finished.
+
+        Parameters
+        ----------
+        keys : list of str
+            Key of each ensemble member (see _member_keys).
+        """
+        folder = self._checkpoint_folder()
+        current = {f'member_{member_index}_{key}.pkl' for member_index, key in enumerate(keys)}
+        for el in glob(os.path.join(self.checkpoint, '*')):
+            if os.path.isdir(el) and os.path.abspath(el) != os.path.abspath(folder):
+                rmtree(el, ignore_errors=True)
+        for el in glob(os.path.join(folder, '*')):
+            if os.path.basename(el) not in current:
+                os.remove(el)
+
+    def _setup_key(self):
+        """
+        Key of the simulator set-up held by the workers of the persistent pool: the class, run file and input of the
+        simulator, and the attributes that setup_fwd_run depends on or sets (report steps, data types, fidelity level
+        and redundant simulator). Other changes to the simulator in the main process are not seen by the workers.
+
+        Returns
+        -------
+        key : str
+            Hash of the set-up.
+        """
+        def setup(sim):
+            if sim is None:
+                return None
+            return (type(sim).__module__, type(sim).__qualname__,
+                    {key: getattr(sim, key, None) for key in ('file', 'input_dict', 'l_prim', 'true_order',
+                                                              'true_prim', 'all_data_types', 'level')})
+
+        return hashlib.sha1(pickle.dumps((setup(self.sim), setup(self.sim.redund_sim)), protocol=4)).hexdigest()
+
+    def _get_pool(self, num_cpus):
+        """
+        Get the persistent pool of forward-run workers. The simulator is pickled once and sent to the workers when the
+        pool is started; the workers keep it, including the setup from setup_fwd_run, across forecasts. If the set-up
+        has changed since the pool was started (e.g., a different run file or fidelity level, see _setup_key), the pool
+        is restarted with the new simulator.
+
+        Parameters
+        ----------
+        num_cpus : int
+            Number of workers in the pool.
+
+        Returns
+        -------
+        pool : concurrent.futures.ProcessPoolExecutor
+            Pool of workers, each holding its own copy of the simulator.
+        """
+        pool_key = (num_cpus, self._setup_key())
+        if self._pool is None or self._pool_key != pool_key:
+            self.close_pool()
+            if os.name == 'posix':
+                # start the resource tracker before the workers, such that they inherit it. Otherwise, each worker
+                # starts its own tracker when it attaches to a shared memory block, and the tracker unlinks the block,
+                # and warns about it being leaked, when the worker exits.
+                resource_tracker.ensure_running()
+            ctx = mp.get_context()
+            self._pool_queue = ctx.Queue()
+            self._pool = ProcessPoolExecutor(max_workers=num_cpus, mp_context=ctx, initializer=_init_worker,
+                                             initargs=(pickle.dumps(self.sim, protocol=4), self._pool_queue))
+            self._pool_key = pool_key
+            self.logger.info(f'Started pool of {num_cpus} forward-run workers')
+
+        return self._pool
+
+    def _submit(self, fn, *args):
+        """
+        Submit a task to the persistent pool, keeping track of it until it is done, such that close_pool can cancel it.
+
+        Returns
+        -------
+        future : concurrent.futures.Future
+            Future of the task.
+        """
+        future = self._pool.submit(fn, *args)
+        self._pool_futures.add(future)
+        future.add_done_callback(self._pool_futures.discard)
+        return future
+
+    def _share_state(self, input_state=None):
+        """
+        Copy the ensemble state into a shared memory block, such that the forward-run workers can read the state of
+        their ensemble member directly from it. Ensemble matrices are stored transposed (one row per member), to make
+        the state of each member contiguous. Arrays that cannot be put in shared memory (e.g., object arrays) and the
+        auxiliary input are instead returned in a list of per-member dictionaries.
+
+        The block is made for each forecast, since the state is replaced, not updated in place, by the analysis and
+        by input_state. The copy into the block is the only copy of the full state; each worker copies out the state
+        of its own member only, since the simulator may change it in place.
+
+        Parameters
+        ----------
+        input_state : dict, optional
+            Use an input state instead of internal state (stored in self)
+
+        Returns
+        -------
+        shm : multiprocessing.shared_memory.SharedMemory
+            Shared memory block. The caller must close and unlink it when the forecast is done.
+        layout : list of tuple
+            Key, byte offset, shape and data type of each state array in the block.
+        list_state : list of dict
+            Entries of the state of each ensemble member that are not in the block.
+        """
+        state = self.state if input_state is None else input_state
+
+        # find the position of each array in the block, keeping the arrays aligned to 8 bytes
+        layout = []
+        nbytes = 0
+        list_state = [{} for _ in range(self.ne)]
+        for key in self.state.keys():
+            arr = np.asarray(state[key])
+            if arr.ndim not in (1, 2):
+                continue
+            if arr.dtype.hasobject:
+                for i in range(self.ne):
+                    list_state[i][key] = deepcopy(arr if arr.ndim == 1 else arr[:, i])
+                continue
+            shape = arr.shape if arr.ndim == 1 else arr.shape[::-1]
+            layout.append((key, nbytes, shape, arr.dtype.str))
+            nbytes += -(-arr.nbytes // 8) * 8
+
+        shm = SharedMemory(create=True, size=max(nbytes, 1))
+        try:
+            for key, offset, shape, dtype in layout:
+                arr = np.ndarray(shape, dtype=dtype, buffer=shm.buf, offset=offset)
+                arr[...] = state[key] if len(shape) == 1 else state[key].T
+                del arr
+        except BaseException:
+            shm.close()
+            shm.unlink()
+            raise
+
+        if self.aux_input is not None:  # several models are used
+            for i in range(self.ne):
+                list_state[i]['aux_input'] = self.aux_input[i]
+
+        return shm, layout, list_state
+
+    def _run_batch(self, input_state, list_member_index, num_cpus):
+        """
+        Run the forward simulations with a batch scheduler (e.g., SLURM on an hpc, see simulator.batch). The run folders
+        are made, and the results extracted, in parallel on the persistent pool of workers. Each task marks when it is
+        done, such that the results of the members that finish early are extracted while the others are still running.
+
+        Parameters
+        ----------
+        input_state : dict
+            Use an input state instead of internal state (stored in self). Can be None.
+        list_member_index : list of int
+            Index of the ensemble members to run, which is also their column in the state matrices.
+        num_cpus : int
+            Number of workers in the pool.
+
+        Yields
+        ------
+        member_index : int
+            Index of the ensemble member.
+        pred : list or bool
+            Predicted data for the ensemble member, or False if the simulation failed.
+        """
+        if not list_member_index:
+            return
+
+        self._get_pool(num_cpus)
+        backend = get_backend(self.sim.input_dict['hpc'], self.sim, max_parallel=num_cpus)
+        poll = float(self.sim.input_dict.get('hpc_poll', 1.0))
+
+        # Make the run folders and input files
+        shm, layout, list_state = self._share_state(input_state)
+        try:
+            for future in [self._submit(_run_member, (shm.name, layout), list_state[member_index], member_index,
+                                       member_index, True) for member_index in list_member_index]:
+                future.result()
+        finally:
+            shm.close()
+            shm.unlink()
+
+        backend.submit(list_member_index)
+        extracting = {}
+        remaining = len(list_member_index)
+        pbar = tqdm(total=remaining, disable=self.disable_tqdm)
+        try:
+            while remaining:
+                for member_index, success in backend.poll().items():
+                    if success:
+                        extracting[self._submit(_extract_member, member_index)] = member_index
+                    else:
+                        self.sim.remove_folder(member_index)
+                        remaining -= 1
+                        pbar.update()
+                        yield member_index, False
+
+                for future in [el for el in extracting if el.done()]:
+                    member_index = extracting.pop(future)
+                    remaining -= 1
+                    pbar.update()
+                    yield member_index, future.result()
+
+                if remaining:
+                    if extracting:
+                        wait(list(extracting), timeout=poll, return_when=FIRST_COMPLETED)
+                    else:
+                        time.sleep(poll)
+        except BaseException:
+            backend.cancel()
+            self.close_pool()
+            raise
+        finally:
+            pbar.close()
+
+    def _run_pool(self, input_state, list_member_index, num_cpus):
+        """
+        Run the forward simulator for the ensemble members on the persistent pool of workers. The state is handed over
+        to the workers in shared memory, such that only the name of the block, its layout and the member index need to
+        be sent with each task. The results are yielded in the order the runs finish. If straggler handling is switched
+        on (see _ext_straggler_info), members running past the deadline are killed or duplicated.
+
+        Parameters
+        ----------
+        input_state : dict
+            Use an input state instead of internal state (stored in self). Can be None.
+        list_member_index : list of int
+            Index of the ensemble members to run, which is also their column in the state matrices.
+        num_cpus : int
+            Number of workers in the pool.
+
+        Yields
+        ------
+        member_index : int
+            Index of the ensemble member.
+        pred : list or bool
+            Output from run_fwd_sim for the ensemble member.
+        """
+        if not list_member_index:
+            return
+
+        if self.schedule is not None and self.schedule['order'] == 'lpt':
+            list_member_index = self._lpt_order(list_member_index, input_state, num_cpus)
+
+        self._get_pool(num_cpus)
+        # drop the start reports left by an earlier forecast (e.g., from runs that were cancelled or killed); reports
+        # are tagged with the forecast id, such that late ones are ignored as well
+        self._get_started_runs({}, None)
+        self._forecast_id += 1
+        forecast_id = self._forecast_id
+
+        shm, layout, list_state = self._share_state(input_state)
+        try:
+            # Each run is identified by a run index, which is the member index for the original run, and ne + i for a
+            # speculative copy of member i. The simulator is given the member index in both cases.
+            runs = {self._submit(_run_member, (shm.name, layout), list_state[member_index], member_index,
+                                member_index, False, (forecast_id, member_index)): (member_index, member_index)
+                    for member_index in list_member_index}
+            if self.straggler is None or self.straggler['action'] != 'speculate':
+                del list_state
+
+            started = {}  # run index -> (pid of worker, start time)
+            killed = set()  # run indices that are being killed
+            unkillable = set()
+            speculated = set()  # members with a speculative copy
+            done = set()
+            run_times = {}
+            pbar = tqdm(total=len(list_member_index), disable=self.disable_tqdm)
+            try:
+                # Killed runs are waited for as well, such that they have removed their run folders before the
+                # members are run again. Runs that cannot be killed are left to finish in the background.
+                while any(el[0] not in done or (el[1] in killed and el[1] not in unkillable) for el in runs.values()):
+                    finished, _ = wait(list(runs), return_when=FIRST_COMPLETED,
+                                       timeout=None if self.straggler is None else self.straggler['poll'])
+                    self._get_started_runs(started, forecast_id)
+
+                    for future in finished:
+                        member_index, run_index = runs.pop(future)
+                        if member_index in done or future.cancelled():
+                            continue  # another copy finished first, or the run was killed before it started
+                        pred, run_time = future.result()
+                        copies = [el[1] for el in runs.values() if el[0] == member_index]
+                        if pred is False and any(el not in killed for el in copies):
+                            continue  # wait for the other copy of the member
+                        done.add(member_index)
+                        if pred is not False:
+                            run_times[member_index] = run_time
+                        killed.update(copies)
+                        pbar.update()
+                        yield member_index, pred
+
+                    if self.straggler is not None:
+                        self._check_stragglers(runs, started, killed, speculated, done, run_times,
+                                               len(list_member_index), num_cpus,
+                                               lambda m: self._submit(_run_member, (shm.name, layout), list_state[m],
+                                                                     m, m, False, (forecast_id, self.ne + m)))
+
+                    # Kill the simulator processes of killed runs. This is repeated until the run returns, since the
+                    # simulator may be restarted (rerun or redundant simulator).
+                    for future, (member_index, run_index) in runs.items():
+                        if run_index in killed and run_index not in started:
+                            future.cancel()  # not started yet
+                        elif run_index in killed and not future.done():
+                            if not self._kill_run(started[run_index][0]) and run_index not in unkillable:
+                                unkillable.add(run_index)
+                                self.logger.warning(f'Member {member_index} cannot be killed, since the simulator '
+                                                    f'does not run as a separate process. Waiting for it to finish.')
+            except BaseException:
+                # do not reuse a pool which may be broken or still busy with an aborted forecast
+                self.close_pool()
+                raise
+            finally:
+                pbar.close()
+
+            self.run_times.update(run_times)
+            if self.schedule is not None:
+                self._update_run_time_history(run_times, input_state)
+            if run_times:
+                times = np.array(list(run_times.values()))
+                self.logger.info(f'Forward runs: min {times.min():.1f} s, median {np.median(times):.1f} s, '
+                                 f'max {times.max():.1f} s')
+        finally:
+            shm.close()
+            shm.unlink()
+
+    def _state_features(self, input_state=None):
+        """
+        Member mean of each state variable, used as features in the run time regression.
+
+        Parameters
+        ----------
+        input_state : dict, optional
+            Use an input state instead of internal state (stored in self)
+
+        Returns
+        -------
+        features : ndarray
+            Features of each ensemble member, one row per member.
+        """
+        state = self.state if input_state is None else input_state
+        features = [np.mean(state[key], axis=0) for key in sorted(self.state.keys())
+                    if state[key].ndim == 2 and not state[key].dtype.hasobject]
+        return np.array(features, dtype=float).T.reshape(self.ne, -1)
+
+    def _expected_run_times(self, list_member_index, input_state=None):
+        """
+        Expected run time of the ensemble members, from the run time history. See _ext_schedule_info.
+
+        Parameters
+        ----------
+        list_member_index : list of int
+            Index of the ensemble members.
+        input_state : dict, optional
+            Use an input state instead of internal state (stored in self)
+
+        Returns
+        -------
+        expected : ndarray or None
+            Expected run time of each member, or None if there is no history.
+        """
+        if self.schedule['regression']:
+            features = self._state_features(input_state)
+            if len(self.run_time_samples) > features.shape[1] + 1:
+                x = np.array([el[0] for el in self.run_time_samples])
+                y = np.log([max(el[1], 1e-3) for el in self.run_time_samples])
+                # standardize the features, such that the fit is not dominated by the scale of a state variable
+                mu, sd = x.mean(axis=0), x.std(axis=0)
+                sd[sd == 0] = 1
+                a = np.column_stack((np.ones(len(x)), (x - mu) / sd))
+                coef = np.linalg.lstsq(a, y, rcond=None)[0]
+                a = np.column_stack((np.ones(len(list_member_index)), (features[list_member_index] - mu) / sd))
+                return np.exp(a @ coef)
+
+        known = [self.run_time_history[el] for el in list_member_index if el in self.run_time_history]
+        if not known:
+            return None
+        return np.array([self.run_time_history.get(el, np.median(known)) for el in list_member_index])
+
+    def _lpt_order(self, list_member_index, input_state, num_cpus):
+        """
+        Order the members longest-expected-first (LPT scheduling), and log the expected reduction of the makespan
+        compared with the index order.
+
+        Parameters
+        ----------
+        list_member_index : list of int
+            Index of the ensemble members to run.
+        input_state : dict
+            Use an input state instead of internal state (stored in self). Can be None.
+        num_cpus : int
+            Number of workers in the pool.
+
+        Returns
+        -------
+        list_member_index : list of int
+            Index of the ensemble members in dispatch order.
+        """
+        expected = self._expected_run_times(list_member_index, input_state)
+        if expected is None:
+            return list_member_index
+
+        order = np.argsort(-expected, kind='stable')
+        span_index = _makespan(expected, num_cpus)
+        span_lpt = _makespan(expected[order], num_cpus)
+        self.logger.info(f'LPT scheduling: expected makespan {span_lpt:.1f} s, compared with {span_index:.1f} s in '
+                         f'index order ({100 * (1 - span_lpt / span_index):.1f}% reduction)')
+
+        return [list_member_index[el] for el in order]
+
+    def _update_run_time_history(self, run_times, input_state=None):
+        """
+        Add the run times of a forecast to the run time history.
+
+        Parameters
+        ----------
+        run_times : dict
+            Member index -> run time of the successful runs.
+        input_state : dict, optional
+            Use an input state instead of internal state (stored in self)
+        """
+        w = self.schedule['smoothing']
+        for member_index, run_time in run_times.items():
+            if member_index in self.run_time_history:
+                self.run_time_history[member_index] = w * run_time + (1 - w) * self.run_time_history[member_index]
+            else:
+                self.run_time_history[member_index] = run_time
+
+        if self.schedule['regression']:
+            features = self._state_features(input_state)
+            self.run_time_samples.extend((features[member_index], run_time)
+                                         for member_index, run_time in run_times.items())
+            del self.run_time_samples[:-self.schedule['max_samples']]
+
+    def _get_started_runs(self, started, forecast_id):
+        """
+        Read the start of forward runs reported by the workers.
+
+        Parameters
+        ----------
+        started : dict
+            Run index -> (pid of worker, start time). Updated in place.
+        forecast_id : int
+            Id of the current forecast; the reports from other forecasts are dropped.
+        """
+        while True:
+            try:
+                (run_forecast, run_index), pid, t_start = self._pool_queue.get_nowait()
+            except queue.Empty:
+                break
+            if run_forecast == forecast_id:
+                started[run_index] = (pid, t_start)
+
+    def _check_stragglers(self, runs, started, killed, speculated, done, run_times, n_runs, num_cpus, submit_copy):
+        """
+        Kill or duplicate the runs that are past the deadline. See _ext_straggler_info for the options.
+
+        Parameters
+        ----------
+        runs : dict
+            Future -> (member index, run index) of the runs that have not been handled. Speculative copies are added.
+        started : dict
+            Run index -> (pid of worker, start time).
+        killed : set
+            Run indices that are being killed. Updated in place.
+        speculated : set
+            Members with a speculative copy. Updated in place.
+        done : set
+            Members that are finished.
+        run_times : dict
+            Member index -> run time of the successful runs.
+        n_runs : int
+            Number of members in the forecast.
+        num_cpus : int
+            Number of workers in the pool.
+        submit_copy : callable
+            Submit a speculative copy of a member, returns the future.
+        """
+        if len(run_times) < max(2, self.straggler['min_finished'] * n_runs):
+            return
+        deadline = self.straggler['factor'] * np.quantile(list(run_times.values()), self.straggler['quantile'])
+
+        # a worker is idle if all runs have started, and fewer runs than workers are busy
+        now = time.time()
+        busy = [el for future, el in runs.items() if not future.done()]
+        n_busy = len(busy)
+        idle = all(el[1] in started for el in busy) and n_busy < num_cpus
+        for member_index, run_index in [el for el in busy if el[1] in started and el[0] not in done]:
+            elapsed = now - started[run_index][1]
+            if run_index in killed or elapsed <= deadline:
+                continue
+            if self.straggler['action'] == 'speculate' and member_index not in speculated:
+                if idle:
+                    runs[submit_copy(member_index)] = (member_index, self.ne + member_index)
+                    speculated.add(member_index)
+                    n_busy += 1
+                    idle = n_busy < num_cpus
+                    self.logger.info(f'Member {member_index} passed the deadline of {deadline:.1f} s after '
+                                     f'{elapsed:.1f} s; started a speculative copy')
+            elif self.straggler['action'] == 'kill' or run_index != member_index:
+                # kill all copies of the member, it is then treated as a crashed member
+                killed.update(el[1] for el in runs.values() if el[0] == member_index)
+                self.logger.info(f'Member {member_index} passed the deadline of {deadline:.1f} s after '
+                                 f'{elapsed:.1f} s; killed')
+
+    @staticmethod
+    def _kill_run(pid):
+        """
+        Kill the simulator processes started by a worker.
+
+        Parameters
+        ----------
+        pid : int
+            Process id of the worker.
+
+        Returns
+        -------
+        killed : bool
+            False if the worker has no simulator processes to kill.
+        """
+        try:
+            children = psutil.Process(pid).children(recursive=True)
+        except psutil.NoSuchProcess:
+            return True
+        for child in children:
+            try:
+                child.kill()
+            except psutil.NoSuchProcess:
+                pass
+        return len(children) > 0
+
+    def close_pool(self):
+        """
+        Shut down the persistent pool of forward-run workers, if it has been started.
+        """
+        if self._pool is not None:
+            # the tasks that have not started are cancelled; shutdown(cancel_futures=True) needs Python 3.9
+            for future in list(self._pool_futures):
+                future.cancel()
+            self._pool.shutdown(wait=True)
+            self._pool_queue.close()
+            self._pool = None
+            self._pool_key = None
+            self._pool_queue = None
+            self._pool_futures = set()
+
+    def __getstate__(self):
+        # the pool of workers cannot be pickled; it is restarted on demand after a load
+        state = self.__dict__.copy()
+        state['_pool'] = None
+        state['_pool_key'] = None
+        state['_pool_queue'] = None
+        state['_pool_futures'] = set()
+        return state
+
     def save(self):
         """
         We use pickle to dump all the information we have in 'self'. Can be used, e.g., if some error has occurred.
+        Large arrays are stored as separate chunks, and only the chunks that have changed since the last save are
+        written (see misc.checkpoint). The chunks are compressed if RESTARTCOMPRESS = 'yes' in the ensemble keys.
 
         Changelog
         ---------
         - ST 28/2-17
         """
-        # Open save file and dump all info. in self
-        with open(self.pickle_restart_file, 'wb') as f:
-            pickle.dump(self.__dict__, f, protocol=4)
+        compress = self.keys_en.get('restartcompress', False) in (True, 'yes')
+        save_checkpoint(self.__getstate__(), self.pickle_restart_file, compress=compress)
 
     def load(self):
         """
-        Load a pickled file and save all info. in self.
+        Load a pickled file and save all info. in self. Large arrays are memory mapped, i.e., read when used.
 
         Changelog
         ---------
         - ST 28/2-17
         """
-        # Open file and read with pickle
-        with open(self.pickle_restart_file, 'rb') as f:
-            tmp_load = pickle.load(f)
+        tmp_load = load_checkpoint(self.pickle_restart_file)
 
         # Save in 'self'
         self.__dict__.update(tmp_load)
@@ -0,0 +1,255 @@
+"""Content-addressed cache of forward-run results."""
+
+import os
+import re
+import glob
+import pickle
+import hashlib
+import logging
+
+import numpy as np
+
+# INCLUDE statements in a run file: the keyword, optionally followed by blank or comment lines, and the file name,
+# quoted or not
+_INCLUDE = re.compile(rb"^[ \t]*INCLUDE\b.*\n(?:[ \t]*(?:--.*)?\n)*[ \t]*(?:'([^'\n]+)'|([^\s'/]+))", re.MULTILINE)
+
+# attributes of the simulator that setup_fwd_run depends on or sets
+_SETUP_ATTRS = ('l_prim', 'true_order', 'true_prim', 'all_data_types', 'level')
+
+
+class FwdRunCache:
+    """
+    On-disk cache of the predicted data from forward runs. An entry is addressed by a hash of the state of the
+    ensemble member, the auxiliary input and the simulator set-up (see sim_signature), such that members whose state
+    has not changed (e.g., after a rejected iteration or in a restart) are not simulated again.
+    Each entry is stored as a pickle file in the cache folder. The least recently used entries are removed when the
+    cache grows beyond the given size or number of entries.
+
+    Examples
+    --------
+    The cache is switched on with the FWD_CACHE keyword in the ensemble keys, e.g.,
+
+    >>> keys_en['fwd_cache'] = [['folder', 'fwd_cache'], ['max_size', 2.0], ['max_entries', 1000]]
+
+    where max_size is given in GB. Setting the keyword to True uses the default values.
+    """
+
+    def __init__(self, folder='fwd_cache', max_size=None, max_entries=None):
+        """
+        Parameters
+        ----------
+        folder : str, optional
+            Folder with the cache entries. It is created if it does not exist.
+        max_size : float, optional
+            Maximum size of the cache in GB. Default is no limit.
+        max_entries : int, optional
+            Maximum number of entries in the cache. Default is no limit.
+        """
+        self.folder = folder
+        self.max_size = None if max_size is None else float(max_size) * 1024 ** 3
+        self.max_entries = None if max_entries is None else int(max_entries)
+        self.hits = 0
+        self.misses = 0
+        self.logger = logging.getLogger('PET')
+
+        os.makedirs(self.folder, exist_ok=True)
+
+    @classmethod
+    def from_keys(cls, opts):
+        """
+        Make a cache from the FWD_CACHE keyword.
+
+        Parameters
+        ----------
+        opts : bool, str or list
+            True for the default options, the cache folder, or a list of [option, value] pairs (folder, max_size,
+            max_entries).
+
+        Returns
+        -------
+        cache : FwdRunCache or None
+            The cache, or None if the keyword switches the cache off.
+        """
+        if opts is None or opts is False or opts == 'no':
+            return None
+        if opts is True or opts == 'yes':
+            return cls()
+        if isinstance(opts, str):
+            return cls(folder=opts)
+        if isinstance(opts, dict):
+            return cls(**opts)
+        if not isinstance(opts[0], (list, tuple)):  # only one option given
+            opts = [opts]
+        return cls(**{opt: val for opt, val in opts})
+
+    @staticmethod
+    def sim_signature(sim):
+        """
+        Hash the parts of the simulator that determine the predicted data: the class, the input dictionary, the
+        set-up from setup_fwd_run (report steps and data types, fidelity level), the run file templates
+        (<file>.mako and <file>_E300.mako in the working folder) and the files they INCLUDE, and the same for the
+        redundant simulator, if any.
+
+        Parameters
+        ----------
+        sim : object
+            Forward simulator.
+
+        Returns
+        -------
+        signature : bytes
+            Digest of the simulator set-up.
+        """
+        h = hashlib.sha1()
+        h.update(f'{type(sim).__module__}.{type(sim).__name__}'.encode())
+        h.update(pickle.dumps(getattr(sim, 'input_dict', None), protocol=4))
+        h.update(pickle.dumps({attr: getattr(sim, attr, None) for attr in _SETUP_ATTRS}, protocol=4))
+        file = getattr(sim, 'file', None)
+        if isinstance(file, str):
+            h.update(file.encode())
+            FwdRunCache._hash_files(h, ['%s.mako' % file, '%s_E300.mako' % file], set())
+        redund_sim = getattr(sim, 'redund_sim', None)
+        if redund_sim is not None:
+            h.update(FwdRunCache.sim_signature(redund_sim))
+        return h.digest()
+
+    @staticmethod
+    def _hash_files(h, paths, seen):
+        """
+        Add the content of run files, and of the files they INCLUDE, to a hash. The included files are looked for
+        relative to the working folder and relative to the run folders (En_<member>) one level below it, where the
+        run files are written.
+        """
+        for path in paths:
+            path = os.path.normpath(path)
+            if path in seen or not os.path.isfile(path):
+                continue
+            seen.add(path)
+            with open(path, 'rb') as f:
+                content = f.read()
+            h.update(path.encode())
+            h.update(content)
+            for match in _INCLUDE.finditer(content):
+                name = (match.group(1) or match.group(2)).decode(errors='replace').strip()
+                if '${' in name:  # set by the template; the input to it is part of the member key
+                    continue
+                FwdRunCache._hash_files(h, [name, os.path.join('En_0', name)], seen)
+
+    @staticmethod
+    def member_key(state, aux_input=None, signature=b''):
+        """
+        Hash the state of an ensemble member.
+
+        Parameters
+        ----------
+        state : dict
+            State of the ensemble member.
+        aux_input : optional
+            Auxiliary input to the simulator for the ensemble member.
+        signature : bytes, optional
+            Digest of the simulator set-up (see sim_signature).
+
+        Returns
+        -------
+        key : str
+            Key of the cache entry.
+        """
+        h = hashlib.sha1(signature)
+        for key in sorted(state.keys()):
+            arr = np.ascontiguousarray(state[key])
+            h.update(key.encode())
+            h.update(f'{arr.dtype.str}{arr.shape}'.encode())
+            if arr.dtype.hasobject:
+                h.update(pickle.dumps(arr, protocol=4))
+            else:
+                h.update(arr.tobytes())
+        h.update(pickle.dumps(aux_input, protocol=4))
+        return h.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.folder, key + '.pkl')
+
+    def get(self, key):
+        """
+        Get the predicted data for a cache key.
+
+        Parameters
+        ----------
+        key : str
+            Key of the cache entry.
+
+        Returns
+        -------
+        pred_data : list of dict or None
+            The stored predicted data, or None if the key is not in the cache.
+        """
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                pred_data = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            self.misses += 1
+            return None
+
+        # mark the entry as recently used
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        self.hits += 1
+        return pred_data
+
+    def put(self, key, pred_data):
+        """
+        Store the predicted data for a cache key, and evict the least recently used entries if the cache is full.
+
+        Parameters
+        ----------
+        key : str
+            Key of the cache entry.
+        pred_data : list of dict
+            Predicted data from the forward run.
+        """
+        path = self._path(key)
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(pred_data, f, protocol=4)
+        os.replace(tmp_path, path)  # atomic, such that a partly written entry is never read
+        self._evict()
+
+    def _evict(self):
+        if self.max_size is None and self.max_entries is None:
+            return
+
+        entries = []
+        for path in glob.glob(os.path.join(self.folder, '*.pkl')):
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        entries.sort()
+
+        tot_size = sum(el[1] for el in entries)
+        n_entries = len(entries)
+        for _, size, path in entries:
+            if (self.max_size is None or tot_size <= self.max_size) and \
+                    (self.max_entries is None or n_entries <= self.max_entries):
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            tot_size -= size
+            n_entries -= 1
+
+    def log_stats(self):
+        """
+        Write the number of cache hits and misses to the log, and reset the counters.
+        """
+        tot = self.hits + self.misses
+        if tot:
+            self.logger.info(f'Forward-run cache: {self.hits} hits, {self.misses} misses '
+                             f'({100 * self.hits / tot:.1f}% hit rate)')
+        self.hits = 0
+        self.misses = 0
@@ -0,0 +1,179 @@
+"""Incremental, chunked checkpoint of Python objects with large numpy arrays."""
+
+import os
+import io
+import glob
+import shutil
+import pickle
+import hashlib
+import logging
+
+import numpy as np
+
+log = logging.getLogger(__name__)  # pylint: disable=invalid-name
+
+# Arrays smaller than this (in bytes) are kept in the manifest
+MIN_ARRAY_SIZE = 64 * 1024
+
+# Arrays larger than this (in bytes) are split along the first axis in chunks of about this size
+CHUNK_SIZE = 256 * 1024 ** 2
+
+
+def _array_folder(filename):
+    return filename + '_arrays'
+
+
+class _Pickler(pickle.Pickler):
+    """
+    Pickler that writes large numpy arrays to separate chunk files. Each chunk file is named by the hash of its
+    content, such that chunks that have not changed since the last checkpoint are not written again.
+    """
+
+    def __init__(self, file, folder, compress, chunk_size):
+        super().__init__(file, protocol=4)
+        self.folder = folder
+        self.compress = compress
+        self.chunk_size = chunk_size
+        self.refs = {}  # id of array -> reference
+        self.keep = []  # the arrays must be kept alive while pickling, since their id is used
+        self.chunks = set()  # chunk files used by this checkpoint
+        self.n_written = 0
+        self.n_bytes = 0
+
+    def persistent_id(self, obj):
+        if type(obj) not in (np.ndarray, np.memmap) or obj.dtype.hasobject or obj.nbytes < MIN_ARRAY_SIZE:
+            return None
+        if id(obj) in self.refs:
+            return self.refs[id(obj)]
+
+        arr = np.ascontiguousarray(obj)
+        row_bytes = max(arr.nbytes // max(arr.shape[0], 1), 1)
+        rows = max(self.chunk_size // row_bytes, 1)
+        ext = '.npz' if self.compress else '.npy'
+        chunks = []
+        for start in range(0, arr.shape[0], rows):
+            chunk = arr[start:start + rows]
+            digest = hashlib.blake2b(f'{chunk.dtype.str}{chunk.shape}'.encode(), digest_size=20)
+            digest.update(chunk.data)
+            name = digest.hexdigest() + ext
+            path = os.path.join(self.folder, name)
+            if name not in self.chunks and not os.path.exists(path):
+                tmp_path = path + '.tmp'
+                with open(tmp_path, 'wb') as f:
+                    if self.compress:
+                        np.savez_compressed(f, chunk=chunk)
+                    else:
+                        np.save(f, chunk)
+                os.replace(tmp_path, path)
+                self.n_written += 1
+                self.n_bytes += chunk.nbytes
+            self.chunks.add(name)
+            chunks.append(name)
+
+        ref = ('ndarray', len(self.refs), tuple(chunks))
+        self.refs[id(obj)] = ref
+        self.keep.append(obj)
+        return ref
+
+
+class _Unpickler(pickle.Unpickler):
+    """
+    Unpickler that maps the array chunks of a checkpoint. Arrays stored as a single uncompressed chunk are memory
+    mapped copy-on-write, i.e., they are read from disk when used, and changes are not written back to the file.
+    """
+
+    def __init__(self, file, folder):
+        super().__init__(file)
+        self.folder = folder
+        self.arrays = {}
+
+    def persistent_load(self, pid):
+        typ, indx, chunks = pid
+        if typ != 'ndarray':
+            raise pickle.UnpicklingError(f'Unknown persistent id {pid}')
+        if indx not in self.arrays:
+            parts = []
+            for name in chunks:
+                path = os.path.join(self.folder, name)
+                if name.endswith('.npz'):
+                    with np.load(path) as f:
+                        parts.append(f['chunk'])
+                else:
+                    parts.append(np.load(path, mmap_mode='c'))
+            self.arrays[indx] = parts[0] if len(parts) == 1 else np.concatenate(parts)
+        return self.arrays[indx]
+
+
+def save_checkpoint(obj, filename, compress=False, chunk_size=CHUNK_SIZE):
+    """
+    Save an object (typically the __dict__ of a class) as a checkpoint. Large numpy arrays are written as chunk files
+    in the folder <filename>_arrays, and only the chunks that have changed since the last checkpoint are written. The
+    rest of the object is pickled to the manifest, <filename>.
+
+    Parameters
+    ----------
+    obj : object
+        Object to save. Must be picklable.
+    filename : str
+        Name of the manifest file.
+    compress : bool, optional
+        Compress the array chunks. Compressed arrays are read in full on load. Default is False.
+    chunk_size : int, optional
+        Approximate size in bytes of the array chunks.
+    """
+    folder = _array_folder(filename)
+    os.makedirs(folder, exist_ok=True)
+
+    buf = io.BytesIO()
+    pickler = _Pickler(buf, folder, compress, chunk_size)
+    pickler.dump(obj)
+
+    tmp_path = filename + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(buf.getbuffer())
+    os.replace(tmp_path, filename)
+
+    # remove the chunks that are not used anymore (arrays already mapped from them are not affected on posix)
+    removed = 0
+    for path in glob.glob(os.path.join(folder, '*.np[yz]')):
+        if os.path.basename(path) not in pickler.chunks:
+            try:
+                os.remove(path)
+                removed += 1
+            except OSError:
+                pass
+
+    log.info(f'Checkpoint {filename}: wrote {pickler.n_written} of {len(pickler.chunks)} array chunks '
+             f'({pickler.n_bytes / 1024 ** 2:.1f} MB), removed {removed}')
+
+
+def load_checkpoint(filename):
+    """
+    Load an object saved with save_checkpoint. Plain pickle files (from earlier versions) are also read.
+
+    Parameters
+    ----------
+    filename : str
+        Name of the manifest file.
+
+    Returns
+    -------
+    obj : object
+        The saved object.
+    """
+    with open(filename, 'rb') as f:
+        return _Unpickler(f, _array_folder(filename)).load()
+
+
+def remove_checkpoint(filename):
+    """
+    Remove a checkpoint, i.e., the manifest and the array chunks.
+
+    Parameters
+    ----------
+    filename : str
+        Name of the manifest file.
+    """
+    if os.path.isfile(filename):
+        os.remove(filename)
+    shutil.rmtree(_array_folder(filename), ignore_errors=True)
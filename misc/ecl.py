@@ -2,17 +2,23 @@
 """
 from __future__ import division
 import argparse
+import bisect
 import codecs
 import collections
+import collections.abc
 import datetime
 import fnmatch
 import logging
+import mmap
 import numpy
 import numpy.ma
 import os
 import os.path as path
+import pickle
 import struct
 import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
 
 # import these from the common package, since we may need to use the same
@@ -44,6 +50,27 @@ _DataDescr = collections.namedtuple('_DataDescr', [
 ])
 
 
+# catalogs of the files that have been indexed, by the full path of the file;
+# each entry holds the stamp of the file when it was indexed, and the catalog
+_CATALOGS = collections.OrderedDict()
+_CATALOGS_LOCK = threading.Lock()
+
+# maximum number of catalogs kept in memory; the least recently used ones
+# are dropped first
+CATALOG_CACHE_SIZE = 256
+
+# if set, the catalog of a file is also stored in a sidecar file next to it,
+# so that other processes (or later runs) need not index the file again
+persist_catalog = False
+
+# extension of the sidecar files (added to the full file name)
+_SIDECAR_EXT = '.idx'
+
+# records smaller than this (in bytes) are copied out of the memory map,
+# such that they do not keep the mapping of the whole file alive
+_MIN_VIEW_SIZE = 64 * 1024
+
+
 def _read_descr(fileobj):
     """
     Read the opened file and build a descriptor record of the following data array.
@@ -127,6 +154,32 @@ _TYPES = {
 }
 
 
+def _data_type(typ):
+    """
+    Get the description of a type of data.
+
+    Besides the fixed types, character strings longer than 8 chars are
+    stored with the type C0nn, where nn is the number of characters.
+
+    Parameters
+    ----------
+    typ : str
+        Type of data, as stored in the record descriptor.
+
+    Returns
+    -------
+    _DataType
+        Description of the type.
+    """
+    if typ not in _TYPES and typ.startswith('C0') and typ[2:].isdigit():
+        siz = int(typ[1:])
+        _TYPES[typ] = _DataType(siz=siz, fmt='c', nch=False,
+                                dsk=numpy.dtype('|S{0:d}'.format(siz)),
+                                mem=numpy.dtype('<{0}{1:d}'.format(
+                                    _STR_TYPE, siz)))
+    return _TYPES[typ]
+
+
 def _skip_rec(fileobj, num, typ):
     """
     Skip one or more records for a certain number of entries.
@@ -146,7 +199,7 @@ def _skip_rec(fileobj, num, typ):
         Number of data records that were skipped.
     """
     # total number of bytes to be skipped
-    remaining = num * _TYPES[typ].siz
+    remaining = num * _data_type(typ).siz
 
     # number of records these bytes were stored in
     rcs = 0
@@ -210,87 +263,451 @@ def _build_cat(fileobj):
     return (cnt, cat)
 
 
-def _read_rec(fileobj, descr):
+def _split_steps(cnt, cat, marker):
     """
-    Read a set of records for a descriptor.
+    Split the catalog of a unified file into report steps.
+
+    Each report step starts with a marker record (SEQNUM in unified restart
+    files, SEQHDR in unified summary files), and the catalog of a step
+    contains the records up to the next marker.
+
+    Parameters
+    ----------
+    cnt : dict
+        Number of occurrences of each keyword in the file.
+    cat : dict
+        Catalog of the whole file, as returned by _build_cat.
+    marker : str
+        Keyword of the record that starts a report step, padded to 8 chars.
+
+    Returns
+    -------
+    list of tuple
+        For each report step in the order of the file, a tuple containing the
+        descriptor of the marker record, the descriptor of the integer header
+        (None if the step has no INTEHEAD), and the catalog of the step.
+        (_DataDescr, _DataDescr, tuple of dict)
+    """
+    # the markers are found in the order of the file by their sequence
+    # number, and the steps are then made by sorting all the records by
+    # their position in between them
+    bounds = [cat[_DataKey(kwd=marker, seq=ndx)].pos
+              for ndx in range(cnt.get(marker, 0))]
+    steps = [[cat[_DataKey(kwd=marker, seq=ndx)], None, ({}, {})]
+             for ndx in range(len(bounds))]
+    for key in sorted(cat.keys(), key=lambda k: cat[k].pos):
+        descr = cat[key]
+
+        # records before the first marker does not belong to any step
+        ndx = bisect.bisect_right(bounds, descr.pos) - 1
+        if ndx < 0:
+            log.debug("Skipping record \"%s\" before first report step",
+                      key.kwd.rstrip())
+            continue
+        step = steps[ndx]
+
+        # the header of the step holds its date
+        if key.kwd == 'INTEHEAD' and step[1] is None:
+            step[1] = descr
+
+        # the sequence number of a keyword is counted within its step, so
+        # that the catalog looks just like the one of a non-unified file
+        step_cnt, step_cat = step[2]
+        step_cnt[key.kwd] = step_cnt.get(key.kwd, 0) + 1
+        step_cat[_DataKey(kwd=key.kwd, seq=step_cnt[key.kwd] - 1)] = descr
+
+    return [tuple(step) for step in steps]
+
+
+def _map_file(fileobj):
+    """
+    Map an opened file into memory.
+
+    The mapping is copy-on-write, so that arrays viewing it can be changed
+    without changing the file.
 
     Parameters
     ----------
     fileobj : io.BufferedReader
         File object opened in binary read mode.
+
+    Returns
+    -------
+    mmap.mmap
+        Memory map of the entire file, or None if the file is empty (which
+        cannot be mapped).
+    """
+    if os.fstat(fileobj.fileno()).st_size == 0:
+        return None
+    return mmap.mmap(fileobj.fileno(), 0, access=mmap.ACCESS_COPY)
+
+
+def _unmap_file(mem):
+    """Release a memory map of a file.
+
+    Arrays that are returned from the reader are views of the map; as long
+    as any of them is alive, the map cannot be closed, and is instead
+    released together with the last of them.
+    """
+    if mem is not None:
+        try:
+            mem.close()
+        except BufferError:
+            pass
+
+
+def _file_stamp(fileobj):
+    """Stamp that identifies the contents of an opened file: its size,
+    modification time and inode number.
+    """
+    stat = os.fstat(fileobj.fileno())
+    return (stat.st_size, stat.st_mtime_ns, stat.st_ino)
+
+
+def _read_sidecar(filename, stamp):
+    """
+    Read the catalog of a file from its sidecar file.
+
+    Parameters
+    ----------
+    filename : str
+        Name of the sidecar file.
+    stamp : tuple
+        Stamp of the data file; the catalog is only used if it was made for
+        the same version of the file.
+
+    Returns
+    -------
+    tuple of dict
+        Catalog of the file, as returned by _build_cat, or None if there is no
+        valid sidecar file.
+    """
+    try:
+        with open(filename, 'rb') as fileobj:
+            side_stamp, records = pickle.load(fileobj)
+    except (OSError, EOFError, ValueError, pickle.UnpicklingError):
+        return None
+    if tuple(side_stamp) != stamp:
+        return None
+
+    # the records are stored as plain tuples, in the order of the file
+    cnt = {}
+    cat = {}
+    for kwd, seq, pos, num, typ, rcs in records:
+        cnt[kwd] = max(cnt.get(kwd, 0), seq + 1)
+        cat[_DataKey(kwd=kwd, seq=seq)] = (
+            _DataDescr(pos=pos, num=num, typ=typ, rcs=rcs))
+    return (cnt, cat)
+
+
+def _write_sidecar(filename, stamp, cat):
+    """
+    Write the catalog of a file to its sidecar file.
+
+    Failure to write (e.g. in a read-only directory) is not an error; the file
+    is then indexed again the next time.
+
+    Parameters
+    ----------
+    filename : str
+        Name of the sidecar file.
+    stamp : tuple
+        Stamp of the data file.
+    cat : dict
+        Catalog of the data file.
+    """
+    records = [tuple(key) + tuple(descr) for key, descr in cat.items()]
+    tmp_name = '{0}.{1}.tmp'.format(filename, os.getpid())
+    try:
+        with open(tmp_name, 'wb') as fileobj:
+            pickle.dump((stamp, records), fileobj, protocol=4)
+        os.replace(tmp_name, filename)
+    except OSError as err:
+        log.debug("Could not write index file \"%s\": %s", filename, err)
+
+
+def _get_cat(fileobj, filename):
+    """
+    Get the catalog of a file. It is only built if the file has changed since
+    the last time it was indexed, and it is not stored in a sidecar file.
+
+    Parameters
+    ----------
+    fileobj : io.BufferedReader
+        File object opened in binary read mode.
+    filename : str
+        Name of the file.
+
+    Returns
+    -------
+    tuple of dict
+        Catalog of the file, as returned by _build_cat. It is shared between
+        all users of the file, and must not be changed.
+    """
+    stamp = _file_stamp(fileobj)
+    full_name = os.path.abspath(filename)
+    with _CATALOGS_LOCK:
+        entry = _CATALOGS.get(full_name)
+        if entry is not None and entry[0] == stamp:
+            _CATALOGS.move_to_end(full_name)
+            return entry[1]
+
+    catalog = None
+    sidecar = filename + _SIDECAR_EXT
+    if persist_catalog:
+        catalog = _read_sidecar(sidecar, stamp)
+    if catalog is None:
+        log.debug("Indexing data file \"%s\"", filename)
+        catalog = _build_cat(fileobj)
+        if persist_catalog:
+            _write_sidecar(sidecar, stamp, catalog[1])
+
+    with _CATALOGS_LOCK:
+        _CATALOGS[full_name] = (stamp, catalog)
+        _CATALOGS.move_to_end(full_name)
+        while len(_CATALOGS) > CATALOG_CACHE_SIZE:
+            _CATALOGS.popitem(last=False)
+    return catalog
+
+
+def _read_rec(mem, descr):
+    """
+    Read a set of records for a descriptor.
+
+    Numeric data are returned in the (big-endian) byte order of the file;
+    NumPy converts them to the native order of the machine when they are
+    used in calculations, or they can be converted explicitly with
+    `_native`, as is done for the data returned to the simulators.
+
+    Parameters
+    ----------
+    mem : mmap.mmap
+        Memory map of the file.
     descr : _DataDescr
         Descriptor for where the property is stored.
 
     Returns
     -------
     numpy.ndarray
-        Array of records read from the file.
+        Array of records read from the file. If the data are stored in one
+        physical record of at least _MIN_VIEW_SIZE bytes, the array is a view
+        of the memory map.
     """
-    # seek to the appropriate place in the file
-    fileobj.seek(descr.pos, os.SEEK_SET)
-
     # get a description of the type of data
-    rec_typ = _TYPES[descr.typ]
+    rec_typ = _data_type(descr.typ)
+
+    # an empty array does not have any data records at all
+    if descr.rcs == 0:
+        data = numpy.empty(descr.num, dtype=rec_typ.dsk)
+
+    # if there is only one record, then the array is found right after
+    # the leading record size, and can be used directly from the file
+    elif descr.rcs == 1:
+        rec_siz, = struct.unpack_from('>i', mem, descr.pos)
+        assert (rec_siz == descr.num * rec_typ.siz)
+        data = numpy.frombuffer(mem, dtype=rec_typ.dsk, count=descr.num,
+                                offset=descr.pos + 4)
+        if rec_siz < _MIN_VIEW_SIZE:
+            data = data.copy()
+
+    # otherwise, the records are gathered into a new array
+    else:
+        data = _gather_rec(mem, descr, rec_typ)
 
-    # pre-allocate an array so we can just read straight into it
-    data = numpy.empty(descr.num, dtype=rec_typ.dsk)
+    # character data must be converted into the correct number of bytes
+    # per character, and the padding with blanks removed; this is done for
+    # the whole array at once. numeric data are used as they are
+    if not rec_typ.nch:
+        data = numpy.char.rstrip(data.astype(rec_typ.mem))
 
-    # start reading into the front of the array
-    fst = 0
+    return data
 
-    # read as many records as needed from here on
-    for rec_ndx in range(descr.rcs):  # pylint: disable=unused-variable
-        # how many bytes are there in this particular record
-        rec_siz, = struct.unpack('>i', fileobj.read(4))
 
+def _native(data):
+    """Copy of an array in the native byte order of the machine.
+
+    The copy does not refer to the memory map of the file, such that the
+    file can be closed (or removed) while the data are in use.
+    """
+    if data is None:
+        return None
+    return data.astype(data.dtype.newbyteorder('='))
+
+
+def _gather_rec(mem, descr, rec_typ):
+    """
+    Gather data that are split over several records into one array.
+
+    Parameters
+    ----------
+    mem : mmap.mmap
+        Memory map of the file.
+    descr : _DataDescr
+        Descriptor for where the property is stored.
+    rec_typ : _DataType
+        Type of the data.
+
+    Returns
+    -------
+    numpy.ndarray
+        Array of records read from the file.
+    """
+    # the array that the data are gathered into; it is filled as raw bytes
+    data = numpy.empty(descr.num, dtype=rec_typ.dsk)
+    raw = data.view(numpy.uint8)
+
+    # Eclipse writes all records but the last with the same size, so the
+    # leading sizes should be found at a regular stride in the file
+    rec_siz, = struct.unpack_from('>i', mem, descr.pos)
+    stride = rec_siz + 8
+    num_full = descr.rcs - 1
+    last_pos = descr.pos + num_full * stride
+    regular = (last_pos + 4 <= len(mem))
+    if regular:
+        heads = numpy.ndarray((num_full,), dtype='>i4', buffer=mem,
+                              offset=descr.pos, strides=(stride,))
+        last_siz, = struct.unpack_from('>i', mem, last_pos)
+        regular = (numpy.all(heads == rec_siz) and
+                   num_full * rec_siz + last_siz == raw.shape[0])
+
+    if regular:
         # an item cannot be split over two physical records
         assert (rec_siz % rec_typ.siz == 0)
 
-        # how many *items* are there in this record
-        rec_num = int(abs(rec_siz) / rec_typ.siz)
+        # copy all the full records in one go, skipping the record sizes,
+        # and then the remaining record
+        full = numpy.ndarray((num_full, rec_siz), dtype=numpy.uint8,
+                             buffer=mem, offset=descr.pos + 4,
+                             strides=(stride, 1))
+        fst = num_full * rec_siz
+        raw[:fst].reshape(num_full, rec_siz)[...] = full
+        raw[fst:] = numpy.frombuffer(mem, dtype=numpy.uint8,
+                                     count=last_siz, offset=last_pos + 4)
+    else:
+        # records of irregular size; walk them one by one
+        pos = descr.pos
+        fst = 0
+        for rec_ndx in range(descr.rcs):  # pylint: disable=unused-variable
+            rec_siz, = struct.unpack_from('>i', mem, pos)
+            assert (rec_siz % rec_typ.siz == 0)
+            raw[fst:(fst + rec_siz)] = numpy.frombuffer(
+                mem, dtype=numpy.uint8, count=rec_siz, offset=pos + 4)
+            fst += rec_siz
+            pos += rec_siz + 8
 
-        # now we know which range we are going to read into;
-        # bulk load it directly from file. character records need special
-        # handling.
-        if rec_typ.nch:
-            data[fst:(fst + rec_num)] = (
-                numpy.fromfile(fileobj, dtype=rec_typ.dsk, count=rec_num))
-        else:
-            # load the characters as uint8 raw bytes from the file
-            raw = numpy.fromfile(fileobj, dtype=numpy.uint8,
-                                 count=rec_num * rec_typ.siz)
-            for item_ndx in range(rec_num):
-                # start and end iterator for where in the raw array the bytes
-                # for this particular item in the array is; each of the strings
-                # are considered to be *exactly* 8 bytes by Eclipse
-                beg = (item_ndx + 0) * rec_typ.siz
-                end = (item_ndx + 1) * rec_typ.siz
-
-                # convert these raw characters into a sensible string, and
-                # store them in the output array
-                str_val = codecs.ascii_decode(bytearray(raw[beg: end]))[0]
-                data[fst + item_ndx] = str_val.rstrip()
-
-        # skip the trailing record size
-        fileobj.seek(4, os.SEEK_CUR)
-
-        # move to the next window
-        fst += rec_num
-
-    # if we loaded big-endian data on a little-endian machine,
-    # swap the entire array in-place now, and then cast it
-    # (with a view) to the native type so we see the bits as
-    # the right values again
+    return data
+
+
+# maximum number of items in each physical record of a data array, as in the
+# files written by Eclipse; character data are written in shorter records
+_REC_ITEMS = 1000
+_CHAR_REC_ITEMS = 105
+
+
+def _write_rec(fileobj, kwd, data, typ):
+    """
+    Write the descriptor and the data records of an array.
+
+    Parameters
+    ----------
+    fileobj : io.BufferedWriter
+        File object opened in binary write mode.
+    kwd : str
+        Keyword of the array; at most eight characters.
+    data : numpy.ndarray
+        Values of the array, shape (n,).
+    typ : str
+        Type of data, as stored in the record descriptor.
+
+    Returns
+    -------
+    None
+    """
+    if len(kwd) > 8:
+        raise ValueError(
+            "Keyword \"{0}\" is longer than eight characters".format(kwd))
+    rec_typ = _data_type(typ)
+    num = len(data)
+    fileobj.write(struct.pack('>i8si4si', 16,
+                              codecs.ascii_encode(kwd.upper().ljust(8))[0],
+                              num, codecs.ascii_encode(typ)[0], 16))
+
+    # character data are padded with blanks, numeric data are big-endian
     if rec_typ.nch:
-        if sys.byteorder != 'big':
-            data.byteswap(True)
-        data = data.view(rec_typ.mem)
+        items = _REC_ITEMS
+        data = numpy.ascontiguousarray(data, dtype=rec_typ.dsk)
     else:
-        # character data cannot be casted, but must be converted into the
-        # correct number of bytes per character
-        data = data.astype(rec_typ.mem)
+        items = _CHAR_REC_ITEMS
+        data = numpy.char.ljust(numpy.asarray(data).astype(rec_typ.dsk),
+                                rec_typ.siz)
+    raw = data.view(numpy.uint8)
+
+    # all full records are written in one go, each with the record size
+    # before and after it, and then the remaining record
+    rec_siz = items * rec_typ.siz
+    num_full = num // items
+    fst = num_full * rec_siz
+    marker = numpy.frombuffer(struct.pack('>i', rec_siz), dtype=numpy.uint8)
+    full = numpy.empty((num_full, rec_siz + 8), dtype=numpy.uint8)
+    full[:, :4] = marker
+    full[:, 4:-4] = raw[:fst].reshape(num_full, rec_siz)
+    full[:, -4:] = marker
+    fileobj.write(full)
+    if fst < len(raw):
+        last = struct.pack('>i', len(raw) - fst)
+        fileobj.write(last + raw[fst:].tobytes() + last)
+
+
+def write_keywords(filename, arrays, double=False):
+    """
+    Write arrays to a binary file with the same format as the output files
+    of Eclipse (unformatted, big-endian Fortran records). Such a file can be
+    read by the simulator with the IMPORT keyword, which is much faster
+    than parsing the same arrays as text.
 
-    return data
+    Parameters
+    ----------
+    filename : str
+        Name of the file to write, including path.
+    arrays : dict
+        Values of each keyword, in the order they are written. The values
+        are written in the order they are stored, i.e., with the i index
+        running fastest for arrays of shape (nk, nj, ni). Masked and NaN
+        values (which we typically use for inactive cells) are written as
+        zero.
+    double : bool
+        Write floating-point arrays in double precision (DOUB) instead of
+        single precision (REAL).
+
+    Returns
+    -------
+    None
+
+    Examples
+    --------
+    >>> write_keywords('PERM.IMPORT', {'PERMX': permx, 'PERMY': permy})
+
+    and in the data file:
+
+    >>> IMPORT
+    >>> 'PERM.IMPORT' /
+    """
+    with open(path.expanduser(filename), 'wb') as fileobj:
+        for kwd, values in arrays.items():
+            data = numpy.ravel(numpy.ma.filled(values, 0))
+            if numpy.issubdtype(data.dtype, numpy.floating):
+                typ = 'DOUB' if double else 'REAL'
+                data = numpy.where(numpy.isnan(data), 0, data)
+            elif numpy.issubdtype(data.dtype, numpy.integer) or \
+                    data.dtype == numpy.bool_:
+                typ = 'INTE'
+            elif data.dtype.kind in 'SU':
+                typ = 'CHAR'
+            else:
+                raise TypeError(
+                    "Cannot write values of type {0} for keyword \"{1}\"".format(
+                        data.dtype, kwd))
+            _write_rec(fileobj, kwd, data, typ)
 
 
 class EclipseFile (object):
@@ -299,7 +716,7 @@ class EclipseFile (object):
     Access to this object must be within a monitor (`with`-statement).
     """
 
-    def __init__(self, root, ext):
+    def __init__(self, root, ext, catalog=None):
         """
         Initialize file object from a path in the filesystem.
 
@@ -309,18 +726,27 @@ class EclipseFile (object):
             Stem of the file name (including directory).
         ext : str
             Extension of the file to read from.
+        catalog : tuple of dict, optional
+            Catalog of the records that are read from the file, as returned
+            by _build_cat. This is used to read one report step of a unified
+            file. Default is the catalog of the whole file, which is only
+            built the first time the file is opened (see _get_cat).
 
         Returns
         -------
         None
         """
-        # keep the file open (and locked) to read from it
+        # keep the file open (and locked) to read from it; the data are
+        # read from a memory map of the file
         self.filename = '{0}.{1}'.format(root, ext.upper())
         self.fileobj = open(self.filename, 'rb')
+        self.mem = _map_file(self.fileobj)
 
         # index the file so that we can find properties easily
-        log.debug("Indexing data file \"%s\"", self.filename)
-        self.cnt, self.cat = _build_cat(self.fileobj)
+        if catalog is None:
+            self.cnt, self.cat = _get_cat(self.fileobj, self.filename)
+        else:
+            self.cnt, self.cat = catalog
 
     def __enter__(self):
         self.fileobj.__enter__()
@@ -328,6 +754,7 @@ class EclipseFile (object):
 
     def __exit__(self, typ, val, traceback):
         """Close the underlaying file object when we go out of scope."""
+        _unmap_file(self.mem)
         self.fileobj.__exit__(typ, val, traceback)
 
     def get(self, kwd, seq=0):
@@ -354,7 +781,7 @@ class EclipseFile (object):
         key = _DataKey(kwd=kwd, seq=seq)
         if key in self.cat:
             descr = self.cat[key]
-            data = _read_rec(self.fileobj, descr)
+            data = _read_rec(self.mem, descr)
             return data
         else:
             return None
@@ -493,6 +920,18 @@ class EclipseGrid (object):
                 }
 
 
+def _active_index(grid):
+    """Flat (C order) index of the active cells of a grid, which is used to
+    scatter active-cell data into the full grid. It is computed the first
+    time it is needed and kept in the grid object.
+    """
+    index = getattr(grid, '_active_ndx', None)
+    if index is None:
+        index = numpy.flatnonzero(grid.actnum)
+        grid._active_ndx = index
+    return index
+
+
 # Eclipse 300 on Windows initialize the intehead array to this value
 # and doesn't bother to write all values
 _UNINITIALIZED = -2345
@@ -540,14 +979,24 @@ def _intehead_date(intehead):
 class EclipseData (object):
     """Base class for both static and recurrent data."""
 
-    def __init__(self, grid, root, ext):
+    def __init__(self, grid, root, ext, unified=None, seq=None):
         self.grid = grid  # grid extent information
         self.root = root  # underlaying file name
         self.ext = ext    # connected file with extent of grid
+        self.unified = unified  # index of unified file, if any
+        self.seq = seq    # report step in the unified file
 
         # list of components isn't loaded yet (and may never be)
         self.comp = None
 
+    def _open(self):
+        """Open the data file, or only this report step if the data are
+        stored in a unified file.
+        """
+        if self.unified is not None:
+            return self.unified.step(self.seq)
+        return EclipseFile(self.root, self.ext)
+
     def components(self):
         """Components that exist in the restart file. Components used in the
         simulation are stored in all the restart files instead of once in the
@@ -558,7 +1007,7 @@ class EclipseData (object):
         # they are needed to lookup property names.
         if self.comp is None:
             # load that datafile
-            with EclipseFile(self.root, self.ext) as store:
+            with self._open() as store:
                 raw_comp = store.get('ZCOMPS')
 
             # create a dictionary over all the components, in the order they
@@ -638,7 +1087,7 @@ class EclipseData (object):
 
         return name
 
-    def cell_data(self, selector):
+    def cell_data(self, selector, active_only=False):
         """
         Get a field property for every cell at this restart step.
 
@@ -647,11 +1096,15 @@ class EclipseData (object):
         selector : tuple
             Specification of the property to be loaded. This is a tuple starting with a Prop, 
             and then some context-dependent items.
+        active_only : bool, optional
+            If True, return a vector with the values of the active cells only,
+            instead of a masked array of the entire grid.
 
         Returns
         -------
         numpy.ndarray
-            Array of the data with inactive cells masked off.
+            Array of the data with inactive cells masked off, or the values of
+            the active cells.
 
         Examples
         --------
@@ -659,13 +1112,51 @@ class EclipseData (object):
         >>> swat = case.cell_data((Prop.sat, Phase.wat))
         >>> xco2 = case.cell_data((Prop.mole, 'CO2', Phase.gas))
         """
-        # get the internal name of the property requested
-        propname = self._get_prop_name(selector)
+        return self.cell_data_many([selector], active_only)[0]
+
+    def cell_data_many(self, selectors, active_only=False):
+        """
+        Get several field properties for every cell at this restart step,
+        reading the file only once.
+
+        Parameters
+        ----------
+        selectors : list of tuple
+            Specification of the properties to be loaded (see cell_data).
+        active_only : bool, optional
+            If True, return the values of the active cells only (see
+            cell_data).
+
+        Returns
+        -------
+        list of numpy.ndarray
+            Arrays of the data with inactive cells masked off, or the values
+            of the active cells.
+        """
+        # get the internal name of the properties requested
+        propnames = [self._get_prop_name(selector) for selector in selectors]
 
         # load the data itself
-        with EclipseFile(self.root, self.ext) as store:
-            active_data = store.get(propname)
+        convert = self._compress if active_only else self._expand
+        with self._open() as store:
+            return [convert(_native(store.get(propname)))
+                    for propname in propnames]
+
+    def _compress(self, data):
+        """Get the data of the active cells, which is what is stored in the
+        file for most properties.
+        """
+        if data.shape[0] == self.grid.num_active:
+            return data
+        elif data.shape[0] == numpy.prod(self.grid.shape):
+            return data[_active_index(self.grid)]
+        else:
+            assert (False)
 
+    def _expand(self, active_data):
+        """Expand the data of the active cells to the entire grid, with the
+        inactive cells masked off.
+        """
         # if there is a fully specified array, then just use the data
         if active_data.shape[0] == numpy.prod(self.grid.shape):
             data = numpy.reshape(active_data, self.grid.shape)
@@ -678,7 +1169,7 @@ class EclipseData (object):
             data = numpy.zeros(self.grid.shape, dtype=active_data.dtype)
 
             # assign only the values that are actually active
-            data[self.grid.actnum] = active_data
+            data.ravel()[_active_index(self.grid)] = active_data
         else:
             assert (False)
 
@@ -701,8 +1192,8 @@ class EclipseData (object):
             Array of the data.
         """
         # load the data itself
-        with EclipseFile(self.root, self.ext) as store:
-            return store.get(propname)
+        with self._open() as store:
+            return _native(store.get(propname))
 
     def summary_data(self, propname):
         """
@@ -724,7 +1215,7 @@ class EclipseData (object):
         # need to find the mneumonics and well info from the specification file
         with EclipseFile(self.root, 'SMSPEC') as store:
             mnemonic = store.get('KEYWORDS')
-            well = store.get('WGNAMES')
+            well = _wgnames(store)
 
         # split the propname
         prop_elem = propname.upper().split()
@@ -753,7 +1244,7 @@ class EclipseData (object):
         # procedure. We are only interested in values at the report time, e.g.,
         # the final "ministep". It it, however, possible to collect all values,
         # e.g., for number of newton iterations.
-        with EclipseFile(self.root, self.ext) as store:
+        with self._open() as store:
             # Since we do not know the number of timesteps we must find how
             # many times the PARAM keyword has been given
             total = store.cnt['PARAMS  ']  # Gives number of ministeps
@@ -762,7 +1253,17 @@ class EclipseData (object):
             # from zero
             vec_dat = store.get(kwd='PARAMS  ', seq=total-1)
 
-        return vec_dat[ind]
+        return _native(vec_dat[ind])
+
+
+def _wgnames(spec):
+    """Well and group names of the summary vectors. Newer specification files
+    store them as NAMES, which allow names that are longer than 8 chars.
+    """
+    names = spec.get('WGNAMES')
+    if names is None:
+        names = spec.get('NAMES')
+    return names
 
 
 def _intehead_phases(intehead):
@@ -827,7 +1328,7 @@ class EclipseInit (EclipseData):
 class EclipseRestart (EclipseData):
     """Read information from a recurrent data (restart) file."""
 
-    def __init__(self, grid, seq):
+    def __init__(self, grid, seq, unified=None):
         """
         Initialize the restart file reader.
 
@@ -837,32 +1338,36 @@ class EclipseRestart (EclipseData):
             Initialization file which contains grid dimensions.
         seq : int
             Run number.
+        unified : EclipseUnified, optional
+            Index of the unified restart file. If not given, the data are read
+            from the non-unified restart file of this step.
 
         Returns
         -------
         None
         """
-        super(EclipseRestart, self).__init__(grid, grid.root,
-                                             "X{0:04d}".format(seq))
+        ext = "X{0:04d}".format(seq) if unified is None else unified.ext
+        super(EclipseRestart, self).__init__(grid, grid.root, ext,
+                                             unified, seq)
 
     def date(self):
         """Simulation date the restart file is created for."""
         # dates are stored in the header
-        with EclipseFile(self.root, self.ext) as store:
+        with self._open() as store:
             intehead = store.get('INTEHEAD')
 
         # convert Eclipse date field to a Python date object
         return _intehead_date(intehead)
     
     def arrays(self):
-        ecl_file = EclipseFile(self.root, self.ext)
-        return [list(ecl_file.cat.keys())[i][0] for i, _ in enumerate(ecl_file.cat)]
+        with self._open() as ecl_file:
+            return [list(ecl_file.cat.keys())[i][0] for i, _ in enumerate(ecl_file.cat)]
 
 
 class EclipseSummary (EclipseData):
     """Read information from a recurrent data (summary) file."""
 
-    def __init__(self, grid, seq):
+    def __init__(self, grid, seq, unified=None):
         """
         Initialize the restart file reader.
 
@@ -872,18 +1377,22 @@ class EclipseSummary (EclipseData):
             Initialization file which contains grid dimensions.
         seq : int
             Run number.
+        unified : EclipseUnified, optional
+            Index of the unified summary file. If not given, the data are read
+            from the non-unified summary file of this step.
 
         Returns
         -------
         None
         """
-        super(EclipseSummary, self).__init__(grid, grid.root,
-                                             "S{0:04d}".format(seq))
+        ext = "S{0:04d}".format(seq) if unified is None else unified.ext
+        super(EclipseSummary, self).__init__(grid, grid.root, ext,
+                                             unified, seq)
 
     def date(self):
         """Simulation date the restart file is created for."""
         # dates are stored in the header
-        with EclipseFile(self.root, self.ext) as store:
+        with self._open() as store:
             intehead = store.get('INTEHEAD')
 
         # convert Eclipse date field to a Python date object
@@ -933,6 +1442,348 @@ def _quick_date(fileobj):
     return _intehead_date(intehead)
 
 
+class EclipseUnified (object):
+    """Index of the report steps in a unified restart (UNRST) or summary
+    (UNSMRY) file.
+
+    The file is scanned once, and a report step is then read by seeking
+    directly to its records.
+    """
+
+    def __init__(self, root, ext):
+        """
+        Index a unified file.
+
+        Parameters
+        ----------
+        root : str
+            Stem of the file name (including directory).
+        ext : str
+            Extension of the file, either 'UNRST' or 'UNSMRY'.
+
+        Returns
+        -------
+        None
+        """
+        self.root = root
+        self.ext = ext.upper()
+        self.filename = '{0}.{1}'.format(root, self.ext)
+
+        # restart steps are numbered by the SEQNUM record. summary steps are
+        # only separated by SEQHDR records, and are numbered in sequence
+        # from one, like the non-unified summary files
+        restart = (self.ext == 'UNRST')
+        marker = 'SEQNUM  ' if restart else 'SEQHDR  '
+
+        # the steps are found from the catalog of the whole file
+        self.steps = {}     # report step -> catalog of the step
+        self.by_date = {}   # date -> report step, if it has a header
+        with EclipseFile(root, self.ext) as store:
+            steps = _split_steps(store.cnt, store.cat, marker)
+            for ndx, (mark, intehead, catalog) in enumerate(steps):
+                seq = (int(_read_rec(store.mem, mark)[0]) if restart
+                       else ndx + 1)
+                self.steps[seq] = catalog
+                if intehead is not None:
+                    self.by_date[_intehead_date(
+                        _read_rec(store.mem, intehead))] = seq
+        log.debug("Found %d report steps in \"%s\"",
+                  len(self.steps), self.filename)
+
+    def step(self, seq):
+        """
+        Open the file to read the records of a report step.
+
+        Parameters
+        ----------
+        seq : int
+            Report step.
+
+        Returns
+        -------
+        EclipseFile
+            File object which only sees the records of this step.
+        """
+        return EclipseFile(self.root, self.ext, self.steps[seq])
+
+
+class EclipseSummaryMatrix (object):
+    """All the summary vectors of a run, read into one matrix.
+
+    The rows of the matrix are the ministeps of the run, and the columns are
+    the vectors listed in the specification (SMSPEC) file. Values for many
+    vectors and report steps are then selected with one indexing operation.
+
+    Examples
+    --------
+    >>> smry = EclipseSummaryMatrix('FOO')
+    >>> wopr, fopt = smry.values(['WOPR PRO-1', 'FOPT'], [1, 2, 3])
+    """
+
+    def __init__(self, root, unified=None):
+        """
+        Read the summary of a run.
+
+        Parameters
+        ----------
+        root : str
+            Stem of the file names (including directory).
+        unified : EclipseUnified, optional
+            Index of the unified summary file. If not given, the data are read
+            from the non-unified summary files (.Snnnn).
+
+        Returns
+        -------
+        None
+        """
+        # names of the vectors
+        with EclipseFile(root, 'SMSPEC') as spec:
+            self.keywords = spec.get('KEYWORDS')
+            self.wgnames = _wgnames(spec)
+        num_vec = self.keywords.shape[0]
+
+        # find the catalog of each report step, either in the unified file or
+        # in the separate file of each step
+        if unified is not None:
+            sources = [(seq, unified.ext, unified.steps[seq])
+                       for seq in sorted(unified.steps.keys())]
+        else:
+            dir_name, base = os.path.split(root)
+            sources = []
+            for fname in sorted(os.listdir(dir_name or '.')):
+                if fnmatch.fnmatch(fname,
+                                   '{0}.S[0-9][0-9][0-9][0-9]'.format(base)):
+                    ext = fname[-5:]
+                    with EclipseFile(root, ext) as store:
+                        sources.append((int(ext[1:]), ext,
+                                        (store.cnt, store.cat)))
+
+        # every PARAMS record holds the values of one ministep
+        kwd = 'PARAMS  '
+        num_rows = sum(cnt.get(kwd, 0) for _, _, (cnt, _) in sources)
+        self.data = numpy.empty((num_rows, num_vec), dtype=numpy.float32)
+
+        # report step of each row, and the row of the last ministep of each
+        # report step, which holds the values at the report time
+        self.steps = numpy.empty(num_rows, dtype=numpy.int32)
+        self.report_rows = {}
+
+        row = 0
+        for seq, ext, catalog in sources:
+            cnt, cat = catalog
+            if cnt.get(kwd, 0) == 0:
+                continue
+            with EclipseFile(root, ext, catalog) as store:
+                for ndx in range(cnt[kwd]):
+                    descr = cat[_DataKey(kwd=kwd, seq=ndx)]
+                    assert (descr.num == num_vec)
+                    self.data[row] = _read_rec(store.mem, descr)
+                    row += 1
+            self.steps[row - cnt[kwd]:row] = seq
+            self.report_rows[seq] = row - 1
+        log.debug("Read %d ministeps of %d summary vectors",
+                  num_rows, num_vec)
+
+        # columns of each property that has been looked up
+        self._columns = {}
+
+    def columns(self, propname):
+        """
+        Columns of the vectors for a property.
+
+        Parameters
+        ----------
+        propname : str
+            Name of the property, in the same form as for
+            EclipseData.summary_data, e.g., 'WWIR I05', 'WWIR' or 'I05'.
+
+        Returns
+        -------
+        numpy.ndarray
+            Indices of the columns, in the order of the specification file.
+        """
+        if propname in self._columns:
+            return self._columns[propname]
+
+        prop_elem = propname.upper().split()
+        assert (1 <= len(prop_elem) <= 2)
+
+        # a single name is either a mnemonic or a well
+        if len(prop_elem) == 1:
+            cols = numpy.flatnonzero(self.keywords == prop_elem[0])
+            if cols.shape[0] == 0:
+                cols = numpy.flatnonzero(self.wgnames == prop_elem[0])
+        else:
+            cols = numpy.flatnonzero(
+                numpy.logical_and(self.keywords == prop_elem[0],
+                                  self.wgnames == prop_elem[1]))
+
+        if cols.shape[0] == 0:
+            raise KeyError(
+                "No summary vector for \"{0}\"".format(propname))
+
+        self._columns[propname] = cols
+        return cols
+
+    def values(self, propnames, steps):
+        """
+        Values of summary vectors at report steps.
+
+        Parameters
+        ----------
+        propnames : str or list of str
+            Name of the properties, e.g., ['WOPR PRO-1', 'FOPT'].
+        steps : int or list of int
+            Report steps.
+
+        Returns
+        -------
+        numpy.ndarray or list of numpy.ndarray
+            For each property, the values at the report steps with one row per
+            step and one column per vector of the property, or a single row if
+            steps is a single step. A single array if propnames is a string.
+        """
+        single_prop = isinstance(propnames, str)
+        single_step = numpy.ndim(steps) == 0
+        propnames = [propnames] if single_prop else list(propnames)
+        steps = numpy.atleast_1d(steps)
+
+        # select all the values in one go, and split them afterwards
+        cols = [self.columns(propname) for propname in propnames]
+        rows = [self.report_rows[seq] for seq in steps]
+        sel = self.data[numpy.ix_(rows, numpy.concatenate(cols))]
+        vals = numpy.split(sel, numpy.cumsum([c.shape[0] for c in cols])[:-1],
+                           axis=1)
+
+        if single_step:
+            vals = [val[0] for val in vals]
+        return vals[0] if single_prop else vals
+
+    def report_dates(self, start):
+        """
+        Dates of the report steps, from the TIME vector of the summary.
+
+        Parameters
+        ----------
+        start : datetime.datetime
+            Start date of the run.
+
+        Returns
+        -------
+        dict
+            Date of each report step, rounded to whole seconds.
+        """
+        steps = sorted(self.report_rows.keys())
+        days = self.values('TIME', steps)[:, 0]
+        return {seq: start + datetime.timedelta(seconds=round(float(day) * 86400))
+                for seq, day in zip(steps, days)}
+
+
+class _RestartDates (collections.abc.Mapping):
+    """Dates of the separate restart files of a case, mapped to their sequence
+    numbers. The files are only opened when their dates are needed.
+
+    Since the dates increase with the sequence number, a date is looked up by
+    a binary search, which opens only a few of the files. Listing all the
+    dates opens the rest of the files, in a pool of threads.
+    """
+
+    def __init__(self, root, seqs):
+        self.root = root
+        self.seqs = sorted(seqs)
+        self.dates = {}       # seq -> date, of the files read so far
+        self._by_date = None  # date -> seq, once all files are read
+
+    def _read_date(self, seq):
+        """Quickly scan a restart file to determine its date."""
+        with open('{0}.X{1:04d}'.format(self.root, seq), 'rb') as fileobj:
+            return _quick_date(fileobj)
+
+    def _date(self, seq):
+        if seq not in self.dates:
+            self.dates[seq] = self._read_date(seq)
+        return self.dates[seq]
+
+    def _scan(self):
+        """Read the dates of all the files."""
+        if self._by_date is None:
+            missing = [seq for seq in self.seqs if seq not in self.dates]
+            if missing:
+                log.debug("Reading dates of %d restart files", len(missing))
+                with ThreadPoolExecutor() as pool:
+                    for seq, this_date in zip(
+                            missing, pool.map(self._read_date, missing)):
+                        self.dates[seq] = this_date
+            self._by_date = {self.dates[seq]: seq for seq in self.seqs}
+        return self._by_date
+
+    def _find(self, when):
+        """Sequence number of the restart file for a date, or None."""
+        if self._by_date is not None:
+            return self._by_date.get(when)
+        if not isinstance(when, datetime.datetime):
+            return None
+        lo, hi = 0, len(self.seqs)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._date(self.seqs[mid]) < when:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < len(self.seqs) and self._date(self.seqs[lo]) == when:
+            return self.seqs[lo]
+        return None
+
+    def __getitem__(self, when):
+        seq = self._find(when)
+        if seq is None:
+            raise KeyError(when)
+        return seq
+
+    def __contains__(self, when):
+        return self._find(when) is not None
+
+    def __iter__(self):
+        return iter(self._scan())
+
+    def __len__(self):
+        return len(self.seqs)
+
+
+class _SummaryDates (collections.abc.Mapping):
+    """Dates of the report steps of a case without restart files, mapped to
+    their sequence numbers. The dates are found from the time vector of the
+    summary, which is only read when the dates are needed.
+    """
+
+    def __init__(self, case):
+        self.case = case
+        self._by_date = None  # date -> seq, once the summary is read
+
+    def _scan(self):
+        """Read the dates from the summary, if there is one."""
+        if self._by_date is None:
+            self._by_date = {}
+            if path.isfile(self.case.root + '.SMSPEC'):
+                log.debug("Reading report dates from the summary")
+                dates = self.case.summary().report_dates(
+                    self.case.start_date())
+                self._by_date = {when: seq for seq, when in dates.items()}
+        return self._by_date
+
+    def __getitem__(self, when):
+        return self._scan()[when]
+
+    def __contains__(self, when):
+        return when in self._scan()
+
+    def __iter__(self):
+        return iter(self._scan())
+
+    def __len__(self):
+        return len(self._scan())
+
+
 class EclipseCase (object):
     """Read data for an Eclipse simulation case."""
 
@@ -949,10 +1800,6 @@ class EclipseCase (object):
         -------
         None
         """
-        # keys of this dictionary will be dates, the values are the sequence
-        # numbers that are associated with those dates
-        self.by_date = {}
-
         # get the directory of the file, using dot for current one if
         # no directory has been specified
         dir_name, file_name = os.path.split(casename)
@@ -961,25 +1808,45 @@ class EclipseCase (object):
         # further remove the extension from the filename
         root, _ = os.path.splitext(file_name)
 
-        # get a list of all restart files that are in this directory
+        # get a list of all restart files that are in this directory; the
+        # files are not opened until their dates are needed
         log.debug("Indexing restart files")
+        seqs = []
         for fname in os.listdir(dir_name):
             if fnmatch.fnmatch(fname,
                                '{0}.X[0-9][0-9][0-9][0-9]'.format(root)):
                 # last four characters of the filename is the sequence number;
                 # using int does not cause it to be interpreted octal even if
                 # it starts with zero, fortunately
-                seq = int(fname[-4:])
+                seqs.append(int(fname[-4:]))
+        log.debug("Found %d restart files", len(seqs))
 
-                # quickly scan this file to determine the correlation between
-                with open(os.path.join(dir_name, fname), 'rb') as fileobj:
-                    this_date = _quick_date(fileobj)
-                self.by_date[this_date] = seq
-        log.debug("Found %d restart files", len(self.by_date))
+        self.root = os.path.join(dir_name, root)
+
+        # keys of this mapping will be dates, the values are the sequence
+        # numbers that are associated with those dates. if there are no
+        # separate restart files, then the report steps may be stored in a
+        # unified restart file instead; all the steps in that file are
+        # indexed in one scan. a run without restart output only has the
+        # dates of the report steps in its summary
+        self.unrst = None
+        if not seqs and path.isfile(self.root + '.UNRST'):
+            self.unrst = EclipseUnified(self.root, 'UNRST')
+            self.by_date = self.unrst.by_date
+            seqs = list(self.unrst.steps.keys())
+        elif seqs:
+            self.by_date = _RestartDates(self.root, seqs)
+        else:
+            self.by_date = _SummaryDates(self)
+
+        # sequence numbers of the restart steps
+        self.restart_steps = sorted(seqs)
+
+        # the unified summary file is indexed when first needed
+        self.unsmry = None
 
         # read the initial file to get the size of the grid and the
         # active flags, to load other properties
-        self.root = os.path.join(dir_name, root)
         self.init = EclipseInit(self.root)
 
         # we haven't loaded any grid or recurrent data yet
@@ -987,6 +1854,7 @@ class EclipseCase (object):
         self.recur = {}
         self.sum = {}
         self.comp = None
+        self._summary = None
 
     def shape(self):
         """
@@ -1015,14 +1883,11 @@ class EclipseCase (object):
         >>> for num, name in enumerate(comps):
         >>>     print("%d : %s" % (num, name))
         """
-        # get the last report date, and the index of that. the last
-        # is selected because it is the most likely timestep to be
-        # loaded by the user code (end results), and the number of
-        # components shouldn't change during the run.
-        lst_dat = max(self.by_date.keys())
-        lst_seq = self.by_date[lst_dat]
-        log.debug("Loading component list at date %s (step %04d)",
-                  lst_dat.strftime('%Y-%m-%d'), lst_seq)
+        # get the last report step. the last is selected because it is the
+        # most likely timestep to be loaded by the user code (end results),
+        # and the number of components shouldn't change during the run.
+        lst_seq = self.restart_steps[-1]
+        log.debug("Loading component list at step %04d", lst_seq)
         restart = self._delay_load(lst_seq)
         return restart.components()
 
@@ -1081,11 +1946,30 @@ class EclipseCase (object):
         if seq in self.recur:
             restart = self.recur[seq]
         else:
-            restart = EclipseRestart(self.init, seq)
+            restart = EclipseRestart(self.init, seq, self.unrst)
             self.recur[seq] = restart
 
         return restart
 
+    def _step(self, when):
+        """Sequence number of a report step, given either directly as an int,
+        or as a date.
+        """
+        if isinstance(when, datetime.datetime):
+            assert (when in self.by_date)
+            return self.by_date[when]
+        return when
+
+    def _unified_summary(self, seq=1):
+        """Index of the unified summary file, or None if the summary of this
+        report step is stored in a separate file (or not at all).
+        """
+        if (self.unsmry is None
+                and not path.isfile('{0}.S{1:04d}'.format(self.root, seq))
+                and path.isfile(self.root + '.UNSMRY')):
+            self.unsmry = EclipseUnified(self.root, 'UNSMRY')
+        return self.unsmry
+
     def at(self, when):  # pylint: disable=invalid-name
         """
         Recurrent data for a certain timestep.
@@ -1105,11 +1989,7 @@ class EclipseCase (object):
         """
         # get the sequence number of the report step; this is either
         # specified directly as an int, or given as a date
-        if isinstance(when, datetime.datetime):
-            assert (when in self.by_date)
-            seq = self.by_date[when]
-        else:
-            seq = when
+        seq = self._step(when)
 
         restart = self._delay_load(seq)
         return restart
@@ -1133,11 +2013,7 @@ class EclipseCase (object):
         """
         # get the sequence number of the report step; this is either
         # specified directly as an int, or given as a date
-        if isinstance(when, datetime.datetime):
-            assert (when in self.by_date)
-            seq = self.by_date[when]
-        else:
-            seq = when
+        seq = self._step(when)
 
         # check if we have loaded the data file yet. since we need
         # to index the file while reading from it, we maintain a
@@ -1145,12 +2021,15 @@ class EclipseCase (object):
         if seq in self.sum:
             summary = self.sum[seq]
         else:
-            summary = EclipseSummary(self.init, seq)
+            # use the unified summary file unless there is a separate
+            # summary file for this step
+            summary = EclipseSummary(self.init, seq,
+                                     self._unified_summary(seq))
             self.sum[seq] = summary
 
         return summary
 
-    def cell_data(self, prop, when=None):
+    def cell_data(self, prop, when=None, active_only=False):
         """
         Read cell-wise data from case. This can be either static information
         or recurrent information for a certain date.
@@ -1161,6 +2040,9 @@ class EclipseCase (object):
             Name of the property, e.g., 'SWAT'.
         when : datetime.datetime or int, optional
             Date of the property, or None if static.
+        active_only : bool, optional
+            If True, return a vector with the values of the active cells only,
+            instead of a masked array of the entire grid.
 
         Returns
         -------
@@ -1171,13 +2053,14 @@ class EclipseCase (object):
         --------
         >>> case = EclipseCase(cmd_args.filename)
         >>> zmf2 = case.cell_data('ZMF2', datetime.datetime(2054, 7, 1))
+        >>> poro = case.cell_data('PORO', active_only=True)
         """
         # if it is static property, it is found in the initial file
         if when is None:
-            return self.init.cell_data(prop)
+            return self.init.cell_data(prop, active_only)
         else:
             # ask the restart file for the data
-            return self.at(when).cell_data(prop)
+            return self.at(when).cell_data(prop, active_only)
 
     def field_data(self, prop, when=None):
         """
@@ -1236,6 +2119,94 @@ class EclipseCase (object):
         # vector
         return self.atsm(when).summary_data(prop)
 
+    def cell_data_many(self, props, when=None, active_only=False):
+        """
+        Read several cell-wise properties from the same file at once, i.e.,
+        either static properties or recurrent properties for one date.
+
+        Parameters
+        ----------
+        props : list of str
+            Name of the properties, e.g., ['SWAT', 'PRESSURE'].
+        when : datetime.datetime or int, optional
+            Date of the properties, or None if static.
+        active_only : bool, optional
+            If True, return the values of the active cells only.
+
+        Returns
+        -------
+        list of numpy.ndarray
+            Loaded arrays for the properties.
+        """
+        if when is None:
+            return self.init.cell_data_many(props, active_only)
+        else:
+            return self.at(when).cell_data_many(props, active_only)
+
+    def active_index(self):
+        """
+        Flat index of the active cells in the grid (in C order, i.e., with
+        the shape (nk, nj, ni)), for scattering the values of the active cells
+        into the entire grid.
+
+        Returns
+        -------
+        numpy.ndarray
+            Index of each active cell.
+
+        Examples
+        --------
+        >>> case = EclipseCase(cmd_args.filename)
+        >>> full = numpy.zeros(numpy.prod(case.init.shape))
+        >>> full[case.active_index()] = case.cell_data('PORO', active_only=True)
+        """
+        return _active_index(self.init)
+
+    def summary(self):
+        """
+        Summary vectors of the whole run, which are read the first time they
+        are requested.
+
+        Returns
+        -------
+        EclipseSummaryMatrix
+            Summary data of all the ministeps of the run.
+        """
+        if self._summary is None:
+            self._summary = EclipseSummaryMatrix(self.root,
+                                                 self._unified_summary())
+        return self._summary
+
+    def summary_values(self, props, when):
+        """
+        Read summary data for several properties and report steps at once.
+
+        Parameters
+        ----------
+        props : str or list of str
+            Name of the properties, e.g., ['WWPR PRO1', 'FOPT'].
+        when : datetime.datetime or int, or list of those
+            Dates of the properties.
+
+        Returns
+        -------
+        numpy.ndarray or list of numpy.ndarray
+            For each property, the values with one row per date, as for
+            EclipseSummaryMatrix.values. With a single property and a single
+            date, this is the same as summary_data.
+
+        Examples
+        --------
+        >>> case = EclipseCase(cmd_args.filename)
+        >>> wwpr, fopt = case.summary_values(['WWPR PRO1', 'FOPT'],
+        >>>                                  case.report_dates())
+        """
+        if isinstance(when, (list, tuple)):
+            steps = [self._step(elem) for elem in when]
+        else:
+            steps = self._step(when)
+        return self.summary().values(props, steps)
+
     def grid(self):
         """Grid structure for simulation case."""
         # on-demand load the grid file
@@ -1252,7 +2223,7 @@ class EclipseCase (object):
 class EclipseRFT (object):
     """Read data from an Eclipse RFT file."""
 
-    def __init__(self, casename):
+    def __init__(self, casename, date_slack=0):
         """
         Initialize the Eclipse case.
 
@@ -1260,6 +2231,10 @@ class EclipseRFT (object):
         ----------
         casename : str
             Path to the case, with or without extension.
+        date_slack : int, optional
+            Tolerance in seconds when an RFT is looked up by date. If there
+            is no RFT of the well on the day requested, the closest one that
+            is less than date_slack seconds away is used.
 
         Returns
         -------
@@ -1269,6 +2244,7 @@ class EclipseRFT (object):
         # no directory has been specified
         dir_name, file_name = os.path.split(casename)
         dir_name = '.' if dir_name == '' else dir_name
+        self.date_slack = date_slack
 
         # further remove the extension from the filename
         root, _ = os.path.splitext(file_name)
@@ -1280,7 +2256,92 @@ class EclipseRFT (object):
         self.recur = {}
         self.sum = {}
 
-    def rft_data(self, well, prop):
+        # the file is indexed when first needed
+        self.blocks = None
+        self.by_well = None
+
+    def _index(self):
+        """
+        Index the RFT file, i.e., find the records of each well and date.
+
+        Each RFT (or PLT) in the file is a block of records that starts with
+        TIME, and is identified by its WELLETC and DATE records. The catalog
+        of each block is kept, so that the properties are read by seeking
+        directly to them.
+        """
+        if self.blocks is not None:
+            return
+
+        self.blocks = []   # catalog of each block
+        self.by_well = {}  # well -> list of (date, block, welletc)
+        with EclipseFile(self.root, 'RFT') as eclf:
+            marker = 'TIME    ' if 'TIME    ' in eclf.cnt else 'WELLETC '
+            for _, _, (cnt, cat) in _split_steps(eclf.cnt, eclf.cat, marker):
+                key = _DataKey(kwd='WELLETC ', seq=0)
+                if key not in cat:
+                    continue
+                welletc = _read_rec(eclf.mem, cat[key])
+                key = _DataKey(kwd='DATE    ', seq=0)
+                if key in cat:
+                    day, month, year = _read_rec(eclf.mem, cat[key])[:3]
+                    this_date = datetime.datetime(year, month, day)
+                else:
+                    this_date = None
+                self.by_well.setdefault(str(welletc[1]), []).append(
+                    (this_date, len(self.blocks), welletc))
+                self.blocks.append(cat)
+        log.debug("Found %d RFT blocks for %d wells",
+                  len(self.blocks), len(self.by_well))
+
+    def _find(self, well, when=None):
+        """Block of the RFT for a well at a date (the first RFT of the well
+        if no date is given), or None if the well has no RFT at that date.
+        An RFT on the same day is used, else the closest one within the
+        date slack.
+        """
+        surveys = self.by_well.get(well.upper())
+        if surveys is None:
+            return None
+        if when is not None:
+            day = datetime.datetime(when.year, when.month, when.day)
+            dated = [(this_date, block) for this_date, block, welletc in surveys
+                     if this_date is not None and 'R' in welletc[5]]
+            for this_date, block in dated:
+                if this_date == day:
+                    return block
+            near = [(abs((this_date - when).total_seconds()), block)
+                    for this_date, block in dated]
+            near = [el for el in near if el[0] < self.date_slack]
+            if near:
+                return min(near)[1]
+            log.warning("No RFT of well %s at %s in \"%s\"; RFTs at %s",
+                        well, when, self.root,
+                        [str(this_date) for this_date, _ in dated])
+            return None
+        this_date, block, welletc = surveys[0]
+        # check that this well has RFT data
+        assert 'R' in welletc[5]
+        return block
+
+    def rft_dates(self, well):
+        """
+        Dates of the RFTs of a well.
+
+        Parameters
+        ----------
+        well : str
+            Name of the well, e.g., 'PRO-1'.
+
+        Returns
+        -------
+        list of datetime.datetime
+            Dates of the RFTs in the file, in the order of the file.
+        """
+        self._index()
+        return [this_date for this_date, _, _
+                in self.by_well.get(well.upper(), [])]
+
+    def rft_data(self, well, prop, when=None):
         """
         Read the RFT data for the requested well.
 
@@ -1290,27 +2351,52 @@ class EclipseRFT (object):
             Name of the well, e.g., 'PRO-1'.
         prop : str
             Type of property (depth, pressure, swat, or sgas).
+        when : datetime.datetime, optional
+            Date of the RFT. If not given, the first RFT of the well is used.
 
         Returns
         -------
         numpy.ndarray
-            Loaded array for the property.
+            Loaded array for the property, or None if there is no RFT for
+            the well (at the given date).
 
         Examples
         --------
         >>> case = EclipseRFT(cmd_args.filename)
         >>> data = case.rft_data(well='INJ-5', prop='PRESSURE')
         """
-        with EclipseFile(self.root, 'RFT') as eclf:
-            vec_dat = None
-            # Find the array from the current well
-            for index in range(eclf.cnt['WELLETC ']):
-                # well name for current index
-                if eclf.get(kwd='WELLETC', seq=index)[1] == well.upper():
-                    # check that this well has RFT data
-                    assert 'R' in eclf.get(kwd='WELLETC', seq=index)[5]
-                    vec_dat = eclf.get(kwd=prop, seq=index)
-                    break
+        return self.rft_data_many([(well, prop, when)])[0]
+
+    def rft_data_many(self, requests):
+        """
+        Read the RFT data for several wells, properties and dates, opening
+        the file only once.
+
+        Parameters
+        ----------
+        requests : list of tuple
+            Well name, type of property and (optionally) date of each request,
+            e.g., [('PRO-1', 'SWAT'), ('PRO-2', 'PRESSURE', date)].
+
+        Returns
+        -------
+        list of numpy.ndarray
+            Loaded array for each request, or None if there is no RFT for the
+            well (at the given date).
+        """
+        self._index()
+        vec_dat = []
+        with EclipseFile(self.root, 'RFT', ({}, {})) as eclf:
+            for request in requests:
+                well, prop = request[:2]
+                when = request[2] if len(request) > 2 else None
+                block = self._find(well, when)
+                key = _DataKey(kwd="{0:<8s}".format(prop[:8].upper()), seq=0)
+                if block is None or key not in self.blocks[block]:
+                    vec_dat.append(None)
+                else:
+                    vec_dat.append(_native(_read_rec(
+                        eclf.mem, self.blocks[block][key])))
 
         return vec_dat
 
@@ -19,9 +19,11 @@ import numpy.ma
 import os
 import os.path
 import re
+from concurrent.futures import ProcessPoolExecutor
 from six.moves import range  # pylint: disable=redefined-builtin, import-error
 import six
 import sys
+import warnings
 
 
 # even though the memoryview api exists in Python 2, the regular expression
@@ -1111,94 +1113,117 @@ def _fast_index_mem(base_dir, fname, mem, skip, index):
             index[kw] = (start_pos, end_pos, fname)
 
 
-# definition of special characters that can be compared directly to the
-# contents of the memory-map. notice that this is the inverse of the
-# six.byte2int function that is used further below when manipulating a
-# bytearray copy.
-if sys.version_info[0] < 3:
-    _SP = b' '
-    _NL = b'\n'
-else:
-    _SP = ord(b' ')
-    _NL = ord(b'\n')
+# comments may appear anywhere in the data of a section, and lasts to the end
+# of the line
+_COMMENT = re.compile(b'--[^\n]*')
+
+# all control characters and space separate tokens
+_BLANK = ord(b' ')
+_ASTERISK = ord(b'*')
 
 
-def _tokenize(mem, bgn, end):
+def _parse(raw, typ):
     """
-    Read tokens from the data part of a section.
+    Parse whitespace-separated numbers in one pass.
 
     Parameters
     ----------
-    mem : mmap.mmap
-        Memory-mapping of the file the section should be read from.
-    bgn : int
-        Offset of the first byte that is part of the section.
-    end : int
-        Offset of the first next byte that is *not* part of the section (end range, exclusive).
+    raw : bytes
+        Text of the numbers, without repeat counts and comments.
+    typ : numpy.dtype
+        Data type of the numbers.
 
     Returns
     -------
-    generator
-        Generator yielding tuples of (int, int) representing ranges for each token.
+    numpy.ndarray
+        The numbers that were parsed.
     """
-    # current position we are looking at
-    cur = bgn
-
-    # tokenize while there is any tokens left in the stream
-    while cur < end:
+    # numpy returns a single zero for a blank string when parsing integers
+    if not raw.strip():
+        return numpy.empty((0, ), dtype=typ)
+    try:
+        # older versions of numpy only warn about, and skip, the rest of the
+        # string if some of it can't be parsed
+        with warnings.catch_warnings():
+            warnings.simplefilter('error', DeprecationWarning)
+            return numpy.fromstring(raw, dtype=typ, sep=' ')
+    except (ValueError, DeprecationWarning) as err:
+        raise ValueError("Could not parse numbers in section: {0}".format(err))
+
+
+def _tokenize(raw):
+    """
+    Find the repeat counts in the data part of a section.
 
-        # skip all leading whitespace
-        while (cur < end) and ((mem[cur] == _SP) or (mem[cur] == _NL)):
-            cur = cur + 1
+    Parameters
+    ----------
+    raw : bytes
+        Data part of the section, without comments.
 
-        # the token begin at the first non-whitespace character
-        fst = cur
+    Returns
+    -------
+    numpy.ndarray
+        Index of the token of each asterisk, i.e. of each token on the form
+        N*value.
+    """
+    buf = numpy.frombuffer(raw, dtype=numpy.uint8)
+    blank = buf <= _BLANK
 
-        while (cur < end) and ((mem[cur] != _SP) and (mem[cur] != _NL)):
-            cur = cur + 1
+    # tokens begin at a non-blank character after a blank one
+    fst = numpy.flatnonzero(~blank[1:] & blank[:-1]) + 1
+    if buf.size and not blank[0]:
+        fst = numpy.concatenate(([0], fst))
 
-        # token ends at the next whitespace encountered
-        lst = cur
+    # an asterisk that ends the token means a default value, which we don't
+    # know the value of
+    asterisk = numpy.flatnonzero(buf == _ASTERISK)
+    follow = numpy.minimum(asterisk + 1, buf.size - 1)
+    if numpy.any((asterisk + 1 == buf.size) | blank[follow]):
+        raise ValueError("Default values (N*) are not supported")
 
-        # generate this token, if it is non-empty
-        if fst < lst:
-            yield (fst, lst)
+    return numpy.searchsorted(fst, asterisk, side='right') - 1
 
 
-def _decode(mem, fst, lst, typ):
+def _decode(raw, typ):
     """
-    Decode a token into a value.
+    Decode all the tokens in the data part of a section into values.
 
     Parameters
     ----------
-    mem : mmap.mmap
-        Memory-mapping of the file we are reading from.
-    fst : int
-        Offset into the file of the start of the token.
-    lst : int
-        Offset into the file of one past the last byte of the token.
-    typ : str -> Any
-        Conversion routine for the value.
+    raw : bytes
+        Data part of the section.
+    typ : numpy.dtype
+        Data type of the values.
 
     Returns
     -------
-    tuple of (int, Any)
-        The value that is decoded, and the repeat count of that value.
+    numpy.ndarray
+        Values of the section, with the repeat counts expanded.
     """
-    # is a repeat count specified?
-    asterisk = mem.find(b'*', fst, lst)
+    if raw.find(b'--') != -1:
+        raw = _COMMENT.sub(b' ', raw)
 
-    # no repeat count, just one single value
-    if asterisk == -1:
-        count = 1
-        value = typ(mem[fst: lst])
+    # without repeat counts, each token is a value
+    if raw.find(b'*') == -1:
+        return _parse(raw, typ)
 
-    # repeat count specified, must decode separately
-    else:
-        count = int(mem[fst: asterisk])
-        value = typ(mem[asterisk+1: lst])
+    # parse counts and values together, as if the asterisks were blanks; the
+    # count of the i-th repeated token is then the number at the index of the
+    # token, offset by the i counts that precede it
+    tok = _tokenize(raw)
+    nums = _parse(raw.replace(b'*', b' '), typ)
+    cnt_ndx = tok + numpy.arange(tok.size)
 
-    return (count, value)
+    counts = numpy.ones(nums.size, dtype=numpy.int64)
+    counts[cnt_ndx + 1] = nums[cnt_ndx]
+    if numpy.any(counts[cnt_ndx + 1] != nums[cnt_ndx]) or \
+            numpy.any(counts < 0):
+        raise ValueError("Repeat counts must be non-negative integers")
+
+    # drop the counts and expand the values
+    is_val = numpy.ones(nums.size, dtype=bool)
+    is_val[cnt_ndx] = False
+    return numpy.repeat(nums[is_val], counts[is_val])
 
 
 def _read_array(mem, bgn, end, dims, typ):
@@ -1215,8 +1240,8 @@ def _read_array(mem, bgn, end, dims, typ):
         Offset of the first next byte that is *not* part of the section (end range, exclusive).
     dims : list of int
         Tuple consisting of final dimensions for the array.
-    typ : str -> Any
-        Conversion routine for the value.
+    typ : numpy.dtype
+        Data type of the values.
 
     Returns
     -------
@@ -1224,26 +1249,17 @@ def _read_array(mem, bgn, end, dims, typ):
         Array of values read from the file with shape `dims` and dtype `typ`.
     """
     # allocate the memory of the array first
-    total = int(numpy.product(dims))
+    total = int(numpy.prod(dims))
     data = numpy.empty((total, ), dtype=typ)
 
-    # index that we are currently going to assign the next token to
-    ofs = 0
-
-    # process all tokens found in the stream
-    for fst, lst in _tokenize(mem, bgn, end):
-        # look for asterisk and get the repeat count
-        count, value = _decode(mem, fst, lst, typ)
-
-        # assign a number of items in batch using the repeat count
-        data[ofs: ofs+count] = value
-
-        # increment the counter to where the next token should start
-        ofs = ofs + count
+    # decode the whole section at once; values beyond the size of the
+    # array are ignored
+    values = _decode(mem[bgn: end], typ)[:total]
+    data[:values.size] = values
 
     # if the latter part of the array is zero, then Petrel won't bother
     # to write it
-    data[ofs: total] = 0
+    data[values.size: total] = 0
 
     # reshape into proper grid before returning
     return numpy.reshape(data, dims)
@@ -1289,6 +1305,122 @@ def _read_section(sec_name, dims, typ, mem, sec_tbl):
     return data
 
 
+# sections with more data than this (in bytes) are split into chunks that
+# are decoded separately, so that one large section can use several workers
+CHUNK_SIZE = 8 * 1024 ** 2
+
+# sections are only decoded in a process pool if there is at least this
+# much data (in bytes) to decode, since starting the pool takes some time
+PARALLEL_SIZE = 32 * 1024 ** 2
+
+
+def _split_range(mem, bgn, end, size):
+    """
+    Split the data of a section into chunks that can be decoded separately.
+
+    Parameters
+    ----------
+    mem : mmap.mmap
+        Memory-mapping of the file the section is in.
+    bgn : int
+        Offset of the first byte that is part of the section.
+    end : int
+        Offset of the first next byte that is *not* part of the section.
+    size : int
+        Approximate size of each chunk, in bytes.
+
+    Returns
+    -------
+    list of tuple of (int, int)
+        Range of each chunk. The chunks end at a newline, so that no token
+        (or comment) is split between two chunks.
+    """
+    bounds = [bgn]
+    while end - bounds[-1] > size:
+        cut = mem.find(b'\n', bounds[-1] + size, end)
+        if cut == -1:
+            break
+        bounds.append(cut + 1)
+    bounds.append(end)
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def _decode_range(path, bgn, end, typ):
+    """Decode a chunk of a section in a worker process, which maps the file
+    on its own (sharing the pages of the file with the other workers).
+    """
+    with ctx.closing(_FileMapPair(path)) as fmp:
+        return _decode(fmp.map_obj[bgn: end], typ)
+
+
+def _read_sections(path, mem, sec_tbl, sections, max_workers=None):
+    """
+    Read several sections at once, decoding them in parallel.
+
+    Parameters
+    ----------
+    path : str
+        Path of the main file.
+    mem : mmap.mmap
+        Memory-mapping of the main file.
+    sec_tbl : dict of str to tuple of (int, int)
+        Lookup table for each section in the file.
+    sections : list of tuple of (str, list of int, numpy.dtype)
+        Name, final dimensions and data type of each section to read.
+    max_workers : int, optional
+        Number of worker processes. Use 1 to decode in this process.
+
+    Returns
+    -------
+    dict of str to numpy.ndarray
+        Array of values read from the file for each section.
+    """
+    # split the sections into chunks; each chunk is a task for the pool
+    tasks = []
+    for sec_name, _, typ in sections:
+        log.info("Reading keyword %s", sec_name)
+        bgn, end, fname = sec_tbl[sec_name]
+        if fname is None:
+            chunks = _split_range(mem, bgn, end, CHUNK_SIZE)
+        else:
+            with ctx.closing(_FileMapPair(fname)) as fmp:
+                chunks = _split_range(fmp.map_obj, bgn, end, CHUNK_SIZE)
+        tasks.extend((sec_name, fname, fst, lst, typ) for fst, lst in chunks)
+
+    # allocate the arrays first; if the latter part of an array is zero, then
+    # Petrel won't bother to write it
+    data = {sec_name: numpy.zeros((int(numpy.prod(dims)), ), dtype=typ)
+            for sec_name, dims, typ in sections}
+    ofs = dict.fromkeys(data, 0)
+
+    total = sum(lst - fst for _, _, fst, lst, _ in tasks)
+    if max_workers == 1 or len(tasks) < 2 or total < PARALLEL_SIZE:
+        pool = None
+        values = (_decode(mem[fst: lst], typ) if fname is None
+                  else _decode_range(fname, fst, lst, typ)
+                  for _, fname, fst, lst, typ in tasks)
+    else:
+        pool = ProcessPoolExecutor(max_workers=max_workers)
+        values = pool.map(_decode_range,
+                          *zip(*[(fname or path, fst, lst, typ)
+                                 for _, fname, fst, lst, typ in tasks]))
+
+    # stitch the chunks into the arrays, in order; values beyond the size of
+    # the array are ignored
+    try:
+        for (sec_name, _, _, _, _), chunk in zip(tasks, values):
+            arr = data[sec_name]
+            num = max(min(chunk.size, arr.size - ofs[sec_name]), 0)
+            arr[ofs[sec_name]: ofs[sec_name] + num] = chunk[:num]
+            ofs[sec_name] += chunk.size
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    return {sec_name: numpy.reshape(data[sec_name], dims)
+            for sec_name, dims, _ in sections}
+
+
 def _sec_mat(mem, sec_tbl, sec_name, dtype, usecols):
     """
     Read a data section matrix for a keyword.
@@ -1459,8 +1591,22 @@ def _zcorn_dims(dims):
 _INCL_STMT = re.compile(enc(r'INCLUDE\ *\n\'(.*)\'\n/.*\n'), re.MULTILINE)
 
 
-def read(filename):
+def read(filename, max_workers=None):
     """Read an Eclipse input grid into a dictionary.
+
+    Parameters
+    ----------
+    filename : str
+        Name of the grid file.
+    max_workers : int, optional
+        Number of processes that decode the sections of files exported by
+        Petrel. Default is the number of processors, if there is enough data
+        to make it worthwhile. Use 1 to decode in this process only.
+
+    Returns
+    -------
+    dict
+        Grid structure, with the cell properties as masked arrays.
     """
     # get the canonical path of the file to read
     path = os.path.expanduser(filename)
@@ -1498,30 +1644,27 @@ def read(filename):
             A, b = _axes_map(mem, section_index)
             grid['COORD'] = _read_coord(dims, mem, section_index, A, b)
 
+            # decode the rest of the sections together, since they are
+            # all found in the index: zcorn is special because it has a
+            # different format (and cannot have inactive elements), and
+            # general cell properties are those marked as result properties
+            results = [kw for kw in section_index
+                       if _SECTIONS[kw]['result']]
+            sections = ([('ACTNUM', dims, numpy.int32),
+                         ('ZCORN', _zcorn_dims(dims), numpy.float64)] +
+                        [(kw, dims, _kw_dtype(kw)) for kw in results])
+            data = _read_sections(path, mem, section_index, sections,
+                                  max_workers)
+
             # actnum is special because we need it to set the mask
-            grid['ACTNUM'] = _read_section('ACTNUM', dims, numpy.int32,
-                                           mem, section_index).astype(
-                numpy.bool)
+            grid['ACTNUM'] = data['ACTNUM'].astype(numpy.bool)
             mask = numpy.logical_not(grid['ACTNUM'])
+            grid['ZCORN'] = data['ZCORN']
 
-            # zcorn is special because it has a different format (and
-            # cannot have inactive elements)
-            grid['ZCORN'] = _read_section('ZCORN', _zcorn_dims(dims),
-                                          numpy.float64, mem,
-                                          section_index)
-
-            # read general cell properties that are marked as result
-            # properties, from the file
-            for kw in section_index:
-                props = _SECTIONS[kw]
-                if props['result']:
-                    # read the data that is stored in the file
-                    data = _read_section(kw, dims, _kw_dtype(kw), mem,
-                                         section_index)
-
-                    # create an array where the inactive region is masked
-                    # out (won't appear on plots, in statistics etc.)
-                    grid[kw] = numpy.ma.array(data=data, mask=mask)
+            # create an array where the inactive region is masked
+            # out (won't appear on plots, in statistics etc.)
+            for kw in results:
+                grid[kw] = numpy.ma.array(data=data[kw], mask=mask)
 
         # use the regular, but slower parser
         else:
@@ -1920,7 +2063,7 @@ def write(filename, grid, dialect='ecl', multi_file=True):
         _write_single(path, base, grid, _lookup, dialect)
 
 
-def _stretches(data):
+def _stretches(data, mask=None):
     """
     Identify stretches of data with equal values.
 
@@ -1928,157 +2071,347 @@ def _stretches(data):
     ----------
     data : numpy.ndarray
         Array which is scanned for stretches of equal values.
+    mask : numpy.ndarray, optional
+        Array of flags for the items that are masked. Consecutive masked
+        items form a stretch regardless of their values.
 
     Returns
     -------
-    generator
-        Generator yielding tuples of (int, Any), where the int is the start index of the stretch and Any is the value of the stretch.
-    """
-    # picture cursors in between every number; this becomes the array of
-    # numbers before and after every such cursor; looking backward and forwards
-    before = data[0:-1]
-    after = data[1:]
-
-    # get a list of indices for the positions that change; add one since the
-    # indices will be relative to the 'after' array, which is skewed one from
-    # the original. we must add zero to this list, as the first element is
-    # always new, but is never registered as such (nothing to differ from)
-    changes = numpy.where(numpy.not_equal(before, after))[0] + 1
-    changes = numpy.concatenate((numpy.array((0,), dtype=changes.dtype),
-                                 changes))
-
-    # changes is the start of each run; find the lengths of each run. here
-    # we have the dual of the case above with the first item; the last item
-    # runs until the end of the array, but there is no change after it so
-    # we must register it manually
-    length = numpy.diff(
-        numpy.concatenate((changes, numpy.array((len(data),),
-                                                dtype=changes.dtype))))
-
-    # return a generator of every individual value and its associated
-    # consecutive count in the stream
-    for row, count in enumerate(length):
-        yield (count, data[changes[row]])
-
-
-def _write_compr_full(f_obj, data, fmt):
+    tuple of numpy.ndarray
+        Start index and length of every stretch.
     """
-    Write a data field as a keyword that can be included into an already
-    opened grid file, assuming a full data array.
+    if len(data) == 0:
+        return (numpy.zeros((0,), dtype=numpy.intp),
+                numpy.zeros((0,), dtype=numpy.intp))
+
+    # picture cursors in between every number; a stretch starts at every
+    # cursor where the number before differs from the number after it
+    changes = numpy.not_equal(data[0:-1], data[1:])
+    if mask is not None:
+        both = numpy.logical_and(mask[0:-1], mask[1:])
+        changes = numpy.logical_or(numpy.logical_and(changes, ~both),
+                                   numpy.not_equal(mask[0:-1], mask[1:]))
+
+    # the first element is always new, but is never registered as such
+    # (nothing to differ from), and the last stretch runs until the end
+    start = numpy.flatnonzero(numpy.concatenate(([True], changes)))
+    length = numpy.diff(numpy.append(start, len(data)))
+    return start, length
+
+
+# formats of floating-point numbers in scientific notation that can be
+# written without calling the formatting routines of Python
+_SCI_FMT = re.compile(r'^([1-9][0-9]*)?(?:\.([0-9]))?([eE])$')
+
+# formats of integers that can be written without formatting each of them
+_INT_FMT = re.compile(r'^([1-9][0-9]*)?d$')
+
+
+# characters of all numbers with four digits, from 0000 to 9999, each of
+# which can be copied as a single word
+_QUADS = numpy.array([enc('{0:04d}'.format(i))
+                      for i in range(10000)]).view(numpy.uint32)
+
+
+def _digits(num, ndig, keep=1):
+    """
+    Decimal digits of non-negative integers, as characters.
 
     Parameters
     ----------
-    f_obj : io.IOBase
-        File-like object to write to.
-    data : numpy.ndarray
-        Data array to be written.
-    fmt : str
-        Format of a single item, on the form used to specify formats in the
-        built-in routines, but without percent or braces.
+    num : numpy.ndarray
+        Integers to write, shape (n,).
+    ndig : int
+        Number of digits to write, which must be enough for the largest
+        number.
+    keep : int
+        Minimum number of digits to write; leading zeros before these are
+        NUL characters. With zero, nothing is written for the number zero.
 
     Returns
     -------
-    None
+    numpy.ndarray
+        Characters of each number, right-aligned, shape (n, ndig).
     """
-    # format strings for writing a single value and multiple values,
-    # respectively; we prepare these outside of the loop. as a special
-    # case, we write nulls in a particularily short format
-    single_fmt = '{{0:{0:s}}}\n'.format(fmt)
-    multi_fmt = '{{0:d}}*{{1:{0:s}}}\n'.format(fmt)
-    single_null = '0\n' if fmt[-1] == 'd' else '0.\n'
-    multi_null = '{0:d}*0\n' if fmt[-1] == 'd' else '{0:d}*0.\n'
-
-    # then write all the data in batch; length first, then the data,
-    # using the data itself for criteria for what constitute a stretch
-    for count, value in _stretches(data):
-        if value:
-            if count == 1:
-                f_obj.write(enc(single_fmt.format(value)))
-            else:
-                f_obj.write(enc(multi_fmt.format(count, value)))
+    # four digits at a time, from the right. integer division is slow, but
+    # floating-point division is exact for numbers with this few digits
+    nquad = (ndig + 3) // 4
+    quads = numpy.empty((len(num), nquad), dtype=numpy.uint32)
+    rest = num.astype(numpy.float64) if ndig <= 12 else num
+    for col in range(nquad - 1, 0, -1):
+        if ndig <= 12:
+            high = numpy.floor(rest / 10000)
         else:
-            if count == 1:
-                f_obj.write(enc(single_null))
-            else:
-                f_obj.write(enc(multi_null.format(count)))
+            high = rest // 10000
+        quads[:, col] = _QUADS[(rest - high * 10000).astype(numpy.intp)]
+        rest = high
+    quads[:, 0] = _QUADS[rest.astype(numpy.intp)]
+    chars = quads.view(numpy.uint8)[:, 4 * nquad - ndig:]
+
+    # a column holds a leading zero for every number less than its power;
+    # one column at a time is faster than all of them with broadcasting
+    for col in range(ndig - keep):
+        chars[:, col] *= (num >= 10 ** (ndig - 1 - col))
+    return chars
 
 
-# pylint: disable=too-many-branches
-def _write_compr_masked(f_obj, data, mask, fmt):
+def _justify(chars, width, shortest):
     """
-    Write a data field as a keyword that can be included into an already
-    opened grid file, assuming a masked (sparse) data array.
+    Pad formatted numbers with blanks to the left up to a minimum width.
 
     Parameters
     ----------
-    f_obj : io.IOBase
-        File-like object to write to.
-    data : numpy.ndarray
-        Data array to be written.
+    chars : numpy.ndarray
+        Characters of each number, shape (n, m); NUL characters are skipped.
+    width : int
+        Minimum number of characters in the text of each number.
+    shortest : int
+        Number of characters in the text of the shortest number, so that
+        nothing needs to be padded when that is not less than the width.
+
+    Returns
+    -------
+    numpy.ndarray
+        Characters of each number, including the padding.
+    """
+    if width <= shortest:
+        return chars
+    blanks = width - numpy.count_nonzero(chars, axis=1)
+    pad = numpy.where(numpy.arange(width) < blanks[:, numpy.newaxis],
+                      ord(' '), 0).astype(numpy.uint8)
+    return numpy.concatenate((pad, chars), axis=1)
+
+
+def _format_sci(values, width, prec, letter):
+    """
+    Format floating-point numbers in scientific notation, in the same way
+    as `'{0:W.Pe}'.format` does, but for all of them at once.
+
+    This is used instead of `numpy.char.mod` or `'{0:W.Pe}'.format` of each
+    number, which are several times slower for large fields. It supports
+    finite numbers with magnitude between 1e-290 and 1e290 (and zero),
+    given as float64 (float16 and float32 are widened exactly), with a
+    precision of at most nine digits (see _SCI_FMT). The other numbers are
+    flagged as not exact, and are formatted by Python.
+
+    Parameters
+    ----------
+    values : numpy.ndarray
+        Numbers to format, of type float64.
+    width : int
+        Minimum width of each number, or zero.
+    prec : int
+        Number of digits after the decimal point.
+    letter : str
+        Letter in front of the exponent, 'e' or 'E'.
+
+    Returns
+    -------
+    chars : numpy.ndarray
+        Characters of each number; NUL characters are skipped.
+    exact : numpy.ndarray
+        Flags for the numbers that are formatted correctly. Numbers that
+        are not finite, that are outside the supported range or that are
+        (nearly) halfway between two decimal numbers with the given
+        precision are not, and must be formatted by Python instead.
+    """
+    mag = numpy.abs(values)
+    exact = numpy.isfinite(mag) & (mag > 1e-290) & (mag < 1e290)
+    mag = numpy.where(exact, mag, 1.)
+
+    # scale each number so that it has prec+1 digits before the decimal
+    # point; the logarithm may be off by one close to powers of ten
+    expo = numpy.floor(numpy.log10(mag)).astype(numpy.int64)
+    for _ in range(3):
+        scaled = mag * numpy.power(10., prec - expo)
+        shift = ((scaled >= 10. ** (prec + 1)).astype(numpy.int64) -
+                 (scaled < 10. ** prec))
+        if not numpy.any(shift):
+            break
+        expo += shift
+    exact &= (shift == 0)
+
+    # scaling rounds the number; only if it is far from halfway between
+    # two integers, is the rounded result the same as for the exact number
+    frac = scaled - numpy.floor(scaled)
+    exact &= numpy.abs(frac - 0.5) > scaled * 1e-13
+    digits = numpy.floor(scaled + 0.5)
+    carry = digits >= 10. ** (prec + 1)
+    digits[carry] /= 10.
+    expo += carry
+
+    # sign, digits with the decimal point after the first one, and the
+    # exponent with at least two digits
+    mant = _digits(digits.astype(numpy.int64), prec + 1, keep=prec + 1)
+    chars = numpy.empty((len(values), prec + 7 + (prec > 0)),
+                        dtype=numpy.uint8)
+    chars[:, 0] = numpy.where(values < 0, numpy.uint8(ord('-')),
+                              numpy.uint8(0))
+    chars[:, 1] = mant[:, 0]
+    if prec > 0:
+        chars[:, 2] = ord('.')
+        chars[:, 3:prec + 3] = mant[:, 1:]
+    chars[:, -5] = ord(letter)
+    chars[:, -4] = numpy.where(expo < 0, numpy.uint8(ord('-')),
+                               numpy.uint8(ord('+')))
+    chars[:, -3:] = _digits(numpy.abs(expo), 3, keep=2)
+    return _justify(chars, width, prec + 5 + (prec > 0)), exact
+
+
+def _format_int(values, width):
+    """
+    Format integers in the same way as `'{0:Wd}'.format` does, but for all
+    of them at once.
+
+    Parameters
+    ----------
+    values : numpy.ndarray
+        Numbers to format, of an integer type.
+    width : int
+        Minimum width of each number, or zero.
+
+    Returns
+    -------
+    numpy.ndarray
+        Characters of each number; NUL characters are skipped.
+    """
+    values = values.astype(numpy.int64)
+    mag = numpy.abs(values).astype(numpy.uint64)
+    ndig = len(str(int(numpy.max(mag))))
+    sign = numpy.where(values < 0, ord('-'), 0).astype(numpy.uint8)
+    return _justify(numpy.concatenate(
+        (sign[:, numpy.newaxis], _digits(mag, ndig)), axis=1), width, 1)
+
+
+def _format_any(values, fmt):
+    """
+    Format numbers with the formatting routines of Python; each distinct
+    number is only formatted once.
+
+    Parameters
+    ----------
+    values : numpy.ndarray
+        Numbers to format.
+    fmt : str
+        Format of a single item, without braces.
+
+    Returns
+    -------
+    numpy.ndarray
+        Characters of each number; NUL characters are skipped.
+    """
+    uniq, inverse = numpy.unique(values, return_inverse=True)
+    text = numpy.array([enc(format(value, fmt)) for value in uniq.tolist()])
+    chars = text.view(numpy.uint8).reshape(len(text), text.itemsize)
+    return chars[numpy.ravel(inverse)]
+
+
+def _format(values, fmt):
+    """
+    Format numbers for a grid file.
+
+    Floating-point numbers in scientific notation (see _format_sci) and
+    integers other than uint64 (see _format_int) are formatted with array
+    operations; anything else is formatted by Python, once for each
+    distinct number.
+
+    Parameters
+    ----------
+    values : numpy.ndarray
+        Numbers to format, shape (n,).
     fmt : str
         Format of a single item, in the form used to specify formats in the
         built-in routines, but without percent or braces.
 
     Returns
     -------
-    None
+    numpy.ndarray
+        Characters of each number, shape (n, m); NUL characters are to be
+        skipped when the text is written.
     """
-    # format strings for writing a single value and multiple values. these
-    # are the same as for the _write_compr_full routine, but we cannot make
-    # them global variables since they depend on the format
-    single_fmt = '{{0:{0:s}}}\n'.format(fmt)
-    multi_fmt = '{{0:d}}*{{1:{0:s}}}\n'.format(fmt)
-    single_null = '0\n' if fmt[-1] == 'd' else '0.\n'
-    multi_null = '{0:d}*0\n' if fmt[-1] == 'd' else '{0:d}*0.\n'
-
-    # Petrel reads these as masked values
-    single_blank = 'NaN\n'
-    multi_blank = '{0:d}*NaN\n'
-
-    # we haven't written any values yet, so start reading from the beginning
-    accum = 0
-
-    # start out by enumerating stretches which is either masked, or unmasked
-    # pylint: disable=too-many-nested-blocks
-    for count_subset, is_blank in _stretches(mask):
-
-        # if we are to write a stretch of blank values, then we don't need
-        # any formatting for the number, just the special mask value
-        if is_blank:
-            if count_subset == 1:
-                f_obj.write(enc(single_blank))
-            else:
-                f_obj.write(enc(multi_blank.format(count_subset)))
+    if len(values) == 0:
+        return numpy.zeros((0, 0), dtype=numpy.uint8)
+
+    sci = _SCI_FMT.match(fmt)
+    if sci is not None and numpy.issubdtype(values.dtype, numpy.floating) \
+            and values.dtype.itemsize <= 8:
+        width, prec, letter = sci.groups()
+        chars, exact = _format_sci(values.astype(numpy.float64),
+                                   int(width or 0), int(prec or 6), letter)
+        if numpy.all(exact):
+            return chars
+
+        # few numbers cannot be formatted exactly; let Python do those
+        other = _format_any(values[~exact], fmt)
+        merged = numpy.zeros((len(values), max(chars.shape[1],
+                                               other.shape[1])),
+                             dtype=numpy.uint8)
+        merged[exact, :chars.shape[1]] = chars[exact]
+        merged[~exact, :other.shape[1]] = other
+        return merged
+
+    num = _INT_FMT.match(fmt)
+    if num is not None and numpy.issubdtype(values.dtype, numpy.integer) \
+            and values.dtype != numpy.uint64:
+        return _format_int(values, int(num.group(1) or 0))
+
+    return _format_any(values, fmt)
+
+
+def _compress(data, mask, fmt):
+    """
+    Text of a data field, with stretches of equal values compressed.
 
-        # if we have a subset with non-blanks, then process this subset as
-        # if it were an array in itself, which enables us to compress long
-        # stretches of equal values there, too
-        else:
-            # fast path
-            if count_subset == 1:
-                value = data[accum]
-                if value:
-                    f_obj.write(enc(single_fmt.format(value)))
-                else:
-                    f_obj.write(enc(single_null))
+    Parameters
+    ----------
+    data : numpy.ndarray
+        Data array to be written, shape (n,).
+    mask : numpy.ndarray
+        Flags of the items that are masked, shape (n,), or None if the data
+        array is full.
+    fmt : str
+        Format of a single item, in the form used to specify formats in the
+        built-in routines, but without percent or braces.
 
-            # more than one value in the subset
-            else:
-                subset = data[accum:(accum+count_subset)]
-                for count, value in _stretches(subset):
-                    if value:
-                        if count == 1:
-                            f_obj.write(enc(single_fmt.format(value)))
-                        else:
-                            f_obj.write(enc(multi_fmt.format(count, value)))
-                    else:
-                        if count == 1:
-                            f_obj.write(enc(single_null))
-                        else:
-                            f_obj.write(enc(multi_null.format(count)))
-
-        # keep track of how many items we have written totally
-        accum += count_subset
+    Returns
+    -------
+    bytes
+        One line for each stretch, with the number of items and an asterisk
+        in front of the value if there is more than one.
+    """
+    start, length = _stretches(data, mask)
+    value = data[start]
+
+    # as a special case, we write nulls in a particularily short format,
+    # and masked values as not-a-number, which Petrel reads as such
+    if mask is None:
+        blank = numpy.zeros(len(start), dtype=bool)
+    else:
+        blank = mask[start]
+    null = ~blank & (value == 0)
+    full = ~(blank | null)
+    null_text = b'0' if fmt[-1] == 'd' else b'0.'
+    blank_text = b'NaN'
+
+    # number of items and an asterisk in front of repeated values, then the
+    # value itself; the characters that aren't used are left as NUL
+    multi = length > 1
+    count = numpy.where(multi, length, 0)
+    ndig = len(str(int(numpy.max(count)))) if len(count) else 1
+    text = _format(value[full], fmt)
+    width = max(text.shape[1], len(blank_text))
+    lines = numpy.zeros((len(start), ndig + width + 2), dtype=numpy.uint8)
+    lines[:, :ndig] = _digits(count, ndig, keep=0)
+    lines[:, ndig] = numpy.where(multi, numpy.uint8(ord('*')), numpy.uint8(0))
+    chars = lines[:, ndig + 1:-1]
+    chars[numpy.flatnonzero(full), :text.shape[1]] = text
+    chars[null, :len(null_text)] = numpy.frombuffer(null_text, numpy.uint8)
+    chars[blank, :len(blank_text)] = numpy.frombuffer(blank_text,
+                                                      numpy.uint8)
+    lines[:, -1] = ord('\n')
+
+    # all lines in one go, skipping the unused characters
+    return lines[lines != 0].tobytes()
 
 
 def _write_compr_any(f_obj, keyw, cube, fmt):
@@ -2101,19 +2434,17 @@ def _write_compr_any(f_obj, keyw, cube, fmt):
     -------
     None
     """
-    # write the keyword first, on its own line
-    f_obj.write(enc('{0:8s}\n'.format(keyw.upper())))
-
     # if the data is sparse, i.e. not defined over the entire field,
-    # then use a different writing algorithm, then if it's full
+    # then the masked values are written as blanks
     if hasattr(cube, 'mask'):
-        _write_compr_masked(f_obj, numpy.ravel(cube.data),
-                            numpy.ravel(cube.mask), fmt)
+        body = _compress(numpy.ravel(cube.data),
+                         numpy.ravel(numpy.ma.getmaskarray(cube)), fmt)
     else:
-        _write_compr_full(f_obj, numpy.ravel(cube), fmt)
+        body = _compress(numpy.ravel(cube), None, fmt)
 
-    # write a single slash at the end to terminate the field
-    f_obj.write(enc('/\n'))
+    # the keyword on its own line, then the data, and a single slash at the
+    # end to terminate the field; all of it written at once
+    f_obj.write(enc('{0:8s}\n'.format(keyw.upper())) + body + enc('/\n'))
 
 
 def write_compressed(fname, keyw, cube, *, fmt="12.6e"):
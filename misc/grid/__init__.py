@@ -1,8 +1,16 @@
 """\
 Generic read module which determines format from extension.
 """
+import hashlib
+import json
 import logging
+import mmap
+import os
 import os.path as pth
+import re
+import shutil
+
+import numpy as np
 
 
 # module specific log; add a null handler so that we won't get an
@@ -21,10 +29,26 @@ def read_grid(filename, cache_dir=None):
         Name of the grid file to read, including path.
     cache_dir : str
         Path to a directory where a cache of the grid may be stored to ensure faster read next time.
+        Each array of the grid is stored as a .npy file, which is memory-mapped (copy-on-write) when
+        the grid is read from the cache. The cache is used as long as the grid file and the files
+        it includes are unchanged.
     """
     # allow shortcut to home directories to be used in paths
     fullname = pth.expanduser(filename)
 
+    if cache_dir is None:
+        return _read_source(fullname)
+
+    cache = _cache_folder(fullname, pth.expanduser(cache_dir))
+    grid = _load_cache(cache)
+    if grid is None:
+        grid = _read_source(fullname)
+        _save_cache(cache, grid)
+    return grid
+
+
+def _read_source(fullname):
+    """Read a grid file, determining the format from the extension."""
     # split the filename into directory, name and extension
     base, ext = pth.splitext(fullname)
 
@@ -57,3 +81,119 @@ def read_grid(filename, cache_dir=None):
             "File format with extension \"{0}\" is unknown".format(ext))
 
     return grid
+
+
+# file name in quotes after an include keyword, possibly on the next line(s)
+_INCLUDE = re.compile(rb"^[ \t]*INCLUDE\b(?:\s|--[^\n]*)*'([^']+)'", re.MULTILINE)
+
+# name of the list of arrays in a cache folder; it is written last, so a
+# folder without it is incomplete
+_MANIFEST = 'grid.json'
+
+
+def _stamp(path, digest):
+    """Add the path, size, modification time and contents of a file to the
+    digest, and return the names of the files it includes.
+    """
+    stat = os.stat(path)
+    digest.update('{0}\0{1:d}\0{2:d}\0'.format(
+        pth.abspath(path), stat.st_size, stat.st_mtime_ns).encode())
+    if stat.st_size == 0:
+        return []
+    with open(path, 'rb') as f, \
+            mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mem:
+        digest.update(mem)
+        if pth.splitext(path)[1].lower() in ('.egrid', '.pickle'):
+            return []
+        return [match.group(1).decode() for match in _INCLUDE.finditer(mem)]
+
+
+def _cache_folder(fullname, cache_dir):
+    """Folder of the cache of a grid file, named after the file and the key
+    of the file and everything it includes.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    pending = [fullname]
+    seen = set()
+    while pending:
+        path = pth.normpath(pending.pop(0))
+        if path in seen or not pth.isfile(path):
+            continue
+        seen.add(path)
+        # included files are relative to the file that includes them
+        pending.extend(pth.join(pth.dirname(path), name)
+                       for name in _stamp(path, digest))
+
+    # files of the PyReSiTo multi-file format that aren't included
+    stem = pth.splitext(fullname)[0]
+    for suffix in ('_dimens', '_actnum', '_coord', '_zcorn'):
+        path = pth.normpath(stem + suffix + '.grdecl')
+        if path not in seen and pth.isfile(path):
+            _stamp(path, digest)
+
+    # the name tells caches of files with the same name apart, so that
+    # older caches of this file can be recognized
+    name = hashlib.blake2b(pth.abspath(fullname).encode(),
+                           digest_size=4).hexdigest()
+    return pth.join(cache_dir, '{0}-{1}.{2}'.format(
+        pth.basename(fullname), name, digest.hexdigest()))
+
+
+def _load_cache(cache):
+    """Read a grid from its cache folder, or None if it isn't cached."""
+    try:
+        with open(pth.join(cache, _MANIFEST), 'r') as f:
+            manifest = json.load(f)
+        grid = {}
+        for key, masked, *is_tuple in manifest:
+            data = np.load(pth.join(cache, key + '.npy'), mmap_mode='c')
+            if is_tuple and is_tuple[0]:
+                data = tuple(data.tolist())
+            elif masked:
+                mask = np.load(pth.join(cache, key + '.mask.npy'), mmap_mode='c')
+                data = np.ma.array(data=data, mask=mask)
+            grid[key] = data
+    except (OSError, ValueError):
+        return None
+
+    log.info("Reading grid from cache \"%s\"", cache)
+    return grid
+
+
+def _save_cache(cache, grid):
+    """Store each array of a grid in a cache folder. Older caches of the
+    same file are removed. Tuples (such as the DIMENS of an .egrid file) are
+    stored as arrays, and flagged in the manifest such that they are read
+    back as tuples.
+    """
+    tmp = '{0}.{1:d}.tmp'.format(cache, os.getpid())
+    try:
+        os.makedirs(tmp)
+        manifest = []
+        for key, value in grid.items():
+            masked = np.ma.isMaskedArray(value)
+            is_tuple = isinstance(value, tuple)
+            np.save(pth.join(tmp, key + '.npy'),
+                    np.ma.getdata(value) if masked else np.asarray(value),
+                    allow_pickle=False)
+            if masked:
+                np.save(pth.join(tmp, key + '.mask.npy'),
+                        np.ma.getmaskarray(value), allow_pickle=False)
+            manifest.append([key, masked, is_tuple])
+        with open(pth.join(tmp, _MANIFEST), 'w') as f:
+            json.dump(manifest, f)
+        os.replace(tmp, cache)
+    except (OSError, ValueError) as err:
+        # another process may have stored the same cache, or some of the
+        # grid is not an array, in which case the grid is read every time
+        log.warning("Could not cache grid in \"%s\": %s", cache, err)
+        shutil.rmtree(tmp, ignore_errors=True)
+        return
+
+    log.info("Stored grid in cache \"%s\"", cache)
+    stem, _ = pth.splitext(cache)
+    for folder in os.listdir(pth.dirname(cache) or '.'):
+        path = pth.join(pth.dirname(cache), folder)
+        if pth.splitext(path)[0] == stem and path != cache and \
+                not path.endswith('.tmp'):
+            shutil.rmtree(path, ignore_errors=True)
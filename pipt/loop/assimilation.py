@@ -93,106 +93,110 @@ class Assimilate:
                                    self.ensemble.obs_data, self.ensemble.datavar, self.ensemble.logger,
                                    self.ensemble.prior_info, self.ensemble.sim, self.ensemble.prior_state)
 
-        # Run a while loop until max. iterations or convergence is reached
-        while self.ensemble.iteration < self.max_iter and conv is False:
-            # Add a check to see if this is the prior model
-            if self.ensemble.iteration == 0:
-                # Calc forecast for prior model
-                # Inset 0 as input to forecast all data
-                self.calc_forecast()
-
-                # remove outliers
-                if 'remove_outliers' in self.ensemble.sim.input_dict:
-                    self.remove_outliers()
-
-                if 'qa' in self.ensemble.keys_da:  # Check if we want to perform a Quality Assurance of the forecast
-                    # set updated prediction, state and lam
-                    qaqc.set(self.ensemble.pred_data,
-                             self.ensemble.state, self.ensemble.lam)
-                    # Level 1,2 all data, and subspace
-                    qaqc.calc_mahalanobis((1, 'time', 2, 'time', 1, None, 2, None))
-                    qaqc.calc_coverage()  # Compute data coverage
-                    qaqc.calc_kg({'plot_all_kg': True, 'only_log': False,
-                                 'num_store': 5})  # Compute kalman gain
-
-                success_iter = True
-
-                # always store prior forcast, unless specifically told not to
-                if 'nosave' not in self.ensemble.keys_da:
-                    np.savez('prior_forecast.npz', **
-                             {'pred_data': self.ensemble.pred_data})
-
-            # For the remaining iterations we start by applying the analysis and finish by running the forecast
-            else:
-                # Analysis (in the update_scheme class)
-                self.ensemble.calc_analysis()
-
-                if 'qa' in self.ensemble.keys_da and 'screendata' in self.ensemble.keys_da and \
-                        self.ensemble.keys_da['screendata'] == 'yes' and self.ensemble.iteration == 1:
-                    #  need to update datavar, and recompute mahalanobis measures
-                    self.logger.info(
-                        'Recomputing Mahalanobis distance with updated datavar')
-                    qaqc.datavar = self.datavar  # this is updated from calc_analysis
-                    # Level 1,2 all data, and subspace
-                    qaqc.calc_mahalanobis((1, 'time', 2, 'time', 1, None, 2, None))
-
-                # Forecast with the updated state
-                self.calc_forecast()
-
-                if 'remove_outliers' in self.ensemble.keys_da:
-                    self.remove_outliers()
-
-                # Check convergence (in the update_scheme class). Outputs logical variable to tell the while loop to
-                # stop, and a variable telling what criteria for convergence was reached.
-                # Also check if the objective function has been reduced, and use this function to accept the state and
-                # update the lambda values.
-                #
-                conv, success_iter, self.why_stop = self.ensemble.check_convergence()
-
-            # if reduction of objective function -> save the state
-            if success_iter:
-                # More general method to save all relevant information from an iteration analysis/forecast step
-                if 'iterinfo' in self.ensemble.keys_da:
-                    #
-                    self._save_iteration_information()
-                if self.ensemble.iteration > 0:
-                    # Temporary save state if options in TEMPSAVE have been given and the option is not 'no'
-                    if 'tempsave' in self.ensemble.keys_da and self.ensemble.keys_da['tempsave'] != 'no':
-                        self._save_during_iteration(self.ensemble.keys_da['tempsave'])
-                    if 'analysisdebug' in self.ensemble.keys_da:
-                        self._save_analysis_debug()
-                    if 'qc' in self.ensemble.keys_da:  # Check if we want to perform a Quality Control of the updated state
-                        # set updated prediction, state and lam
-                        qaqc.set(self.ensemble.pred_data,
-                                 self.ensemble.state, self.ensemble.lam)
-                        qaqc.calc_da_stat()  # Compute statistics for updated parameters
+        try:
+            # Run a while loop until max. iterations or convergence is reached
+            while self.ensemble.iteration < self.max_iter and conv is False:
+                # Add a check to see if this is the prior model
+                if self.ensemble.iteration == 0:
+                    # Calc forecast for prior model
+                    # Inset 0 as input to forecast all data
+                    self.calc_forecast()
+
+                    # remove outliers
+                    if 'remove_outliers' in self.ensemble.sim.input_dict:
+                        self.remove_outliers()
+
                     if 'qa' in self.ensemble.keys_da:  # Check if we want to perform a Quality Assurance of the forecast
                         # set updated prediction, state and lam
                         qaqc.set(self.ensemble.pred_data,
                                  self.ensemble.state, self.ensemble.lam)
-                        qaqc.calc_mahalanobis(
-                            (1, 'time', 2, 'time', 1, None, 2, None))  # Level 1,2 all data, and subspace
-                        #  qaqc.calc_coverage()  # Compute data coverage
-                        qaqc.calc_kg()  # Compute kalman gain
+                        # Level 1,2 all data, and subspace
+                        qaqc.calc_mahalanobis((1, 'time', 2, 'time', 1, None, 2, None))
+                        qaqc.calc_coverage()  # Compute data coverage
+                        qaqc.calc_kg({'plot_all_kg': True, 'only_log': False,
+                                     'num_store': 5})  # Compute kalman gain
 
-            # Update iteration counter if iteration was successful
-            if self.ensemble.iteration >= 0 and success_iter is True:
-                if self.ensemble.iteration == 0:
-                    self.ensemble.iteration += 1
-                    pbar_out.update(1)
-                    # pbar_out.set_description(f'Iterations (Obj. func. val:{self.data_misfit:.1f})')
-                    # self.prior_data_misfit = self.data_misfit
-                    # self.pbar_out.refresh()
+                    success_iter = True
+
+                    # always store prior forcast, unless specifically told not to
+                    if 'nosave' not in self.ensemble.keys_da:
+                        np.savez('prior_forecast.npz', **
+                                 {'pred_data': self.ensemble.pred_data})
+
+                # For the remaining iterations we start by applying the analysis and finish by running the forecast
                 else:
-                    self.ensemble.iteration += 1
-                    pbar_out.update(1)
-                    pbar_out.set_description(
-                        f'Iterations (Obj. func. val:{self.ensemble.data_misfit:.1f}'
-                        f' Reduced: {100 * (1 - (self.ensemble.data_misfit / self.ensemble.prev_data_misfit)):.0f} %)')
-                    # self.pbar_out.refresh()
-
-            if 'restartsave' in self.ensemble.keys_da and self.ensemble.keys_da['restartsave'] == 'yes':
-                self.ensemble.save()
+                    # Analysis (in the update_scheme class)
+                    self.ensemble.calc_analysis()
+
+                    if 'qa' in self.ensemble.keys_da and 'screendata' in self.ensemble.keys_da and \
+                            self.ensemble.keys_da['screendata'] == 'yes' and self.ensemble.iteration == 1:
+                        #  need to update datavar, and recompute mahalanobis measures
+                        self.logger.info(
+                            'Recomputing Mahalanobis distance with updated datavar')
+                        qaqc.datavar = self.datavar  # this is updated from calc_analysis
+                        # Level 1,2 all data, and subspace
+                        qaqc.calc_mahalanobis((1, 'time', 2, 'time', 1, None, 2, None))
+
+                    # Forecast with the updated state
+                    self.calc_forecast()
+
+                    if 'remove_outliers' in self.ensemble.keys_da:
+                        self.remove_outliers()
+
+                    # Check convergence (in the update_scheme class). Outputs logical variable to tell the while loop to
+                    # stop, and a variable telling what criteria for convergence was reached.
+                    # Also check if the objective function has been reduced, and use this function to accept the state and
+                    # update the lambda values.
+                    #
+                    conv, success_iter, self.why_stop = self.ensemble.check_convergence()
+
+                # if reduction of objective function -> save the state
+                if success_iter:
+                    # More general method to save all relevant information from an iteration analysis/forecast step
+                    if 'iterinfo' in self.ensemble.keys_da:
+                        #
+                        self._save_iteration_information()
+                    if self.ensemble.iteration > 0:
+                        # Temporary save state if options in TEMPSAVE have been given and the option is not 'no'
+                        if 'tempsave' in self.ensemble.keys_da and self.ensemble.keys_da['tempsave'] != 'no':
+                            self._save_during_iteration(self.ensemble.keys_da['tempsave'])
+                        if 'analysisdebug' in self.ensemble.keys_da:
+                            self._save_analysis_debug()
+                        if 'qc' in self.ensemble.keys_da:  # Check if we want to perform a Quality Control of the updated state
+                            # set updated prediction, state and lam
+                            qaqc.set(self.ensemble.pred_data,
+                                     self.ensemble.state, self.ensemble.lam)
+                            qaqc.calc_da_stat()  # Compute statistics for updated parameters
+                        if 'qa' in self.ensemble.keys_da:  # Check if we want to perform a Quality Assurance of the forecast
+                            # set updated prediction, state and lam
+                            qaqc.set(self.ensemble.pred_data,
+                                     self.ensemble.state, self.ensemble.lam)
+                            qaqc.calc_mahalanobis(
+                                (1, 'time', 2, 'time', 1, None, 2, None))  # Level 1,2 all data, and subspace
+                            #  qaqc.calc_coverage()  # Compute data coverage
+                            qaqc.calc_kg()  # Compute kalman gain
+
+                # Update iteration counter if iteration was successful
+                if self.ensemble.iteration >= 0 and success_iter is True:
+                    if self.ensemble.iteration == 0:
+                        self.ensemble.iteration += 1
+                        pbar_out.update(1)
+                        # pbar_out.set_description(f'Iterations (Obj. func. val:{self.data_misfit:.1f})')
+                        # self.prior_data_misfit = self.data_misfit
+                        # self.pbar_out.refresh()
+                    else:
+                        self.ensemble.iteration += 1
+                        pbar_out.update(1)
+                        pbar_out.set_description(
+                            f'Iterations (Obj. func. val:{self.ensemble.data_misfit:.1f}'
+                            f' Reduced: {100 * (1 - (self.ensemble.data_misfit / self.ensemble.prev_data_misfit)):.0f} %)')
+                        # self.pbar_out.refresh()
+
+                if 'restartsave' in self.ensemble.keys_da and self.ensemble.keys_da['restartsave'] == 'yes':
+                    self.ensemble.save()
+        finally:
+            # The forward runs are done, or have failed; shut down the persistent pool of simulator workers
+            self.ensemble.close_pool()
 
         # always store posterior forcast and state, unless specifically told not to
         if 'nosave' not in self.ensemble.keys_da:
@@ -1,13 +1,13 @@
 """Descriptive description."""
 # Internal imports
 from popt.misc_tools import optim_tools as ot
+from misc.checkpoint import save_checkpoint, load_checkpoint, remove_checkpoint
 
 # External imports
 import os
 import numpy as np
 import logging
 import time
-import pickle
 
 # Gets or creates a logger
 logger = logging.getLogger(__name__)
@@ -105,6 +105,9 @@ class Optimize:
         # Save restart information flag
         self.restartsave = __set__variable('restartsave', False)
 
+        # Compress the arrays in the restart file
+        self.restartcompress = __set__variable('restartcompress', False)
+
         # Optimze with external penalty function for constraints, provide r_0 as input
         self.epf = __set__variable('epf', {})
         self.epf_iteration = 0
@@ -142,7 +145,7 @@ class Optimize:
 
             # delete potential restart files to avoid any problems
             if self.pickle_restart_file in [f for f in os.listdir('.') if os.path.isfile(f)]:
-                os.remove(self.pickle_restart_file)
+                remove_checkpoint(self.pickle_restart_file)
 
             self.iteration += 1
 
@@ -153,78 +156,83 @@ class Optimize:
             previous_state = self.mean_state
             logger.info(f'       -----> EPF-EnOpt: {self.epf_iteration}, {self.epf["r"]} (outer iteration, penalty factor)')  # print epf info
 
-        while epf_not_converged:  # outer loop using epf
+        try:
+            while epf_not_converged:  # outer loop using epf
 
-            # Run a while loop until max iterations or convergence is reached
-            is_successful = True
-            while self.iteration <= self.max_iter and is_successful:
+                # Run a while loop until max iterations or convergence is reached
+                is_successful = True
+                while self.iteration <= self.max_iter and is_successful:
 
-                # Update control variable
-                is_successful = self.calc_update()
+                    # Update control variable
+                    is_successful = self.calc_update()
 
-                # Save restart file (if requested)
-                if self.restartsave:
-                    self.rnd = np.random.get_state()  # get the current random state
-                    self.save()
+                    # Save restart file (if requested)
+                    if self.restartsave:
+                        self.rnd = np.random.get_state()  # get the current random state
+                        self.save()
 
-            # Check if max iterations was reached
-            if self.iteration > self.max_iter:
-                self.optimize_result['message'] = 'Iterations stopped due to max iterations reached!'
-            else:
-                self.optimize_result['message'] = 'Convergence was met :)'
-
-            # Logging some info to screen
-            logger.info('       Optimization converged in %d iterations ', self.iteration-1)
-            logger.info('       Optimization converged with final obj_func = %.4f',
-                        np.mean(self.optimize_result['fun']))
-            logger.info('       Total number of function evaluations = %d', self.optimize_result['nfev'])
-            logger.info('       Total number of jacobi evaluations = %d', self.optimize_result['njev'])
-            if self.start_time is not None:
-                logger.info('       Total elapsed time = %.2f minutes', (time.perf_counter()-self.start_time)/60)
-            logger.info('       ============================================')
-
-            # Test for convergence of outer epf loop
-            epf_not_converged = False
-            if self.epf:
-                if self.epf_iteration > self.epf['max_epf_iter']:  # max epf_iterations set to 10
-                    logger.info(f'       -----> EPF-EnOpt: maximum epf iterations reached')  # print epf info
-                    break
-                p = np.abs(previous_state-self.mean_state) / (np.abs(previous_state) + 1.0e-9)
-                conv_crit = self.epf['conv_crit']
-                if np.any(p > conv_crit):
-                    epf_not_converged = True
-                    previous_state = self.mean_state
-                    self.epf['r'] *= self.epf['r_factor']  # increase penalty factor
-                    self.obj_func_tol *= self.epf['tol_factor']  # decrease tolerance
-                    self.obj_func_values = self.fun(self.mean_state, **self.epf)
-                    self.iteration = 0
-                    self.epf_iteration += 1
-                    optimize_result = ot.get_optimize_result(self)
-                    ot.save_optimize_results(optimize_result)
-                    self.nfev += 1
-                    self.iteration = +1
-                    r = self.epf['r']
-                    logger.info(f'       -----> EPF-EnOpt: {self.epf_iteration}, {r} (outer iteration, penalty factor)')  # print epf info
+                # Check if max iterations was reached
+                if self.iteration > self.max_iter:
+                    self.optimize_result['message'] = 'Iterations stopped due to max iterations reached!'
                 else:
-                    logger.info(f'       -----> EPF-EnOpt: converged, no variables changed more than {conv_crit*100} %')  # print epf info
-                    final_obj_no_penalty = str(round(float(self.fun(self.mean_state)),4))
-                    logger.info(f'       -----> EPF-EnOpt: objective value without penalty = {final_obj_no_penalty}') # print epf info
+                    self.optimize_result['message'] = 'Convergence was met :)'
+
+                # Logging some info to screen
+                logger.info('       Optimization converged in %d iterations ', self.iteration-1)
+                logger.info('       Optimization converged with final obj_func = %.4f',
+                            np.mean(self.optimize_result['fun']))
+                logger.info('       Total number of function evaluations = %d', self.optimize_result['nfev'])
+                logger.info('       Total number of jacobi evaluations = %d', self.optimize_result['njev'])
+                if self.start_time is not None:
+                    logger.info('       Total elapsed time = %.2f minutes', (time.perf_counter()-self.start_time)/60)
+                logger.info('       ============================================')
+
+                # Test for convergence of outer epf loop
+                epf_not_converged = False
+                if self.epf:
+                    if self.epf_iteration > self.epf['max_epf_iter']:  # max epf_iterations set to 10
+                        logger.info(f'       -----> EPF-EnOpt: maximum epf iterations reached')  # print epf info
+                        break
+                    p = np.abs(previous_state-self.mean_state) / (np.abs(previous_state) + 1.0e-9)
+                    conv_crit = self.epf['conv_crit']
+                    if np.any(p > conv_crit):
+                        epf_not_converged = True
+                        previous_state = self.mean_state
+                        self.epf['r'] *= self.epf['r_factor']  # increase penalty factor
+                        self.obj_func_tol *= self.epf['tol_factor']  # decrease tolerance
+                        self.obj_func_values = self.fun(self.mean_state, **self.epf)
+                        self.iteration = 0
+                        self.epf_iteration += 1
+                        optimize_result = ot.get_optimize_result(self)
+                        ot.save_optimize_results(optimize_result)
+                        self.nfev += 1
+                        self.iteration = +1
+                        r = self.epf['r']
+                        logger.info(f'       -----> EPF-EnOpt: {self.epf_iteration}, {r} (outer iteration, penalty factor)')  # print epf info
+                    else:
+                        logger.info(f'       -----> EPF-EnOpt: converged, no variables changed more than {conv_crit*100} %')  # print epf info
+                        final_obj_no_penalty = str(round(float(self.fun(self.mean_state)),4))
+                        logger.info(f'       -----> EPF-EnOpt: objective value without penalty = {final_obj_no_penalty}') # print epf info
+        finally:
+            # The forward runs are done, or have failed; shut down the persistent pool of simulator workers in the
+            # ensemble that owns the objective function (if any)
+            ensemble = getattr(self.fun, '__self__', None)
+            if hasattr(ensemble, 'close_pool'):
+                ensemble.close_pool()
 
     def save(self):
         """
         We use pickle to dump all the information we have in 'self'. Can be used, e.g., if some error has occurred.
+        Large arrays are stored as separate chunks, and only the chunks that have changed since the last save are
+        written (see misc.checkpoint).
         """
-        # Open save file and dump all info. in self
-        with open(self.pickle_restart_file, 'wb') as f:
-            pickle.dump(self.__dict__, f)
+        save_checkpoint(self.__dict__, self.pickle_restart_file, compress=self.restartcompress)
 
     def load(self):
         """
-        Load a pickled file and save all info. in self.
+        Load a pickled file and save all info. in self. Large arrays are memory mapped, i.e., read when used.
         """
-        # Open file and read with pickle
-        with open(self.pickle_restart_file, 'rb') as f:
-            tmp_load = pickle.load(f)
+        tmp_load = load_checkpoint(self.pickle_restart_file)
 
         # Save in 'self'
         self.__dict__.update(tmp_load)
@@ -0,0 +1,232 @@
+"""Batch-scheduler backends for running the forward simulations outside of PET (e.g., on an hpc)."""
+
+import os
+import sys
+import abc
+import time
+from subprocess import Popen, DEVNULL, run
+
+# Marker file written in the run folder when a simulation task is done. It contains 1 if the simulation succeeded,
+# and 0 otherwise.
+DONE_MARKER = 'PET_DONE'
+
+
+def write_done_marker(folder, success):
+    """
+    Mark a simulation task as done.
+
+    Parameters
+    ----------
+    folder : str
+        Run folder of the task.
+    success : bool
+        Whether the simulation succeeded.
+    """
+    with open(os.path.join(folder, DONE_MARKER), 'w') as f:
+        f.write('1' if success else '0')
+
+
+def read_done_marker(folder):
+    """
+    Check if a simulation task is done.
+
+    Parameters
+    ----------
+    folder : str
+        Run folder of the task.
+
+    Returns
+    -------
+    success : bool or None
+        None if the task is not done, else whether the simulation succeeded.
+    """
+    try:
+        with open(os.path.join(folder, DONE_MARKER), 'r') as f:
+            return f.read().strip() == '1'
+    except OSError:
+        return None
+
+
+class BatchBackend(abc.ABC):
+    """
+    Interface of a batch-scheduler backend. The run folders (En_<member>) have been made before the tasks are submitted.
+    Each task runs the simulator in one folder, and writes the DONE_MARKER file when it is done, such that finished
+    tasks can be handled while the others are still running.
+    """
+
+    def __init__(self, sim):
+        """
+        Parameters
+        ----------
+        sim : object
+            Forward simulator. The run file name is taken from sim.input_dict['runfile'].
+        """
+        self.sim = sim
+        self.filename = sim.input_dict['runfile']
+        self.members = []
+        self.pending = set()
+
+    @staticmethod
+    def folder(member):
+        return 'En_' + str(member) + os.sep
+
+    @abc.abstractmethod
+    def submit(self, members):
+        """
+        Submit one simulation task for each ensemble member.
+
+        Parameters
+        ----------
+        members : list of int
+            Index of the ensemble members.
+        """
+
+    def poll(self):
+        """
+        Find the tasks that have finished since the last call.
+
+        Returns
+        -------
+        finished : dict
+            Member index -> whether the simulation succeeded.
+        """
+        finished = {}
+        for member in list(self.pending):
+            success = read_done_marker(self.folder(member))
+            if success is not None:
+                finished[member] = success
+        self.pending.difference_update(finished)
+        return finished
+
+    def cancel(self):
+        """
+        Cancel the tasks that are not finished.
+        """
+        pass
+
+
+class SlurmBackend(BatchBackend):
+    """
+    Run the simulations as a SLURM job array (see simulator.opm.flow.SLURM_HPC_run). Tasks that are stopped by SLURM
+    before writing the marker file (e.g., time limit or node failure) are found from the job state in sacct.
+    """
+
+    def __init__(self, sim, sacct_interval=30):
+        super().__init__(sim)
+        self.job_id = None
+        self.sacct_interval = sacct_interval
+        self.last_sacct = 0.0
+
+    def submit(self, members):
+        self.members = list(members)
+        self.pending = set(self.members)
+        self.job_id = self.sim.SLURM_HPC_run(len(self.members), filename=self.filename,
+                                             array=','.join(str(el) for el in self.members))
+        if self.job_id is None:
+            raise RuntimeError('Submission of the SLURM job array failed')
+
+    def poll(self):
+        finished = super().poll()
+        if self.pending and time.time() - self.last_sacct > self.sacct_interval:
+            self.last_sacct = time.time()
+            for member, state in self._task_states().items():
+                if member in self.pending and state not in ('PENDING', 'RUNNING', 'REQUEUED', 'COMPLETING',
+                                                            'CONFIGURING', 'SUSPENDED', 'COMPLETED'):
+                    # the task ended without writing the marker
+                    finished[member] = False
+                    self.pending.discard(member)
+        return finished
+
+    def _task_states(self):
+        result = run(['sacct', '-j', str(self.job_id), '--format=JobID,State', '--noheader', '--parsable2'],
+                     capture_output=True, text=True)
+        states = {}
+        for line in result.stdout.splitlines():
+            parts = line.strip().split('|')
+            if len(parts) < 2 or '.' in parts[0] or '_' not in parts[0]:
+                continue  # job steps and the array job itself
+            task = parts[0].split('_')[1]
+            if task.isdigit():
+                states[int(task)] = parts[1].split()[0]
+        return states
+
+    def cancel(self):
+        if self.job_id is not None and self.pending:
+            run(['scancel', str(self.job_id)], capture_output=True)
+
+
+class LocalBackend(BatchBackend):
+    """
+    Local stand-in for a batch scheduler. The tasks are run as separate processes on this machine, at most
+    max_parallel at a time, with the same command as the tasks of the SLURM job array.
+    """
+
+    def __init__(self, sim, max_parallel=1, command=None):
+        """
+        Parameters
+        ----------
+        sim : object
+            Forward simulator.
+        max_parallel : int, optional
+            Maximum number of tasks running at the same time.
+        command : callable, optional
+            Makes the command of a task from its run folder. Default runs python -m simulator.opm <folder> <runfile>.
+        """
+        super().__init__(sim)
+        self.max_parallel = max(int(max_parallel), 1)
+        self.command = command if command is not None else \
+            (lambda folder: [sys.executable, '-m', 'simulator.opm', folder, self.filename.upper()])
+        self.queue = []
+        self.running = {}
+
+    def submit(self, members):
+        self.members = list(members)
+        self.pending = set(self.members)
+        self.queue = list(self.members)
+        self._start()
+
+    def _start(self):
+        while self.queue and len(self.running) < self.max_parallel:
+            member = self.queue.pop(0)
+            self.running[member] = Popen(self.command(self.folder(member)), stdout=DEVNULL)
+
+    def poll(self):
+        for member, proc in list(self.running.items()):
+            if proc.poll() is not None:
+                del self.running[member]
+                if member in self.pending and read_done_marker(self.folder(member)) is None:
+                    # the task ended without writing the marker
+                    write_done_marker(self.folder(member), False)
+        self._start()
+        return super().poll()
+
+    def cancel(self):
+        self.queue = []
+        for proc in self.running.values():
+            proc.kill()
+            proc.wait()
+        self.running = {}
+
+
+def get_backend(name, sim, max_parallel=1):
+    """
+    Make the batch-scheduler backend given by the HPC keyword.
+
+    Parameters
+    ----------
+    name : bool or str
+        True or 'slurm' for SLURM, 'local' for the local stand-in.
+    sim : object
+        Forward simulator.
+    max_parallel : int, optional
+        Maximum number of tasks running at the same time (local stand-in only).
+
+    Returns
+    -------
+    backend : BatchBackend
+    """
+    if name is True or str(name).lower() in ('slurm', 'yes', 'true'):
+        return SlurmBackend(sim)
+    if str(name).lower() == 'local':
+        return LocalBackend(sim, max_parallel=max_parallel)
+    raise ValueError(f'Unknown hpc backend: {name}')
@@ -3,10 +3,12 @@
 import numpy as np
 import sys
 import os
-from copy import deepcopy
+from copy import deepcopy, copy
+from functools import partial
 from mako.lookup import TemplateLookup
 from mako.runtime import Context
 from multiprocessing import Process
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 import datetime as dt
 from scipy import interpolate
 from subprocess import call, DEVNULL
@@ -20,6 +22,115 @@ from glob import glob
 from misc.system_tools.environ_var import EclipseRunEnvironment
 from pipt.misc_tools.analysis_tools import store_ensemble_sim_information
 
+# Compiled mako templates of this process: (path, module directory) -> (modification time, template)
+_template_cache = {}
+
+
+def _get_template(name, module_directory=None):
+    """
+    Get a compiled mako template from the current folder. The template is compiled once per process, and again only if
+    the file has been modified. With a module directory, the compiled template is also stored as a Python module that
+    the other processes (e.g., the workers of a parallel forecast) can import instead of compiling the template.
+
+    Parameters
+    ----------
+    name : str
+        File name of the template.
+    module_directory : str, optional
+        Folder for the compiled template modules.
+
+    Returns
+    -------
+    tmpl : mako.template.Template
+        The compiled template.
+    """
+    path = os.path.join(os.getcwd(), name)
+    mtime = os.stat(path).st_mtime_ns
+    key = (path, module_directory)
+    if key not in _template_cache or _template_cache[key][0] != mtime:
+        lkup = TemplateLookup(directories=os.getcwd(), input_encoding='utf-8',
+                              module_directory=None if module_directory is None else os.path.abspath(module_directory))
+        _template_cache[key] = (mtime, lkup.get_template(name))
+    return _template_cache[key][1]
+
+
+def _import_file(folder, filename, **arrays):
+    """
+    Write arrays to a binary file in the run folder, which the simulator reads with the IMPORT keyword, and return the
+    name of the file. This is available in the templates as import_file, such that large fields need not be rendered
+    as text, e.g.,
+
+        IMPORT
+        '${import_file('PERM.IMPORT', PERMX=permx, PERMY=permy)}' /
+
+    Parameters
+    ----------
+    folder : str
+        Run folder of the ensemble member.
+    filename : str
+        Name of the file, relative to the run folder.
+    **arrays : numpy.ndarray
+        Values of each keyword (see misc.ecl.write_keywords).
+
+    Returns
+    -------
+    filename : str
+        Name of the file, as it is referred to in the data file.
+    """
+    ecl.write_keywords(os.path.join(folder, filename), arrays)
+    return filename
+
+
+def _extract_member(sim, member, requests):
+    """
+    Read the responses of one ensemble member from its run folder (see eclipse.extract_ensemble). The responses are
+    read with a copy of the simulator, such that several members can be read at the same time.
+
+    Parameters
+    ----------
+    sim : eclipse
+        Forward simulator.
+    member : int
+        Index of the ensemble member.
+    requests : list of tuple
+        Requests as for get_sim_results_many.
+
+    Returns
+    -------
+    blocks : list of numpy.ndarray
+        Response for each request, or None if it could not be read.
+    """
+    worker = _reader_copy(sim)
+    results = worker.get_sim_results_many(requests, member)
+    return [None if isinstance(el, Exception) else np.atleast_1d(el) for el in results]
+
+
+def _reader_copy(sim):
+    """
+    Shallow copy of a simulator that reads results independently of the original, i.e., without its stored cases.
+    """
+    worker = copy(sim)
+    worker.__dict__.pop('ecl_case', None)
+    worker.__dict__.pop('rft_case', None)
+    # the run information is not stored, since the members are not read in order
+    worker.input_dict = {key: val for key, val in sim.input_dict.items() if key != 'save_elapsed'}
+    worker.upscale = None
+    return worker
+
+
+# Simulator of an extraction worker process (see _init_extract_worker)
+_extract_sim = None
+
+
+def _init_extract_worker(sim, persist_catalog):
+    global _extract_sim
+    _extract_sim = sim
+    ecl.persist_catalog = persist_catalog
+
+
+def _extract_member_worker(member, requests):
+    return _extract_member(_extract_sim, member, requests)
+
 
 class eclipse:
     """
@@ -129,6 +240,16 @@ class eclipse:
         if 'sim_limit' in self.input_dict:
             self.options['sim_limit'] = self.input_dict['sim_limit']
 
+        # Optional folder for the compiled mako templates, which are then shared by all the processes running
+        # simulations. Without it, each process compiles the templates once.
+        self.mako_module_dir = self.input_dict.get('mako_module_dir')
+        if self.mako_module_dir == 'no':
+            self.mako_module_dir = None
+
+        # Store the index of the binary output files in a file next to them, such that they are not indexed again when
+        # the results are read by another process
+        self.ecl_index = self.input_dict.get('ecl_index', 'no') == 'yes'
+
         if 'reportdates' in self.input_dict:
             self.reportdates = [
                 x * 30 for x in range(1, int(self.input_dict['reportdates'][1]))]
@@ -347,18 +468,294 @@ class eclipse:
                       dt.datetime.now().strftime("%m-%d-%Y_%H-%M-%S"))
 
     def extract_data(self, member):
-        # get the formated data
-        for prim_ind in self.l_prim:
-            # Loop over all keys in pred_data (all data types)
-            for key in self.all_data_types:
-                if self.pred_data[prim_ind][key] is not None:  # Obs. data at assim. step
-                    true_data_info = [self.true_prim[0], self.true_prim[1][prim_ind]]
-                    try:
-                        data_array = self.get_sim_results(key, true_data_info, member)
-                        self.pred_data[prim_ind][key] = data_array
-                    except:
+        ecl.persist_catalog = getattr(self, 'ecl_index', False)
+        # The results are read from new cases, since stored cases may be from an earlier run of this member
+        self.__dict__.pop('ecl_case', None)
+        self.__dict__.pop('rft_case', None)
+
+        # get the formated data for all keys in pred_data (all data types), reading each output file once
+        slots = [(prim_ind, key) for prim_ind in self.l_prim for key in self.all_data_types
+                 if self.pred_data[prim_ind][key] is not None]  # Obs. data at assim. step
+        requests = [(key, [self.true_prim[0], self.true_prim[1][prim_ind]]) for prim_ind, key in slots]
+        results = self.get_sim_results_many(requests, member)
+        for (prim_ind, key), data_array in zip(slots, results):
+            if isinstance(data_array, Exception):
+                print(f'Failed to extract {key} at {prim_ind} for member {member}')
+            else:
+                self.pred_data[prim_ind][key] = data_array
+
+    def extract_ensemble(self, members, keys=None, max_workers=None, pool='thread'):
+        """
+        Read the results of many ensemble members from their run folders (En_<member>), e.g., when post-processing
+        saved runs. The members are read in parallel, and each worker returns the responses of one member, which are
+        copied into the ensemble prediction.
+
+        Parameters
+        ----------
+        members : list of int
+            Index of the ensemble members.
+        keys : list of str, optional
+            Data types to read. Default is all the data types of the simulator.
+        max_workers : int, optional
+            Number of members read at the same time. Default is the default of concurrent.futures.
+        pool : str, optional
+            'thread' to read in threads of this process, or 'process' to read in separate processes, which is faster
+            when many small records must be decoded. Default is 'thread'.
+
+        Returns
+        -------
+        pred_data : list of dict
+            Prediction of the ensemble, with one dictionary for each assimilation step. The responses of the members
+            are stored along the second axis, in the order of members. The responses of a member that could not be
+            read are NaN.
+
+        Examples
+        --------
+        >>> sim.extract_ensemble(range(100), ['WOPR PRO1', 'FOPT'], pool='process')
+        """
+        members = list(members)
+        keys = self.all_data_types if keys is None else keys
+        # the steps with observed data, as in extract_data
+        template = getattr(self, 'pred_data', None)
+        slots = [(prim_ind, key) for prim_ind in self.l_prim for key in keys
+                 if template is None or template[prim_ind].get(key) is not None]
+        requests = [(key, [self.true_prim[0], self.true_prim[1][prim_ind]]) for prim_ind, key in slots]
+
+        persist_catalog = getattr(self, 'ecl_index', False)
+        ecl.persist_catalog = persist_catalog
+        if pool == 'process':
+            executor = ProcessPoolExecutor(max_workers=max_workers, initializer=_init_extract_worker,
+                                           initargs=(_reader_copy(self), persist_catalog))
+            submit = lambda member: executor.submit(_extract_member_worker, member, requests)
+        else:
+            executor = ThreadPoolExecutor(max_workers=max_workers)
+            submit = lambda member: executor.submit(_extract_member, self, member, requests)
+
+        pred_data = [dict.fromkeys(keys) for _ in range(max(self.l_prim, default=-1) + 1)]
+        with executor:
+            futures = [submit(member) for member in members]
+            for column, (member, future) in enumerate(zip(members, futures)):
+                for (prim_ind, key), block in zip(slots, future.result()):
+                    if block is None:
                         print(f'Failed to extract {key} at {prim_ind} for member {member}')
-                        pass
+                        continue
+                    if pred_data[prim_ind][key] is None:
+                        pred_data[prim_ind][key] = np.full(block.shape[:1] + (len(members),) + block.shape[1:],
+                                                           np.nan, dtype=np.result_type(block.dtype, np.float32))
+                    try:
+                        pred_data[prim_ind][key][:, column] = block
+                    except ValueError:
+                        print(f'Failed to extract {key} at {prim_ind} for member {member}: shape {block.shape}')
+        return pred_data
+
+    def get_sim_results_many(self, requests, member=None):
+        """
+        Read many responses from the simulator output at once. The requests are grouped by the file they are read
+        from (summary, restart step, RFT or INIT), and each file is read once for all the requests in its group.
+
+        Parameters
+        ----------
+        requests : list of tuple
+            Pairs of response and assimilation step information, i.e., the whichResponse and ext_data_info arguments
+            of get_sim_results.
+
+        member : int, optional
+            Ensemble member that is finished.
+
+        Returns
+        -------
+        results : list
+            Response for each request, as from get_sim_results, or the exception raised if it could not be read.
+        """
+        unread = object()
+        results = [unread] * len(requests)
+
+        # group the requests by the file they are read from
+        groups = {}
+        if member is not None:
+            try:
+                case = self._get_ecl_case(member)
+                for i, (whichResponse, ext_data_info) in enumerate(requests):
+                    whichResponse = whichResponse.strip()
+                    time = self._report_time(ext_data_info, case.by_date)
+                    if self._is_summary(whichResponse):
+                        groups.setdefault(('summary',), []).append((i, whichResponse, time))
+                    elif len(whichResponse.split(' ')) == 2:  # rft
+                        groups.setdefault(('rft',), []).append((i, whichResponse, time))
+                    elif whichResponse.upper() in self._static_props:
+                        groups.setdefault(('init',), []).append((i, whichResponse, time))
+                    else:
+                        groups.setdefault(('restart', time), []).append((i, whichResponse, time))
+            except Exception:
+                groups = {}
+
+        for group, items in groups.items():
+            try:
+                if group[0] == 'summary':
+                    keys = sorted(set(el[1] for el in items))
+                    times = list(dict.fromkeys(el[2] for el in items))
+                    values = case.summary_values(keys, times)
+                    for i, whichResponse, time in items:
+                        results[i] = values[keys.index(whichResponse)][times.index(time)]
+                elif group[0] == 'rft':
+                    rft_case = self._get_rft_case(member)
+                    props = [(el[1].split(' ')[1], el[1].split(' ')[0][4:], self._rft_time(el[2])) for el in items]
+                    depths = [(well, 'DEPTH', time) for well, _, time in props]
+                    data = rft_case.rft_data_many(props + depths)
+                    for j, (i, whichResponse, time) in enumerate(items):
+                        results[i] = self._rft_response(props[j][0], data[j], data[len(items) + j])
+                elif group[0] == 'init':
+                    props = list(dict.fromkeys(el[1] for el in items))
+                    data = case.cell_data_many(props)
+                    for i, whichResponse, time in items:
+                        # assume that time is the index
+                        results[i] = np.array([data[props.index(whichResponse)].flatten()[time]])
+                else:
+                    props = list(dict.fromkeys(el[1] for el in items))
+                    data = case.cell_data_many(props, group[1])
+                    for i, whichResponse, time in items:
+                        results[i] = data[props.index(whichResponse)].flatten()
+            except Exception:
+                # the requests are read one by one below
+                for i, _, _ in items:
+                    results[i] = unread
+
+        # the requests that were not read in a group are read one by one
+        for i, (whichResponse, ext_data_info) in enumerate(requests):
+            if results[i] is unread:
+                try:
+                    results[i] = self.get_sim_results(whichResponse, ext_data_info, member)
+                except Exception as err:
+                    results[i] = err
+
+        if groups:
+            try:
+                self._store_run_info(member, self._report_time(requests[0][1], case.by_date))
+            except Exception:
+                print(f'Failed to store run information for member {member}')
+
+        return results
+
+    # Static properties that are read from the INIT file, with the report point as cell index
+    _static_props = ['PERMX', 'PERMY', 'PERMZ', 'PORO', 'NTG', 'SATNUM', 'MULTNUM', 'OPERNUM']
+
+    @staticmethod
+    def _is_summary(whichResponse):
+        """
+        Check if a response is read from the summary file (see get_sim_results).
+        """
+        whichResponse = whichResponse.strip()
+        if len(whichResponse.split(' ')) == 2:
+            return 'rft_' not in whichResponse
+        return whichResponse.upper() in ['FOPT', 'FWPT', 'FGPT', 'FWIT', 'FGIT']
+
+    def _get_ecl_case(self, member):
+        """
+        Get the case of an ensemble member. The case is stored to speed up reading several responses.
+        """
+        if hasattr(self, 'ecl_case'):
+            # En_XX/YYYY.DATA is the folder setup
+            rt_mem = int(self.ecl_case.root.split('/')[0].split('_')[1])
+            if rt_mem != member:  # wrong case
+                self.ecl_case = ecl.EclipseCase('En_' + str(member) + os.sep + self.file + '.DATA')
+        else:
+            self.ecl_case = ecl.EclipseCase('En_' + str(member) + os.sep + self.file + '.DATA')
+        return self.ecl_case
+
+    def _get_rft_case(self, member):
+        """
+        Get the RFT case of an ensemble member. The case is stored to speed up when performing the prediction step.
+        """
+        slack = int(self.input_dict.get('date_slack', 0))
+        if hasattr(self, 'rft_case'):
+            rt_mem = int(self.rft_case.root.split('/')[0].split('_')[1])
+            if rt_mem != member:
+                self.rft_case = ecl.EclipseRFT('En_' + str(member) + os.sep + self.file, slack)
+        else:
+            self.rft_case = ecl.EclipseRFT('En_' + str(member) + os.sep + self.file, slack)
+        return self.rft_case
+
+    @staticmethod
+    def _rft_time(time):
+        """
+        Date of the RFT for a report time, or None (the first RFT of the well) if the report type is not days, since
+        the RFT file does not store report indices.
+        """
+        return time if isinstance(time, dt.datetime) else None
+
+    @staticmethod
+    def _rft_response(well, rft_prop, rft_depth):
+        """
+        Get the RFT response of a well. rft_data are collected for open connections. This may vary throughout the
+        simulation, hence we must also collect the depth for the rft_data to check if all data is present. To check
+        this we import the referance depth if this is available. If not we assume that the data is ok.
+        """
+        try:
+            ref_depth_f = np.load(well.upper() + '_rft_ref_depth.npz')
+            ref_depth = ref_depth_f[ref_depth_f.files[0]]
+            yFlow = np.array([])
+            interp = interpolate.interp1d(rft_depth, rft_prop, kind='linear', bounds_error=False,
+                                          fill_value=(rft_prop[0], rft_prop[-1]))
+            for d in ref_depth:
+                yFlow = np.append(yFlow, interp(d))
+        except:
+            yFlow = rft_prop
+        return yFlow
+
+    def _store_run_info(self, member, time):
+        """
+        Store information about the run of an ensemble member, after its data have been read.
+
+        Parameters
+        ----------
+        member : int
+            Index of the ensemble member.
+        time : datetime.datetime or int
+            Time of the report step that was read.
+        """
+        # store the run time. NB: elapsed must be defined in .DATA file for this to work
+        if 'save_elapsed' in self.input_dict and len(self.run_time) <= member:
+            self.run_time.extend(self.ecl_case.summary_data('ELAPSED', time))
+
+        # If we have performed coarsening, we store the number of active grid-cells
+        if self.upscale is not None:
+            # Get this number from INIT file
+            with ecl.EclipseFile('En_' + str(member) + os.sep + self.file, 'INIT') as case:
+                intHead = case.get('INTEHEAD')
+            # The active cell is element 12 of this vector, index 11 in python indexing...
+            active_cells = intHead[11]
+            if len(self.num_act) <= member:
+                self.num_act.extend([active_cells])
+
+    def _report_time(self, ext_data_info, dates):
+        """
+        Get the time of a report step as used by the ecl package.
+
+        Parameters
+        ----------
+        ext_data_info : tuple
+            Report type and point, e.g., ('days', 100) or ('index', 2).
+        dates : dict
+            Report dates of the case (ecl.EclipseCase.by_date).
+
+        Returns
+        -------
+        time : datetime.datetime or int
+            Date of the report step if the report type is days, else the report point itself.
+        """
+        if ext_data_info[0] == 'days':
+            time = dt.datetime(self.startDate['year'], self.startDate['month'], self.startDate['day']) + \
+                dt.timedelta(days=ext_data_info[1])
+            if time not in dates and 'date_slack' in self.input_dict:
+                slack = int(self.input_dict['date_slack'])
+                if slack > 0:
+                    v = [el for el in dates if np.abs(
+                        (el-time).total_seconds()) < slack]
+                    if len(v) > 0:
+                        time = v[0]
+        else:
+            time = ext_data_info[1]
+        return time
 
     def coarsen(self, folder, ensembleMember=None):
         """
@@ -778,23 +1175,24 @@ class eclipse:
         if hasattr(self, 'coarse'):
             state['coarse'] = self.coarse
 
-        # Look for the mako file
-        lkup = TemplateLookup(directories=os.getcwd(),
-                              input_encoding='utf-8')
-
-        # Get template
+        # Get template (compiled once per process, see _get_template)
         # If we need the E300 run, define a E300 data file with _E300 added to the end.
+        module_dir = getattr(self, 'mako_module_dir', None)
         if hasattr(self, 'E300'):
             if self.E300:
-                tmpl = lkup.get_template('%s.mako' % (self.file + '_E300'))
+                tmpl = _get_template('%s.mako' % (self.file + '_E300'), module_dir)
             else:
-                tmpl = lkup.get_template('%s.mako' % self.file)
+                tmpl = _get_template('%s.mako' % self.file, module_dir)
         else:
-            tmpl = lkup.get_template('%s.mako' % self.file)
+            tmpl = _get_template('%s.mako' % self.file, module_dir)
+
+        # templates may write large arrays as binary files for the IMPORT keyword, instead of rendering them as text
+        data = {'import_file': partial(_import_file, folder)}
+        data.update(state)
 
         # use a context and render onto a file
         with open('{0}{1}'.format(folder + self.file, '.DATA'), 'w') as f:
-            ctx = Context(f, **state)
+            ctx = Context(f, **data)
             tmpl.render_context(ctx)
 
     def get_sim_results(self, whichResponse, ext_data_info=None, member=None):
@@ -833,59 +1231,23 @@ class eclipse:
         # if ensemble DA method
         if member is not None:
             # Get results
-            if hasattr(self, 'ecl_case'):
-                # En_XX/YYYY.DATA is the folder setup
-                rt_mem = int(self.ecl_case.root.split('/')[0].split('_')[1])
-                if rt_mem != member:  # wrong case
-                    self.ecl_case = ecl.EclipseCase('En_' + str(member) + os.sep + self.file + '.DATA')
-            else:
-                self.ecl_case = ecl.EclipseCase('En_' + str(member) + os.sep + self.file + '.DATA')
-            if ext_data_info[0] == 'days':
-                time = dt.datetime(self.startDate['year'], self.startDate['month'], self.startDate['day']) + \
-                    dt.timedelta(days=ext_data_info[1])
-                dates = self.ecl_case.by_date
-                if time not in dates and 'date_slack' in self.input_dict:
-                    slack = int(self.input_dict['date_slack'])
-                    if slack > 0:
-                        v = [el for el in dates if np.abs(
-                            (el-time).total_seconds()) < slack]
-                        if len(v) > 0:
-                            time = v[0]
-            else:
-                time = ext_data_info[1]
+            self._get_ecl_case(member)
+            time = self._report_time(ext_data_info, self.ecl_case.by_date)
 
             # Check if the data is a field or well data, by checking if the well is defined
             if len(whichResponse.split(' ')) == 2:
                 # if rft, search for rft_
                 if 'rft_' in whichResponse:
                     # to speed up when performing the prediction step
-                    if hasattr(self, 'rft_case'):
-                        rt_mem = int(self.rft_case.root.split('/')[0].split('_')[1])
-                        if rt_mem != member:
-                            self.rft_case = ecl.EclipseRFT('En_' + str(member) + os.sep + self.file)
-                    else:
-                        self.rft_case = ecl.EclipseRFT(
-                            'En_' + str(member) + os.sep + self.file)
+                    self._get_rft_case(member)
                     # Get the data. Due to formating we can slice the property.
                     rft_prop = self.rft_case.rft_data(well=whichResponse.split(
-                        ' ')[1], prop=whichResponse.split(' ')[0][4:])
+                        ' ')[1], prop=whichResponse.split(' ')[0][4:], when=self._rft_time(time))
                     # rft_data are collected for open connections. This may vary throughout the simulation, hence we
                     # must also collect the depth for the rft_data to check if all data is present
                     rft_depth = self.rft_case.rft_data(
-                        well=whichResponse.split(' ')[1], prop='DEPTH')
-                    # to check this we import the referance depth if this is available. If not we assume that the data
-                    # is ok.
-                    try:
-                        ref_depth_f = np.load(whichResponse.split(
-                            ' ')[1].upper() + '_rft_ref_depth.npz')
-                        ref_depth = ref_depth_f[ref_depth_f.files[0]]
-                        yFlow = np.array([])
-                        interp = interpolate.interp1d(rft_depth, rft_prop, kind='linear', bounds_error=False,
-                                                      fill_value=(rft_prop[0], rft_prop[-1]))
-                        for d in ref_depth:
-                            yFlow = np.append(yFlow, interp(d))
-                    except:
-                        yFlow = rft_prop
+                        well=whichResponse.split(' ')[1], prop='DEPTH', when=self._rft_time(time))
+                    yFlow = self._rft_response(whichResponse.split(' ')[1], rft_prop, rft_depth)
                 else:
                     # If well, read the rsm file
                     if ext_data_info is not None:  # Get the data at a specific well and time
@@ -894,27 +1256,14 @@ class eclipse:
                 if whichResponse.upper() in ['FOPT', 'FWPT', 'FGPT', 'FWIT', 'FGIT']:
                     if ext_data_info is not None:
                         yFlow = self.ecl_case.summary_data(whichResponse, time)
-                elif whichResponse.upper() in ['PERMX', 'PERMY', 'PERMZ', 'PORO', 'NTG', 'SATNUM',
-                                               'MULTNUM', 'OPERNUM']:
+                elif whichResponse.upper() in self._static_props:
                     yFlow = np.array([self.ecl_case.cell_data(whichResponse).flatten()[time]]) # assume that time is the index
                 else:
                     yFlow = self.ecl_case.cell_data(whichResponse, time).flatten()
                     if yFlow is None:
                         yFlow = self.ecl_case.cell_data(whichResponse).flatten()
 
-            # store the run time. NB: elapsed must be defined in .DATA file for this to work
-            if 'save_elapsed' in self.input_dict and len(self.run_time) <= member:
-                self.run_time.extend(self.ecl_case.summary_data('ELAPSED', time))
-
-            # If we have performed coarsening, we store the number of active grid-cells
-            if self.upscale is not None:
-                # Get this number from INIT file
-                with ecl.EclipseFile('En_' + str(member) + os.sep + self.file, 'INIT') as case:
-                    intHead = case.get('INTEHEAD')
-                # The active cell is element 12 of this vector, index 11 in python indexing...
-                active_cells = intHead[11]
-                if len(self.num_act) <= member:
-                    self.num_act.extend([active_cells])
+            self._store_run_info(member, time)
 
         else:
             case = ecl.EclipseCase(self.file + '.DATA')
@@ -928,25 +1277,15 @@ class eclipse:
             if len(whichResponse.split(' ')) == 2:
                 # if rft, search for rft_
                 if 'rft_' in whichResponse:
-                    rft_case = ecl.EclipseRFT(self.file)
+                    rft_case = ecl.EclipseRFT(self.file, int(self.input_dict.get('date_slack', 0)))
                     # Get the data. Due to formating we can slice the property.
                     rft_prop = rft_case.rft_data(well=whichResponse.split(
-                        ' ')[1], prop=whichResponse.split(' ')[0][4:])
+                        ' ')[1], prop=whichResponse.split(' ')[0][4:], when=self._rft_time(time))
                     # rft_data are collected for open connections. This may vary throughout the simulation, hence we
                     # must also collect the depth for the rft_data to check if all data is present
                     rft_depth = rft_case.rft_data(
-                        well=whichResponse.split(' ')[1], prop='DEPTH')
-                    try:
-                        ref_depth_f = np.load(whichResponse.split(
-                            ' ')[1].upper() + '_rft_ref_depth.npz')
-                        ref_depth = ref_depth_f[ref_depth_f.files[0]]
-                        yFlow = np.array([])
-                        interp = interpolate.interp1d(rft_depth, rft_prop, kind='linear', bounds_error=False,
-                                                      fill_value=(rft_prop[0], rft_prop[-1]))
-                        for d in ref_depth:
-                            yFlow = np.append(yFlow, interp(d))
-                    except:
-                        yFlow = rft_prop
+                        well=whichResponse.split(' ')[1], prop='DEPTH', when=self._rft_time(time))
+                    yFlow = self._rft_response(whichResponse.split(' ')[1], rft_prop, rft_depth)
                 else:
                     # If well, read the rsm file
                     if ext_data_info is not None:  # Get the data at a specific well and time
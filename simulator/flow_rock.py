@@ -114,40 +114,40 @@ class flow_sim2seis(flow):
                         dt.timedelta(days=assim_time)
                     pem_input = {}
                     # get active porosity
-                    tmp = self.ecl_case.cell_data('PORO')
+                    tmp = self.ecl_case.cell_data('PORO', active_only=True)
                     if 'compaction' in self.pem_input:
-                        multfactor = self.ecl_case.cell_data('PORV_RC', time)
+                        multfactor = self.ecl_case.cell_data('PORV_RC', time, active_only=True)
 
                         pem_input['PORO'] = np.array(
-                            multfactor[~tmp.mask]*tmp[~tmp.mask], dtype=float)
+                            multfactor*tmp, dtype=float)
                     else:
-                        pem_input['PORO'] = np.array(tmp[~tmp.mask], dtype=float)
+                        pem_input['PORO'] = np.array(tmp, dtype=float)
                     # get active NTG if needed
                     if 'ntg' in self.pem_input:
                         if self.pem_input['ntg'] == 'no':
                             pem_input['NTG'] = None
                         else:
-                            tmp = self.ecl_case.cell_data('NTG')
-                            pem_input['NTG'] = np.array(tmp[~tmp.mask], dtype=float)
+                            tmp = self.ecl_case.cell_data('NTG', active_only=True)
+                            pem_input['NTG'] = np.array(tmp, dtype=float)
                     else:
-                        tmp = self.ecl_case.cell_data('NTG')
-                        pem_input['NTG'] = np.array(tmp[~tmp.mask], dtype=float)
+                        tmp = self.ecl_case.cell_data('NTG', active_only=True)
+                        pem_input['NTG'] = np.array(tmp, dtype=float)
 
                     for var in ['SWAT', 'SGAS', 'PRESSURE', 'RS']:
-                        tmp = self.ecl_case.cell_data(var, time)
+                        tmp = self.ecl_case.cell_data(var, time, active_only=True)
                         # only active, and conv. to float
-                        pem_input[var] = np.array(tmp[~tmp.mask], dtype=float)
+                        pem_input[var] = np.array(tmp, dtype=float)
 
                     if 'press_conv' in self.pem_input:
                         pem_input['PRESSURE'] = pem_input['PRESSURE'] * \
                             self.pem_input['press_conv']
 
-                    tmp = self.ecl_case.cell_data('PRESSURE', 1)
+                    tmp = self.ecl_case.cell_data('PRESSURE', 1, active_only=True)
                     if hasattr(self.pem, 'p_init'):
-                        P_init = self.pem.p_init*np.ones(tmp.shape)[~tmp.mask]
+                        P_init = self.pem.p_init*np.ones(tmp.shape)
                     else:
                         # initial pressure is first
-                        P_init = np.array(tmp[~tmp.mask], dtype=float)
+                        P_init = np.array(tmp, dtype=float)
 
                     if 'press_conv' in self.pem_input:
                         P_init = P_init*self.pem_input['press_conv']
@@ -288,44 +288,44 @@ class flow_rock(flow):
                         dt.timedelta(days=assim_time)
                     pem_input = {}
                     # get active porosity
-                    tmp = self.ecl_case.cell_data('PORO')
+                    tmp = self.ecl_case.cell_data('PORO', active_only=True)
                     if 'compaction' in self.pem_input:
-                        multfactor = self.ecl_case.cell_data('PORV_RC', time)
+                        multfactor = self.ecl_case.cell_data('PORV_RC', time, active_only=True)
 
                         pem_input['PORO'] = np.array(
-                            multfactor[~tmp.mask]*tmp[~tmp.mask], dtype=float)
+                            multfactor*tmp, dtype=float)
                     else:
-                        pem_input['PORO'] = np.array(tmp[~tmp.mask], dtype=float)
+                        pem_input['PORO'] = np.array(tmp, dtype=float)
                     # get active NTG if needed
                     if 'ntg' in self.pem_input:
                         if self.pem_input['ntg'] == 'no':
                             pem_input['NTG'] = None
                         else:
-                            tmp = self.ecl_case.cell_data('NTG')
-                            pem_input['NTG'] = np.array(tmp[~tmp.mask], dtype=float)
+                            tmp = self.ecl_case.cell_data('NTG', active_only=True)
+                            pem_input['NTG'] = np.array(tmp, dtype=float)
                     else:
-                        tmp = self.ecl_case.cell_data('NTG')
-                        pem_input['NTG'] = np.array(tmp[~tmp.mask], dtype=float)
+                        tmp = self.ecl_case.cell_data('NTG', active_only=True)
+                        pem_input['NTG'] = np.array(tmp, dtype=float)
 
                     pem_input['RS'] = None
                     for var in ['SWAT', 'SGAS', 'PRESSURE', 'RS']:
                         try:
-                            tmp = self.ecl_case.cell_data(var, time)
+                            tmp = self.ecl_case.cell_data(var, time, active_only=True)
                         except:
                             pass
                         # only active, and conv. to float
-                        pem_input[var] = np.array(tmp[~tmp.mask], dtype=float)
+                        pem_input[var] = np.array(tmp, dtype=float)
 
                     if 'press_conv' in self.pem_input:
                         pem_input['PRESSURE'] = pem_input['PRESSURE'] * \
                             self.pem_input['press_conv']
 
-                    tmp = self.ecl_case.cell_data('PRESSURE', 1)
+                    tmp = self.ecl_case.cell_data('PRESSURE', 1, active_only=True)
                     if hasattr(self.pem, 'p_init'):
-                        P_init = self.pem.p_init*np.ones(tmp.shape)[~tmp.mask]
+                        P_init = self.pem.p_init*np.ones(tmp.shape)
                     else:
                         # initial pressure is first
-                        P_init = np.array(tmp[~tmp.mask], dtype=float)
+                        P_init = np.array(tmp, dtype=float)
 
                     if 'press_conv' in self.pem_input:
                         P_init = P_init*self.pem_input['press_conv']
@@ -338,7 +338,7 @@ class flow_rock(flow):
                                         ensembleMember=self.ensemble_member)
                     # mask the bulkimp to get proper dimensions
                     tmp_value = np.zeros(self.ecl_case.init.shape)
-                    tmp_value[self.ecl_case.init.actnum] = self.pem.bulkimp
+                    tmp_value.ravel()[self.ecl_case.active_index()] = self.pem.bulkimp
                     self.pem.bulkimp = np.ma.array(data=tmp_value, dtype=float,
                                                    mask=deepcopy(self.ecl_case.init.mask))
                     # run filter
@@ -350,24 +350,24 @@ class flow_rock(flow):
                                         self.startDate['day']) + dt.timedelta(days=self.pem.baseline)
                 # pem_input = {}
                 # get active porosity
-                tmp = self.ecl_case.cell_data('PORO')
+                tmp = self.ecl_case.cell_data('PORO', active_only=True)
 
                 if 'compaction' in self.pem_input:
-                    multfactor = self.ecl_case.cell_data('PORV_RC', base_time)
+                    multfactor = self.ecl_case.cell_data('PORV_RC', base_time, active_only=True)
 
                     pem_input['PORO'] = np.array(
-                        multfactor[~tmp.mask] * tmp[~tmp.mask], dtype=float)
+                        multfactor * tmp, dtype=float)
                 else:
-                    pem_input['PORO'] = np.array(tmp[~tmp.mask], dtype=float)
+                    pem_input['PORO'] = np.array(tmp, dtype=float)
 
                 pem_input['RS'] = None
                 for var in ['SWAT', 'SGAS', 'PRESSURE', 'RS']:
                     try:
-                        tmp = self.ecl_case.cell_data(var, base_time)
+                        tmp = self.ecl_case.cell_data(var, base_time, active_only=True)
                     except:
                         pass
                     # only active, and conv. to float
-                    pem_input[var] = np.array(tmp[~tmp.mask], dtype=float)
+                    pem_input[var] = np.array(tmp, dtype=float)
 
                 if 'press_conv' in self.pem_input:
                     pem_input['PRESSURE'] = pem_input['PRESSURE'] * \
@@ -383,7 +383,7 @@ class flow_rock(flow):
                 # mask the bulkimp to get proper dimensions
                 tmp_value = np.zeros(self.ecl_case.init.shape)
 
-                tmp_value[self.ecl_case.init.actnum] = self.pem.bulkimp
+                tmp_value.ravel()[self.ecl_case.active_index()] = self.pem.bulkimp
                 # kill if values are inf or nan
                 assert not np.isnan(tmp_value).any()
                 assert not np.isinf(tmp_value).any()
@@ -514,44 +514,44 @@ class flow_barycenter(flow):
                         dt.timedelta(days=assim_time)
                     pem_input = {}
                     # get active porosity
-                    tmp = self.ecl_case.cell_data('PORO')
+                    tmp = self.ecl_case.cell_data('PORO', active_only=True)
                     if 'compaction' in self.pem_input:
-                        multfactor = self.ecl_case.cell_data('PORV_RC', time)
+                        multfactor = self.ecl_case.cell_data('PORV_RC', time, active_only=True)
 
                         pem_input['PORO'] = np.array(
-                            multfactor[~tmp.mask]*tmp[~tmp.mask], dtype=float)
+                            multfactor*tmp, dtype=float)
                     else:
-                        pem_input['PORO'] = np.array(tmp[~tmp.mask], dtype=float)
+                        pem_input['PORO'] = np.array(tmp, dtype=float)
                     # get active NTG if needed
                     if 'ntg' in self.pem_input:
                         if self.pem_input['ntg'] == 'no':
                             pem_input['NTG'] = None
                         else:
-                            tmp = self.ecl_case.cell_data('NTG')
-                            pem_input['NTG'] = np.array(tmp[~tmp.mask], dtype=float)
+                            tmp = self.ecl_case.cell_data('NTG', active_only=True)
+                            pem_input['NTG'] = np.array(tmp, dtype=float)
                     else:
-                        tmp = self.ecl_case.cell_data('NTG')
-                        pem_input['NTG'] = np.array(tmp[~tmp.mask], dtype=float)
+                        tmp = self.ecl_case.cell_data('NTG', active_only=True)
+                        pem_input['NTG'] = np.array(tmp, dtype=float)
 
                     pem_input['RS'] = None
                     for var in ['SWAT', 'SGAS', 'PRESSURE', 'RS']:
                         try:
-                            tmp = self.ecl_case.cell_data(var, time)
+                            tmp = self.ecl_case.cell_data(var, time, active_only=True)
                         except:
                             pass
                         # only active, and conv. to float
-                        pem_input[var] = np.array(tmp[~tmp.mask], dtype=float)
+                        pem_input[var] = np.array(tmp, dtype=float)
 
                     if 'press_conv' in self.pem_input:
                         pem_input['PRESSURE'] = pem_input['PRESSURE'] * \
                             self.pem_input['press_conv']
 
-                    tmp = self.ecl_case.cell_data('PRESSURE', 1)
+                    tmp = self.ecl_case.cell_data('PRESSURE', 1, active_only=True)
                     if hasattr(self.pem, 'p_init'):
-                        P_init = self.pem.p_init*np.ones(tmp.shape)[~tmp.mask]
+                        P_init = self.pem.p_init*np.ones(tmp.shape)
                     else:
                         # initial pressure is first
-                        P_init = np.array(tmp[~tmp.mask], dtype=float)
+                        P_init = np.array(tmp, dtype=float)
 
                     if 'press_conv' in self.pem_input:
                         P_init = P_init*self.pem_input['press_conv']
@@ -564,7 +564,7 @@ class flow_barycenter(flow):
                                         ensembleMember=self.ensemble_member)
                     # mask the bulkimp to get proper dimensions
                     tmp_value = np.zeros(self.ecl_case.init.shape)
-                    tmp_value[self.ecl_case.init.actnum] = self.pem.bulkimp
+                    tmp_value.ravel()[self.ecl_case.active_index()] = self.pem.bulkimp
                     self.pem.bulkimp = np.ma.array(data=tmp_value, dtype=float,
                                                    mask=deepcopy(self.ecl_case.init.mask))
                     # run filter
@@ -576,24 +576,24 @@ class flow_barycenter(flow):
                                         self.startDate['day']) + dt.timedelta(days=self.pem.baseline)
                 # pem_input = {}
                 # get active porosity
-                tmp = self.ecl_case.cell_data('PORO')
+                tmp = self.ecl_case.cell_data('PORO', active_only=True)
 
                 if 'compaction' in self.pem_input:
-                    multfactor = self.ecl_case.cell_data('PORV_RC', base_time)
+                    multfactor = self.ecl_case.cell_data('PORV_RC', base_time, active_only=True)
 
                     pem_input['PORO'] = np.array(
-                        multfactor[~tmp.mask] * tmp[~tmp.mask], dtype=float)
+                        multfactor * tmp, dtype=float)
                 else:
-                    pem_input['PORO'] = np.array(tmp[~tmp.mask], dtype=float)
+                    pem_input['PORO'] = np.array(tmp, dtype=float)
 
                 pem_input['RS'] = None
                 for var in ['SWAT', 'SGAS', 'PRESSURE', 'RS']:
                     try:
-                        tmp = self.ecl_case.cell_data(var, base_time)
+                        tmp = self.ecl_case.cell_data(var, base_time, active_only=True)
                     except:
                         pass
                     # only active, and conv. to float
-                    pem_input[var] = np.array(tmp[~tmp.mask], dtype=float)
+                    pem_input[var] = np.array(tmp, dtype=float)
 
                 if 'press_conv' in self.pem_input:
                     pem_input['PRESSURE'] = pem_input['PRESSURE'] * \
@@ -609,7 +609,7 @@ class flow_barycenter(flow):
                 # mask the bulkimp to get proper dimensions
                 tmp_value = np.zeros(self.ecl_case.init.shape)
 
-                tmp_value[self.ecl_case.init.actnum] = self.pem.bulkimp
+                tmp_value.ravel()[self.ecl_case.active_index()] = self.pem.bulkimp
                 # kill if values are inf or nan
                 assert not np.isnan(tmp_value).any()
                 assert not np.isinf(tmp_value).any()
@@ -8,6 +8,7 @@ import time
 
 # Internal imports
 from simulator.eclipse import eclipse
+from simulator.batch import write_done_marker
 from misc.system_tools.environ_var import OPMRunEnvironment
 
 
@@ -95,18 +96,20 @@ class flow(eclipse):
         return finished_member
 
     @staticmethod
-    def SLURM_HPC_run(num_runs, filename=None):
+    def SLURM_HPC_run(num_runs, filename=None, array=None):
         """
         HPC run manager for SLURM.
 
-        This function will start num_runs of sim.call_sim() using job arrays in SLURM.
+        This function will start num_runs of sim.call_sim() using job arrays in SLURM. The array task ids (ensemble
+        members) can be given as a SLURM array specification, e.g., '0,3,5'; default is 0 to num_runs - 1.
         """
         filename_str = f'"{filename.upper()}"' if filename is not None else ""
+        array = array if array is not None else f'0-{num_runs - 1}'
 
         slurm_script = f"""#!/bin/bash                                                                                               
 #SBATCH --partition=comp                                                                                  
 #SBATCH --job-name=EnDA                                                                               
-#SBATCH --array=0-{num_runs - 1}                                                                            
+#SBATCH --array={array}                                                                            
 #SBATCH --time=01:00:00                                                                                   
 #SBATCH --mem=4G                                                                                          
 #SBATCH --cpus-per-task=1                                                                                 
@@ -263,4 +266,6 @@ if __name__ == "__main__":
     
     sim = flow(input_file=options,initialize_parent=False)
     success = sim.call_sim(folder=folder)
+    # Tell PET that this member is done (see simulator.batch)
+    write_done_marker(folder, success)
     #print("Success!" if success else "Failed.")
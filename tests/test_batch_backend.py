@@ -0,0 +1,44 @@
+"""Test of the local batch-scheduler backend."""
+import os
+import sys
+import time
+
+import pytest
+
+from simulator.batch import BatchBackend, LocalBackend
+
+# task that marks member 1 as failed, and crashes for member 2 before it writes the marker
+_TASK = '''
+import os, sys
+from simulator.batch import write_done_marker
+folder = sys.argv[1]
+if folder.startswith('En_2'):
+    sys.exit(1)
+write_done_marker(folder, not folder.startswith('En_1'))
+'''
+
+
+class _Sim:
+    input_dict = {'runfile': 'deck'}
+
+
+def test_local_backend(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv('PYTHONPATH', os.pathsep.join(sys.path))
+    for member in range(4):
+        os.mkdir(f'En_{member}')
+    backend = LocalBackend(_Sim(), max_parallel=2, command=lambda folder: [sys.executable, '-c', _TASK, folder])
+    backend.submit([0, 1, 2, 3])
+
+    finished = {}
+    deadline = time.time() + 60
+    while len(finished) < 4 and time.time() < deadline:
+        finished.update(backend.poll())
+        time.sleep(0.05)
+    assert finished == {0: True, 1: False, 2: False, 3: True}
+    assert backend.poll() == {} and not backend.running
+
+
+def test_abstract_backend():
+    with pytest.raises(TypeError):
+        BatchBackend(_Sim())
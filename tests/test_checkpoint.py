@@ -0,0 +1,51 @@
+"""Test of resuming an interrupted forecast from the checkpointed member results."""
+import os
+
+import numpy as np
+
+from ensemble.ensemble import Ensemble
+from simulator.simple_models import lin_1d
+
+
+class _CountLin(lin_1d):
+    """Linear model that records the members it runs."""
+
+    def run_fwd_sim(self, state, member_i, del_folder=True):
+        self.ran.append(member_i)
+        return super().run_fwd_sim(state, member_i, del_folder)
+
+
+def test_resume(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    state = np.random.default_rng(0).random((3, 5))
+    np.savez('x.npz', x=state)
+    sim = _CountLin({'reporttype': 'idx', 'reportpoint': [0, 1, 2], 'datatype': ['x']})
+    keys = {'state': 'x', 'prior_x': [['mean', 0.0], ['var', 1.0], ['grid', [3, 1]]], 'importstaticvar': 'x.npz',
+            'disable_tqdm': True, 'checkpoint': 'ckpt'}
+    ensemble = Ensemble(keys, sim)
+
+    sim.ran = []
+    ensemble.calc_prediction()
+    assert sim.ran == [0, 1, 2, 3, 4]
+    folder = os.path.join('ckpt', 'forecast')
+    files = sorted(os.listdir(folder))
+    assert len(files) == 5 and all(el.startswith(f'member_{i}_') for i, el in enumerate(files))
+
+    # an interrupted forecast, which finished all members but 1 and 3, and stale results from earlier forecasts
+    os.remove(os.path.join(folder, files[1]))
+    os.remove(os.path.join(folder, files[3]))
+    open(os.path.join(folder, 'member_1_0123456789.pkl'), 'wb').close()
+    os.makedirs(os.path.join('ckpt', 'iter_0'))
+    sim.ran = []
+    ensemble.calc_prediction()
+    assert sim.ran == [1, 3]
+    assert np.array_equal(np.concatenate([el['x'] for el in ensemble.pred_data]), state)
+    assert sorted(os.listdir('ckpt')) == ['forecast']
+    assert sorted(os.listdir(folder)) == files
+
+    # a changed state is not taken from the checkpoint
+    ensemble.state['x'][:, 2] += 1.0
+    sim.ran = []
+    ensemble.calc_prediction()
+    assert sim.ran == [2]
+    assert len(os.listdir(folder)) == 5 and files[2] not in os.listdir(folder)
@@ -0,0 +1,59 @@
+"""Test of the incremental, chunked checkpoints of misc.checkpoint."""
+import os
+import pickle
+
+import numpy as np
+
+from misc.checkpoint import save_checkpoint, load_checkpoint, remove_checkpoint
+
+
+def _chunks(filename):
+    folder = filename + '_arrays'
+    return {name: os.stat(os.path.join(folder, name)).st_mtime_ns for name in os.listdir(folder)}
+
+
+def test_round_trip(tmp_path):
+    filename = str(tmp_path / 'restart.p')
+    rng = np.random.default_rng(0)
+    obj = {'state': {'permx': rng.random((4000, 20))}, 'pred_data': [{'wopr': rng.random(100)}],
+           'iteration': 3, 'names': ['a', 'b']}
+    obj['alias'] = obj['state']['permx']
+    save_checkpoint(obj, filename, chunk_size=160000)
+
+    # the large array is in 4 chunks, the small ones in the manifest
+    chunks = _chunks(filename)
+    assert len(chunks) == 4
+    loaded = load_checkpoint(filename)
+    assert np.array_equal(loaded['state']['permx'], obj['state']['permx'])
+    assert np.array_equal(loaded['pred_data'][0]['wopr'], obj['pred_data'][0]['wopr'])
+    assert loaded['iteration'] == 3 and loaded['names'] == ['a', 'b']
+    assert loaded['alias'] is loaded['state']['permx']
+
+    # only the changed chunk is written, and the one it replaces is removed
+    obj['state']['permx'][3000, 0] += 1.0
+    save_checkpoint(obj, filename, chunk_size=160000)
+    new_chunks = _chunks(filename)
+    assert len(new_chunks) == 4 and len(set(new_chunks).difference(chunks)) == 1
+    assert all(new_chunks[name] == chunks[name] for name in set(new_chunks).intersection(chunks))
+    assert np.array_equal(load_checkpoint(filename)['state']['permx'], obj['state']['permx'])
+
+    remove_checkpoint(filename)
+    assert not os.listdir(tmp_path)
+
+
+def test_copy_on_write(tmp_path):
+    filename = str(tmp_path / 'restart.p')
+    save_checkpoint({'permx': np.arange(20000.)}, filename)
+
+    # an array in a single chunk is mapped from the file; changes to it are not written back
+    loaded = load_checkpoint(filename)
+    assert isinstance(loaded['permx'], np.memmap) and loaded['permx'].mode == 'c'
+    loaded['permx'][:] = -1.0
+    assert np.array_equal(load_checkpoint(filename)['permx'], np.arange(20000.))
+
+
+def test_plain_pickle(tmp_path):
+    filename = str(tmp_path / 'restart.p')
+    with open(filename, 'wb') as f:
+        pickle.dump({'permx': np.arange(20000.)}, f)
+    assert np.array_equal(load_checkpoint(filename)['permx'], np.arange(20000.))
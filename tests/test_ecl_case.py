@@ -0,0 +1,136 @@
+"""Test of the lookup of the report steps of an Eclipse case, from restart or summary files."""
+import builtins
+import datetime
+import os
+
+import numpy as np
+import pytest
+
+from misc import ecl
+
+SHAPE = (1, 2, 2)  # nk, nj, ni
+N_STEPS = 12
+
+
+def _intehead(when, num_active):
+    intehead = np.zeros(411, dtype=np.int32)
+    intehead[8:12] = [SHAPE[2], SHAPE[1], SHAPE[0], num_active]
+    intehead[14] = 3  # oil and water
+    intehead[64:67] = [when.day, when.month, when.year]
+    return intehead
+
+
+def _date(step):
+    return datetime.datetime(2020 + step // 12, step % 12 + 1, 1)
+
+
+def _write_init(root, porv):
+    # cell properties are stored for the active cells only
+    num_active = np.count_nonzero(porv)
+    with open(root + '.INIT', 'wb') as f:
+        ecl._write_rec(f, 'INTEHEAD', _intehead(_date(0), num_active), 'INTE')
+        ecl._write_rec(f, 'PORV', np.asarray(porv, dtype=np.float32), 'REAL')
+        ecl._write_rec(f, 'PORO', 0.1 * np.arange(1, num_active + 1, dtype=np.float32), 'REAL')
+
+
+def _write_restart(f, step, num_active):
+    ecl._write_rec(f, 'INTEHEAD', _intehead(_date(step), num_active), 'INTE')
+    ecl._write_rec(f, 'DOUBHEAD', np.zeros(200), 'DOUB')
+    ecl._write_rec(f, 'PRESSURE', 100. + step + np.arange(num_active, dtype=np.float32), 'REAL')
+
+
+def _write_case(root, restart, porv=(1., 1., 1., 1.)):
+    """Case with a well in a 2x2x1 grid, with restart output in separate or unified files, or no restart output."""
+    _write_init(root, porv)
+    num_active = np.count_nonzero(porv)
+    if restart == 'split':
+        for step in range(N_STEPS):
+            with open(f'{root}.X{step:04d}', 'wb') as f:
+                _write_restart(f, step, num_active)
+    elif restart == 'unified':
+        with open(root + '.UNRST', 'wb') as f:
+            for step in range(N_STEPS):
+                ecl._write_rec(f, 'SEQNUM', np.array([step], dtype=np.int32), 'INTE')
+                _write_restart(f, step, num_active)
+    with open(root + '.SMSPEC', 'wb') as f:
+        ecl._write_rec(f, 'KEYWORDS', np.array(['TIME', 'WOPR']), 'CHAR')
+        ecl._write_rec(f, 'WGNAMES', np.array([':+:+:+:+', 'PRO1']), 'CHAR')
+    with open(root + '.UNSMRY', 'wb') as f:
+        for step in range(1, N_STEPS):
+            days = (_date(step) - _date(0)).days
+            ecl._write_rec(f, 'SEQHDR', np.array([0], dtype=np.int32), 'INTE')
+            ecl._write_rec(f, 'MINISTEP', np.array([step], dtype=np.int32), 'INTE')
+            ecl._write_rec(f, 'PARAMS', np.array([days, 10. * step], dtype=np.float32), 'REAL')
+
+
+@pytest.fixture
+def opened(monkeypatch):
+    """Names of the files opened by the ecl module."""
+    names = []
+
+    def _open(file, *args, **kwargs):
+        names.append(os.path.basename(file))
+        return builtins.open(file, *args, **kwargs)
+
+    monkeypatch.setattr(ecl, 'open', _open, raising=False)
+    return names
+
+
+def test_split_restart(tmp_path, opened):
+    root = str(tmp_path / 'CASE')
+    _write_case(root, 'split')
+    case = ecl.EclipseCase(root)
+    assert not [el for el in opened if '.X' in el]
+
+    # a date is found by a binary search, which reads the dates of a few files only
+    assert case.cell_data('PRESSURE', _date(7)).tolist() == [[[107., 108.], [109., 110.]]]
+    dates_read = [el for el in opened if '.X' in el]
+    assert 0 < len(dates_read) <= 5
+    assert _date(7) in case.by_date and datetime.datetime(2020, 8, 2) not in case.by_date
+
+    # listing the dates reads the rest
+    assert case.report_dates() == [_date(step) for step in range(N_STEPS)]
+    assert sorted(set(el for el in opened if '.X' in el)) == [f'CASE.X{step:04d}' for step in range(N_STEPS)]
+    assert not [el for el in opened if 'SM' in el]
+
+
+def test_unified_restart(tmp_path, opened):
+    root = str(tmp_path / 'CASE')
+    _write_case(root, 'unified')
+    case = ecl.EclipseCase(root)
+    # the steps of the unified file are indexed in one scan
+    assert opened.count('CASE.UNRST') == 1
+    assert case.report_dates() == [_date(step) for step in range(N_STEPS)]
+    assert case.cell_data('PRESSURE', _date(7)).tolist() == [[[107., 108.], [109., 110.]]]
+    assert not [el for el in opened if 'SM' in el]
+
+
+def test_summary_only(tmp_path, opened):
+    root = str(tmp_path / 'CASE')
+    _write_case(root, None)
+    case = ecl.EclipseCase(root)
+    # the summary is only read when the dates are needed
+    assert opened == ['CASE.INIT']
+
+    assert case.summary_data('WOPR PRO1', _date(7)).tolist() == [70.]
+    assert case.summary_values('WOPR PRO1', [_date(3), _date(5)]).tolist() == [[30.], [50.]]
+    assert case.report_dates() == [_date(step) for step in range(1, N_STEPS)]
+    assert datetime.datetime(2020, 8, 2) not in case.by_date
+
+
+def test_active_cells(tmp_path):
+    root = str(tmp_path / 'CASE')
+    _write_case(root, 'unified', porv=(1., 0., 1., 1.))
+    case = ecl.EclipseCase(root)
+    assert case.active_index().tolist() == [0, 2, 3]
+
+    for prop, when, values in (('PORO', None, [0.1, 0.2, 0.3]), ('PRESSURE', _date(7), [107., 108., 109.])):
+        # the values of the active cells only, which are scattered into the full grid by the active index
+        active = case.cell_data(prop, when, active_only=True)
+        assert active.shape == (3,) and active == pytest.approx(values)
+        full = np.full(4, np.nan)
+        full[case.active_index()] = active
+        grid = case.cell_data(prop, when)
+        assert grid.shape == SHAPE and grid.mask.ravel().tolist() == [False, True, False, False]
+        assert np.array_equal(grid.filled(np.nan).ravel(), full, equal_nan=True)
+        assert case.cell_data_many([prop], when, active_only=True)[0] == pytest.approx(values)
@@ -0,0 +1,82 @@
+"""Test of the catalogs of the ECL files, kept in memory and in sidecar index files."""
+import collections
+import os
+
+import numpy as np
+import pytest
+
+from misc import ecl
+
+
+def _write_init(filename, poro):
+    with open(filename, 'wb') as f:
+        ecl._write_rec(f, 'PORO', np.asarray(poro, dtype=np.float32), 'REAL')
+
+
+def _read_poro(root):
+    with ecl.EclipseFile(root, 'INIT') as init:
+        return init.get('PORO').tolist()
+
+
+def _reread(root):
+    # read the file as another process would, without the catalog in memory
+    ecl._CATALOGS.clear()
+    return _read_poro(root)
+
+
+@pytest.fixture
+def builds(monkeypatch):
+    """Empty catalog cache; the names of the files that are indexed are listed."""
+    monkeypatch.setattr(ecl, '_CATALOGS', collections.OrderedDict())
+    indexed = []
+    build_cat = ecl._build_cat
+
+    def _build_cat(fileobj):
+        indexed.append(os.path.basename(fileobj.name))
+        return build_cat(fileobj)
+
+    monkeypatch.setattr(ecl, '_build_cat', _build_cat)
+    return indexed
+
+
+def test_memory_cache(tmp_path, builds):
+    root = str(tmp_path / 'CASE')
+    _write_init(root + '.INIT', [0.1, 0.2])
+    assert _read_poro(root) == _read_poro(root) == pytest.approx([0.1, 0.2])
+    assert builds == ['CASE.INIT']
+    assert not os.path.exists(root + '.INIT.idx')
+
+    # a rewritten file is indexed again
+    _write_init(root + '.INIT', [0.1, 0.2, 0.3])
+    assert _read_poro(root) == pytest.approx([0.1, 0.2, 0.3])
+    assert builds == ['CASE.INIT'] * 2
+
+
+def test_sidecar(tmp_path, builds, monkeypatch):
+    monkeypatch.setattr(ecl, 'persist_catalog', True)
+    root = str(tmp_path / 'CASE')
+    filename = root + '.INIT'
+    _write_init(filename, [0.1, 0.2])
+    assert _read_poro(root) == pytest.approx([0.1, 0.2])
+    assert builds == ['CASE.INIT'] and os.path.exists(filename + '.idx')
+
+    # another process, without the catalog in memory, reads the index file
+    assert _reread(root) == pytest.approx([0.1, 0.2])
+    assert builds == ['CASE.INIT']
+
+    # the index file is rejected, and rebuilt, if the size, modification time or inode of the file has changed
+    _write_init(filename, [0.1, 0.2, 0.3])
+    assert _reread(root) == pytest.approx([0.1, 0.2, 0.3])
+    stat = os.stat(filename)
+    os.utime(filename, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    assert _reread(root) == pytest.approx([0.1, 0.2, 0.3])
+    stat = os.stat(filename)
+    _write_init(filename + '.new', [0.4, 0.5, 0.6])
+    os.utime(filename + '.new', ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    os.replace(filename + '.new', filename)
+    assert _reread(root) == pytest.approx([0.4, 0.5, 0.6])
+    assert builds == ['CASE.INIT'] * 4
+
+    # the rebuilt index file is used again
+    assert _reread(root) == pytest.approx([0.4, 0.5, 0.6])
+    assert builds == ['CASE.INIT'] * 4
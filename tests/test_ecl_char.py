@@ -0,0 +1,25 @@
+"""Test of the decoding of character records (CHAR and C0nn) in the ECL files."""
+import numpy as np
+
+from misc import ecl
+
+
+def test_char_records(tmp_path):
+    root = str(tmp_path / 'CASE')
+    wells = ['PRO{0}'.format(i) for i in range(300)]  # more than one physical record
+    with open(root + '.SMSPEC', 'wb') as f:
+        ecl._write_rec(f, 'NAMES', np.array(['ABCDEFGHIJKL', 'xy']), 'C012')
+        ecl._write_rec(f, 'WGNAMES', np.array(wells), 'CHAR')
+        ecl._write_rec(f, 'UNITS', np.array(['SM3/DAY ', '  BARSA', '']), 'CHAR')
+
+    # the strings are stored blank-padded to their full length
+    raw = open(root + '.SMSPEC', 'rb').read()
+    assert raw[4:20] == b'NAMES   \x00\x00\x00\x02C012'
+    assert raw[24:56] == b'\x00\x00\x00\x18ABCDEFGHIJKLxy          \x00\x00\x00\x18'
+
+    with ecl.EclipseFile(root, 'SMSPEC') as spec:
+        names = spec.get('NAMES')
+        assert names.tolist() == ['ABCDEFGHIJKL', 'xy']
+        assert spec.get('WGNAMES').tolist() == wells
+        # trailing blanks are stripped, leading ones are kept
+        assert spec.get('UNITS').tolist() == ['SM3/DAY', '  BARSA', '']
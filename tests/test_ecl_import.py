@@ -0,0 +1,70 @@
+"""Test of the binary keyword files for the IMPORT keyword, and benchmark of their use in the deck templates."""
+import os
+import time
+from pathlib import Path
+
+import numpy as np
+
+from misc import ecl
+from simulator.eclipse import eclipse
+
+_TEXT = '''<%!
+import numpy as np
+%>
+GRID
+PERMX
+% for i in range(0, len(permx)):
+${"%.3f" %(np.exp(min(permx[i], 6)))}
+% endfor
+/
+'''
+
+_IMPORT = '''<%!
+import numpy as np
+%>
+GRID
+IMPORT
+'${import_file('PERMX.IMPORT', PERMX=np.exp(np.minimum(permx, 6)))}' /
+'''
+
+
+def test_write_keywords(tmp_path):
+    rng = np.random.default_rng(0)
+    permx = np.ma.array(rng.lognormal(3, 1, (4, 30, 25)), mask=rng.random((4, 30, 25)) < 0.1)
+    poro = rng.random(1000)
+    poro[3] = np.nan
+    ecl.write_keywords(str(tmp_path / 'PROPS.IMPORT'),
+                       {'PERMX': permx, 'poro': poro, 'ACTNUM': ~permx.mask, 'WELLS': np.array(['PRO1', 'INJ1'])})
+
+    with ecl.EclipseFile(str(tmp_path / 'PROPS'), 'IMPORT') as f:
+        assert f.get('PERMX').dtype == np.dtype('>f4')
+        assert np.array_equal(f.get('PERMX'), np.ma.filled(permx, 0).astype(np.float32).ravel())
+        assert f.get('PORO')[3] == 0 and np.array_equal(f.get('PORO')[4:], poro[4:].astype(np.float32))
+        assert f.get('ACTNUM').tolist() == (~permx.mask).astype(int).ravel().tolist()
+        assert f.get('WELLS').tolist() == ['PRO1', 'INJ1']
+
+    # the records hold at most 1000 items, as in the files written by Eclipse
+    size = 3000 * 4 + 3 * 8 + 1000 * 4 + 8 + 3000 * 4 + 3 * 8 + 2 * 8 + 8 + 4 * 24
+    assert os.path.getsize(tmp_path / 'PROPS.IMPORT') == size
+
+
+def test_import_template(tmp_path, monkeypatch, record_property):
+    monkeypatch.chdir(tmp_path)
+    permx = np.random.default_rng(1).normal(4, 1, 60 * 60 * 5)
+    os.makedirs('En_0')
+    for file, template in (('TEXT', _TEXT), ('BINARY', _IMPORT)):
+        Path(f'{file}.mako').write_text(template)
+        sim = eclipse({'reporttype': 'days', 'reportpoint': [1], 'datatype': ['WOPR PRO1'], 'runfile': file})
+        sim._runMako('En_0' + os.sep, {'permx': permx})  # compile the template
+        start = time.perf_counter()
+        sim._runMako('En_0' + os.sep, {'permx': permx})
+        record_property(f'time_{file.lower()}', time.perf_counter() - start)
+
+    deck = Path('En_0/BINARY.DATA').read_text()
+    with ecl.EclipseFile('En_0/PERMX', 'IMPORT') as f:
+        values = f.get('PERMX')
+    assert "IMPORT\n'PERMX.IMPORT' /" in deck
+    assert np.array_equal(values, np.exp(np.minimum(permx, 6)).astype(np.float32))
+    # the text deck has the same values, with three decimals
+    text = Path('En_0/TEXT.DATA').read_text().split('PERMX\n')[1].split('\n/')[0]
+    assert np.allclose(np.array(text.split(), dtype=float), values, atol=5e-4, rtol=1e-6)
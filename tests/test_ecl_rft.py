@@ -0,0 +1,47 @@
+"""Test of the lookup of RFT surveys by well and date."""
+import datetime
+
+import numpy as np
+
+from misc import ecl
+
+
+def _write_rft(filename, surveys):
+    with open(filename, 'wb') as f:
+        for well, date, pressure in surveys:
+            ecl._write_rec(f, 'TIME', np.array([0.], dtype=np.float32), 'REAL')
+            ecl._write_rec(f, 'DATE', np.array([date.day, date.month, date.year], dtype=np.int32), 'INTE')
+            ecl._write_rec(f, 'WELLETC', np.array(['BARSA', well, '', '', '', 'R', '', 'STANDARD']), 'CHAR')
+            ecl._write_rec(f, 'PRESSURE', np.array([pressure], dtype=np.float32), 'REAL')
+
+
+def test_rft_by_date(tmp_path):
+    first, second = datetime.datetime(2020, 1, 1), datetime.datetime(2021, 1, 1)
+    _write_rft(str(tmp_path / 'CASE.RFT'), [('PRO1', first, 200.), ('INJ1', first, 300.), ('PRO1', second, 180.)])
+    rft = ecl.EclipseRFT(str(tmp_path / 'CASE'))
+
+    assert rft.rft_dates('PRO1') == [first, second]
+    assert rft.rft_data('PRO1', 'PRESSURE', second).tolist() == [180.]
+    assert rft.rft_data('PRO1', 'PRESSURE', datetime.datetime(2021, 1, 1, 12)).tolist() == [180.]
+    # without a date, the first survey of the well is used
+    assert rft.rft_data('PRO1', 'PRESSURE').tolist() == [200.]
+    # no survey at the date, or of the well
+    assert rft.rft_data('INJ1', 'PRESSURE', second) is None
+    assert rft.rft_data('PRO2', 'PRESSURE') is None
+
+
+def test_rft_near_date(tmp_path, caplog):
+    first, second = datetime.datetime(2020, 1, 1), datetime.datetime(2020, 1, 5)
+    _write_rft(str(tmp_path / 'CASE.RFT'), [('PRO1', first, 200.), ('PRO1', second, 180.)])
+    near = datetime.datetime(2020, 1, 4, 6)
+    week = 7 * 86400
+
+    # the closest survey within the slack is used
+    for slack in (week, 86400):
+        rft = ecl.EclipseRFT(str(tmp_path / 'CASE'), date_slack=slack)
+        assert rft.rft_data('PRO1', 'PRESSURE', near).tolist() == [180.]
+
+    # a date without a survey within the slack is reported
+    rft = ecl.EclipseRFT(str(tmp_path / 'CASE'), date_slack=3600)
+    assert rft.rft_data('PRO1', 'PRESSURE', near) is None
+    assert 'No RFT of well PRO1 at 2020-01-04 06:00:00' in caplog.text
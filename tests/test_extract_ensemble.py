@@ -0,0 +1,116 @@
+"""Benchmark of the parallel extraction of results from the run folders of an ensemble, on synthetic ECL files."""
+import os
+import struct
+import time
+
+import numpy as np
+
+from simulator.eclipse import eclipse
+
+N_CELLS = 20 * 20 * 10
+N_STEPS = 12
+
+
+def _record(f, kwd, arr, typ):
+    # Fortran-formatted, big-endian record as written by Eclipse
+    arr = np.asarray(arr)
+    if typ == 'CHAR':
+        data = np.array([str(el).ljust(8) for el in arr], dtype='S8').tobytes()
+    else:
+        data = arr.astype({'INTE': '>i4', 'REAL': '>f4', 'DOUB': '>f8'}[typ]).tobytes()
+    f.write(struct.pack('>i8si4si', 16, kwd.ljust(8).encode(), len(arr), typ.encode(), 16))
+    for start in range(0, len(data), 4000):
+        block = data[start:start + 4000]
+        f.write(struct.pack('>i', len(block)) + block + struct.pack('>i', len(block)))
+
+
+def _intehead(year, month, day):
+    intehead = np.zeros(411, dtype=int)
+    intehead[8:12] = [20, 20, 10, N_CELLS]
+    intehead[14] = 3  # oil and water
+    intehead[64:67] = [day, month, year]
+    return intehead
+
+
+def _write_member(folder, member):
+    """Unified output files of a run with one well, the values of which depend on the member."""
+    os.makedirs(folder)
+    root = os.path.join(folder, 'CASE')
+    with open(root + '.INIT', 'wb') as f:
+        _record(f, 'INTEHEAD', _intehead(2020, 1, 1), 'INTE')
+        _record(f, 'PORV', np.ones(N_CELLS), 'REAL')
+        _record(f, 'PERMX', member + np.arange(N_CELLS), 'REAL')
+    with open(root + '.SMSPEC', 'wb') as f:
+        _record(f, 'KEYWORDS', ['TIME', 'WOPR', 'FOPT'], 'CHAR')
+        _record(f, 'WGNAMES', [':+:+:+:+', 'PRO1', ':+:+:+:+'], 'CHAR')
+    with open(root + '.UNRST', 'wb') as f:
+        for step in range(N_STEPS + 1):
+            _record(f, 'SEQNUM', [step], 'INTE')
+            _record(f, 'INTEHEAD', _intehead(2020 + step // 12, step % 12 + 1, 1), 'INTE')
+            _record(f, 'DOUBHEAD', np.zeros(200), 'DOUB')
+            _record(f, 'PRESSURE', 100. * member + step + np.arange(N_CELLS), 'REAL')
+            _record(f, 'SWAT', np.full(N_CELLS, 0.01 * step), 'REAL')
+    with open(root + '.UNSMRY', 'wb') as f:
+        for step in range(1, N_STEPS + 1):
+            _record(f, 'SEQHDR', [0], 'INTE')
+            _record(f, 'MINISTEP', [step], 'INTE')
+            _record(f, 'PARAMS', [step, member + step, 10. * member + step], 'REAL')
+
+
+def _simulator(keys):
+    sim = eclipse.__new__(eclipse)
+    sim.file = 'CASE'
+    sim.input_dict = {}
+    sim.upscale = None
+    sim.run_time = []
+    sim.all_data_types = keys
+    sim.l_prim = list(range(N_STEPS))
+    sim.true_prim = ['index', list(range(1, N_STEPS + 1))]
+    sim.pred_data = [{key: np.zeros((1, 1)) for key in keys} for _ in sim.l_prim]
+    return sim
+
+
+def _extract_sequential(sim, members):
+    # the extraction before extract_ensemble: one member after the other in the main process
+    columns = []
+    for member in members:
+        sim.extract_data(member)
+        columns.append([{key: np.atleast_1d(val) for key, val in el.items()} for el in sim.pred_data])
+    return [{key: np.stack([col[ind][key] for col in columns], axis=1) for key in sim.all_data_types}
+            for ind in sim.l_prim]
+
+
+def test_extract_ensemble(tmp_path, monkeypatch, record_property):
+    monkeypatch.chdir(tmp_path)
+    members = list(range(16))
+    for member in members:
+        _write_member(f'En_{member}', member)
+    keys = ['WOPR PRO1', 'FOPT', 'PRESSURE', 'SWAT']
+
+    start = time.perf_counter()
+    sim = _simulator(keys)
+    sequential = _extract_sequential(sim, members)
+    record_property('time_sequential', time.perf_counter() - start)
+
+    for pool in ('thread', 'process'):
+        start = time.perf_counter()
+        pred_data = _simulator(keys).extract_ensemble(members, pool=pool, max_workers=4)
+        record_property(f'time_{pool}_pool', time.perf_counter() - start)
+
+        for ind, el in enumerate(sequential):
+            for key in keys:
+                assert np.array_equal(pred_data[ind][key], el[key]), (pool, ind, key)
+
+    assert pred_data[2]['WOPR PRO1'][0, 5] == 5 + 3
+    assert pred_data[0]['PRESSURE'].shape == (N_CELLS, len(members))
+    # the responses are copied out of the files, in the byte order of the machine
+    assert all(el[key].dtype.isnative for el in sim.pred_data for key in ('PRESSURE', 'SWAT'))
+
+
+def test_extract_ensemble_missing_member(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    _write_member('En_0', 0)
+    pred_data = _simulator(['FOPT']).extract_ensemble([0, 1])
+
+    assert pred_data[0]['FOPT'][0, 0] == 1
+    assert np.isnan(pred_data[0]['FOPT'][0, 1])
@@ -0,0 +1,81 @@
+"""Test of the cache of forward-run results."""
+import os
+import time
+from pathlib import Path
+
+import numpy as np
+
+from ensemble.fwd_cache import FwdRunCache
+
+
+class _Sim:
+    """Stand-in for a simulator with a run file template."""
+
+    def __init__(self, level=0):
+        self.file = 'DECK'
+        self.input_dict = {'runfile': 'DECK', 'reportpoint': [0, 1]}
+        self.true_prim = ['days', [0, 1]]
+        self.level = level
+        self.redund_sim = None
+
+
+def _key(sim, value=1.0):
+    return FwdRunCache.member_key({'permx': np.full(10, value)}, None, FwdRunCache.sim_signature(sim))
+
+
+def test_hit_and_miss(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    cache = FwdRunCache('cache')
+    sim = _Sim()
+    pred = [{'wopr': np.arange(3.)}]
+
+    assert cache.get(_key(sim)) is None
+    cache.put(_key(sim), pred)
+    assert np.array_equal(cache.get(_key(sim))[0]['wopr'], pred[0]['wopr'])
+    assert cache.get(_key(sim, 2.0)) is None
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_invalidation(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    os.makedirs('INCLUDE')
+    Path('DECK.mako').write_text("GRID\nINCLUDE\n-- grid geometry\n  '../INCLUDE/GRID.INC' /\n")
+    Path('INCLUDE/GRID.INC').write_text("INCLUDE\n'../INCLUDE/PROPS.INC' /\n")
+    Path('INCLUDE/PROPS.INC').write_text('PORO\n100*0.2 /\n')
+    sim = _Sim()
+    key = _key(sim)
+    assert _key(sim) == key
+
+    # the set-up of the simulator
+    assert _key(_Sim(level=1)) != key
+    other = _Sim()
+    other.true_prim = ['days', [0, 2]]
+    assert _key(other) != key
+    other = _Sim()
+    other.redund_sim = _Sim(level=1)
+    assert _key(other) != key
+
+    # the template, and the files it includes, also through other included files
+    keys = {key}
+    for path, text in (('INCLUDE/PROPS.INC', 'PORO\n100*0.25 /\n'), ('INCLUDE/GRID.INC', '-- no props\n'),
+                       ('DECK.mako', 'GRID\n')):
+        Path(path).write_text(text)
+        keys.add(_key(sim))
+    assert len(keys) == 4
+
+
+def test_lru_eviction(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    cache = FwdRunCache('cache', max_entries=2)
+    sim = _Sim()
+    keys = [_key(sim, value) for value in range(3)]
+    for i, key in enumerate(keys[:2]):
+        cache.put(key, [{'wopr': np.full(3, i)}])
+        os.utime(cache._path(key), (time.time() - 100 + i, time.time() - 100 + i))
+
+    # reading the oldest entry makes it the most recently used, such that the other one is evicted
+    assert cache.get(keys[0]) is not None
+    cache.put(keys[2], [{'wopr': np.full(3, 2)}])
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[0]) is not None and cache.get(keys[2]) is not None
+    assert len(os.listdir('cache')) == 2
@@ -0,0 +1,124 @@
+"""Regression test and benchmark of the vectorized decoding of GRDECL sections."""
+import mmap
+import time
+
+import numpy as np
+
+from misc import grdecl
+
+
+def _read_array_tokens(mem, bgn, end, dims, typ):
+    # the decoding before vectorization: one token at a time, with the blanks found byte by byte
+    total = int(np.prod(dims))
+    data = np.empty((total,), dtype=typ)
+    ofs = 0
+    cur = bgn
+    while cur < end:
+        while cur < end and mem[cur] in b' \n':
+            cur += 1
+        fst = cur
+        while cur < end and mem[cur] not in b' \n':
+            cur += 1
+        if fst < cur:
+            asterisk = mem.find(b'*', fst, cur)
+            if asterisk == -1:
+                count, value = 1, typ(mem[fst:cur])
+            else:
+                count, value = int(mem[fst:asterisk]), typ(mem[asterisk + 1:cur])
+            data[ofs:ofs + count] = value
+            ofs += count
+    data[ofs:total] = 0
+    return np.reshape(data, dims)
+
+
+def _section(values, typ, rng):
+    """Text of a section in the styles seen in GRDECL files: repeat counts, varying line lengths and formats."""
+    tokens = []
+    i = 0
+    while i < len(values):
+        run = 1
+        while i + run < len(values) and values[i + run] == values[i]:
+            run += 1
+        if typ is np.int32:
+            text = str(int(values[i]))
+        else:
+            text = rng.choice(['%.6e', '%g', '%r', '%.17g']) % float(values[i])
+        tokens.append(text if run == 1 else f'{run}*{text}')
+        i += run
+    lines = []
+    pos = 0
+    while pos < len(tokens):
+        step = int(rng.integers(1, 8))
+        lines.append(' ' * int(rng.integers(0, 3)) + '  '.join(tokens[pos:pos + step]))
+        pos += step
+    return '\n'.join(lines) + '\n'
+
+
+def _mapped(tmp_path, text):
+    path = tmp_path / 'section.grdecl'
+    path.write_bytes(text.encode())
+    with open(path, 'rb') as f:
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def _assert_identical(new, ref):
+    assert new.dtype == ref.dtype and new.shape == ref.shape
+    assert new.tobytes() == ref.tobytes()
+
+
+def test_decode_identical(tmp_path):
+    rng = np.random.default_rng(0)
+    dims = (4, 30, 50)
+    total = int(np.prod(dims))
+    poro = rng.normal(0.2, 0.05, total)
+    poro[rng.random(total) < 0.3] = 0.0
+    poro[100:400] = 0.25
+    actnum = (rng.random(total) < 0.8).astype(np.int32)
+    actnum[:1000] = 1
+
+    cases = [
+        (poro, np.float64, dims),
+        (actnum, np.int32, dims),
+        (np.arange(total, dtype=np.float64) * 1e-300, np.float64, dims),
+        (poro[:total - 1234], np.float64, dims),  # trailing zeros are not written
+        (np.array([], dtype=np.float64), np.float64, dims),
+    ]
+    for values, typ, shape in cases:
+        text = _section(values, typ, rng)
+        mem = _mapped(tmp_path, text)
+        try:
+            _assert_identical(grdecl._read_array(mem, 0, len(mem), shape, typ),
+                              _read_array_tokens(mem, 0, len(mem), shape, typ))
+            # only parts of the file belong to the section
+            _assert_identical(grdecl._read_array(mem, 3, len(mem) - 2, shape, typ),
+                              _read_array_tokens(mem, 3, len(mem) - 2, shape, typ))
+        finally:
+            mem.close()
+
+
+def test_decode_comments():
+    raw = b'-- porosity\n 2*0.1 0.3 -- first layer\n0.4 3*1\r\n--\n5'
+    values = grdecl._decode(raw, np.float64)
+    assert values.tolist() == [0.1, 0.1, 0.3, 0.4, 1.0, 1.0, 1.0, 5.0]
+
+
+def test_decode_benchmark(tmp_path, record_property):
+    rng = np.random.default_rng(1)
+    dims = (10, 100, 100)
+    values = np.round(rng.lognormal(3, 1, int(np.prod(dims))), 3)
+    values[::7] = 0.0
+    mem = _mapped(tmp_path, _section(values, np.float64, rng))
+    try:
+        start = time.perf_counter()
+        ref = _read_array_tokens(mem, 0, len(mem), dims, np.float64)
+        time_tokens = time.perf_counter() - start
+
+        start = time.perf_counter()
+        new = grdecl._read_array(mem, 0, len(mem), dims, np.float64)
+        time_vectorized = time.perf_counter() - start
+    finally:
+        mem.close()
+
+    _assert_identical(new, ref)
+    record_property('time_tokens', time_tokens)
+    record_property('time_vectorized', time_vectorized)
@@ -0,0 +1,60 @@
+"""Test of the parallel, chunked decoding of the sections of a GRDECL file exported by Petrel."""
+import numpy as np
+
+from misc import grdecl
+
+
+def _keyword(f, name):
+    f.write(('%-8s                               -- Generated : Petrel\r\n' % name).encode())
+
+
+def _values(f, values, fmt):
+    for i in range(0, len(values), 6):
+        f.write((' '.join(fmt % v for v in values[i:i + 6]) + '\r\n').encode())
+    f.write(b'/\r\n\r\n')
+
+
+def _write_petrel(folder, ni, nj, nk, rng):
+    """Grid file in the format of Petrel, with one of the properties in an included file."""
+    n = ni * nj * nk
+    with open(folder / 'GRID.grdecl', 'wb') as f:
+        f.write(b'-- Generated [\r\n'
+                b'-- Exported by : Petrel 2019.1 Schlumberger\r\n'
+                b'-- Generated ]\r\n\r\n')
+        _keyword(f, 'SPECGRID')
+        f.write(('%d %d %d 1 F /\r\n\r\n' % (ni, nj, nk)).encode())
+        _keyword(f, 'COORD')
+        _values(f, [v for j in range(nj + 1) for i in range(ni + 1) for v in (i, j, 1000, i, j, 1100)], '%.2f')
+        _keyword(f, 'ZCORN')
+        _values(f, np.repeat(1000 + 2.5 * np.arange(2 * nk), 4 * ni * nj) + rng.random(8 * n), '%.4f')
+        _keyword(f, 'ACTNUM')
+        f.write(('%d*0 %d*1 /\r\n\r\n' % (ni * nj, n - ni * nj)).encode())
+        for name in ('PORO', 'PERMX', 'FACIES'):
+            _keyword(f, name)
+            values = rng.integers(0, 4, n) if name == 'FACIES' else np.round(rng.lognormal(0, 1, n), 5)
+            _values(f, values, '%g')
+        f.write(b"INCLUDE                                -- Generated : Petrel\r\n'PERMY.inc' /\r\n\r\n")
+    with open(folder / 'PERMY.inc', 'wb') as f:
+        # the trailing zeros are not written
+        _keyword(f, 'PERMY')
+        _values(f, np.round(rng.random(n - 7), 3), '%g')
+
+
+def test_parallel_sections(tmp_path, monkeypatch):
+    _write_petrel(tmp_path, 12, 10, 8, np.random.default_rng(0))
+    filename = str(tmp_path / 'GRID.grdecl')
+    serial = grdecl.read(filename, max_workers=1)
+
+    # decode small chunks on a pool, even if there is little data
+    monkeypatch.setattr(grdecl, 'CHUNK_SIZE', 2000)
+    monkeypatch.setattr(grdecl, 'PARALLEL_SIZE', 0)
+    parallel = grdecl.read(filename, max_workers=2)
+
+    assert list(parallel) == ['DIMENS', 'COORD', 'ACTNUM', 'ZCORN', 'PORO', 'PERMX', 'FACIES', 'PERMY']
+    for key, value in serial.items():
+        assert type(parallel[key]) is type(value)
+        assert np.ma.getdata(parallel[key]).dtype == np.ma.getdata(value).dtype
+        assert np.ma.getdata(parallel[key]).tobytes() == np.ma.getdata(value).tobytes(), key
+        assert np.array_equal(np.ma.getmaskarray(parallel[key]), np.ma.getmaskarray(value))
+    assert parallel['PERMY'].data.ravel()[-7:].tolist() == [0.0] * 7
+    assert parallel['PORO'].mask.sum() == 12 * 10
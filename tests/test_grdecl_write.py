@@ -0,0 +1,103 @@
+"""Regression test and benchmark of the vectorized writing of compressed GRDECL sections."""
+import io
+import time
+
+import numpy as np
+
+from misc import grdecl
+
+
+def _stretches_loop(data):
+    changes = np.concatenate(([0], np.where(np.not_equal(data[0:-1], data[1:]))[0] + 1))
+    length = np.diff(np.concatenate((changes, [len(data)])))
+    for row, count in enumerate(length):
+        yield count, data[changes[row]]
+
+
+def _write_loop(f_obj, data, fmt):
+    # the writing before vectorization: one formatted value, and one write, for each stretch
+    single_fmt = '{{0:{0:s}}}\n'.format(fmt)
+    multi_fmt = '{{0:d}}*{{1:{0:s}}}\n'.format(fmt)
+    single_null = '0\n' if fmt[-1] == 'd' else '0.\n'
+    multi_null = '{0:d}*0\n' if fmt[-1] == 'd' else '{0:d}*0.\n'
+    for count, value in _stretches_loop(data):
+        if value:
+            text = single_fmt.format(value) if count == 1 else multi_fmt.format(count, value)
+        else:
+            text = single_null if count == 1 else multi_null.format(count)
+        f_obj.write(text.encode())
+
+
+def _write_compressed_loop(keyw, cube, fmt):
+    f_obj = io.BytesIO()
+    f_obj.write('{0:8s}\n'.format(keyw.upper()).encode())
+    if hasattr(cube, 'mask'):
+        data, mask = np.ravel(cube.data), np.ravel(np.ma.getmaskarray(cube))
+        accum = 0
+        for count_subset, is_blank in _stretches_loop(mask):
+            if is_blank:
+                f_obj.write(b'NaN\n' if count_subset == 1 else b'%d*NaN\n' % count_subset)
+            else:
+                _write_loop(f_obj, data[accum:accum + count_subset], fmt)
+            accum += count_subset
+    else:
+        _write_loop(f_obj, np.ravel(cube), fmt)
+    f_obj.write(b'/\n')
+    return f_obj.getvalue()
+
+
+def _write_compressed(keyw, cube, fmt):
+    f_obj = io.BytesIO()
+    grdecl.write_compressed(f_obj, keyw, cube, fmt=fmt)
+    return f_obj.getvalue()
+
+
+def test_write_identical():
+    rng = np.random.default_rng(0)
+    n = 20000
+    poro = rng.normal(0.2, 0.05, n)
+    poro[rng.random(n) < 0.3] = 0.0
+    poro[100:400] = 0.25
+    poro[500] = -0.0
+    spread = rng.choice([-1, 1], n) * rng.random(n) * 10.0 ** rng.integers(-300, 300, n)
+    spread[:8] = [np.nan, np.inf, -np.inf, 1e-310, 9.9999999, 9.9999995, 0.125, 2.5]
+    facies = rng.integers(-3, 4, n).repeat(3)[:n]
+    mask = rng.random(n) < 0.2
+    mask[1000:3000] = True
+
+    cases = [
+        (poro, '12.6e'), (poro, '.3e'), (poro, 'e'), (poro, '.0E'), (poro, '10.4f'),
+        (spread, '12.6e'), (spread, '.1e'), (spread, '.9e'), (spread, 'g'),
+        (poro.astype(np.float32), '12.6e'),
+        (facies, 'd'), (facies, '5d'), (facies.astype(np.uint8) + 200, 'd'), (facies, '.2e'),
+        (np.array([0.0, 0.0, 1.5, 1.5]), '12.6e'), (np.array([7.0]), '12.6e'), (np.array([0]), 'd'),
+        (np.ma.array(poro, mask=mask), '12.6e'),
+        (np.ma.array(poro.reshape(4, 50, 100), mask=mask.reshape(4, 50, 100)), '.3e'),
+        (np.ma.array(facies, mask=mask), 'd'),
+        (np.ma.array(facies, mask=np.ones(n, dtype=bool)), 'd'),
+    ]
+    for cube, fmt in cases:
+        new = _write_compressed('poro', cube, fmt)
+        assert new == _write_compressed_loop('poro', cube, fmt), (cube.dtype, fmt)
+
+    # without any masked values, the mask may be a single flag
+    assert _write_compressed('poro', np.ma.array(poro), '12.6e') == _write_compressed_loop('poro', poro, '12.6e')
+
+
+def test_write_benchmark(record_property):
+    rng = np.random.default_rng(1)
+    perm = np.round(rng.lognormal(3, 1, 200000), 3)
+    perm[rng.random(len(perm)) < 0.2] = 0.0
+    cube = np.ma.array(perm, mask=rng.random(len(perm)) < 0.1)
+
+    start = time.perf_counter()
+    ref = _write_compressed_loop('PERMX', cube, '12.6e')
+    time_loop = time.perf_counter() - start
+
+    start = time.perf_counter()
+    new = _write_compressed('PERMX', cube, '12.6e')
+    time_vectorized = time.perf_counter() - start
+
+    assert new == ref
+    record_property('time_loop', time_loop)
+    record_property('time_vectorized', time_vectorized)
@@ -0,0 +1,70 @@
+"""Test and benchmark of the binary cache of misc.grid.read_grid."""
+import os
+import time
+
+import numpy as np
+
+from misc.grid import read_grid, _save_cache, _load_cache
+
+
+def _write_grid(folder, ni, nj, nk, poro):
+    """Corner-point grid with the porosity in an included file."""
+    coord = np.array([[i, j, 0, i, j, 10] for j in range(nj + 1) for i in range(ni + 1)], dtype=float)
+    zcorn = np.repeat(np.arange(nk * 2, dtype=float), ni * nj * 4)
+    with open(folder / 'GRID.grdecl', 'w') as f:
+        f.write('SPECGRID\n%d %d %d 1 F /\n\n' % (ni, nj, nk))
+        f.write('COORD\n' + '\n'.join(' '.join(map(str, row)) for row in coord) + '\n/\n\n')
+        f.write('ZCORN\n' + '\n'.join(map(str, zcorn)) + '\n/\n\n')
+        f.write('ACTNUM\n%d*0 %d*1 /\n\n' % (ni, ni * nj * nk - ni))
+        f.write("INCLUDE\n'props/PORO.inc' /\n")
+    os.makedirs(folder / 'props', exist_ok=True)
+    with open(folder / 'props' / 'PORO.inc', 'w') as f:
+        f.write('PORO\n' + '\n'.join(map(str, poro)) + '\n/\n')
+
+
+def _assert_same(grid, other):
+    assert list(grid) == list(other)
+    for key in grid:
+        assert np.array_equal(np.ma.getdata(grid[key]), np.ma.getdata(other[key]))
+        assert np.array_equal(np.ma.getmaskarray(grid[key]), np.ma.getmaskarray(other[key]))
+
+
+def test_grid_cache(tmp_path, record_property):
+    ni, nj, nk = 20, 20, 10
+    rng = np.random.default_rng(0)
+    _write_grid(tmp_path, ni, nj, nk, np.round(rng.random(ni * nj * nk), 4))
+    filename = str(tmp_path / 'GRID.grdecl')
+    cache_dir = str(tmp_path / 'cache')
+
+    start = time.perf_counter()
+    grid = read_grid(filename)
+    time_parse = time.perf_counter() - start
+
+    _assert_same(read_grid(filename, cache_dir), grid)  # stores the cache
+    start = time.perf_counter()
+    cached = read_grid(filename, cache_dir)
+    time_cache = time.perf_counter() - start
+    _assert_same(cached, grid)
+    assert isinstance(cached['ZCORN'], np.memmap)
+    record_property('time_parse', time_parse)
+    record_property('time_cache', time_cache)
+
+    # changes in memory are not written back to the cache
+    cached['ZCORN'][...] = -1
+    assert read_grid(filename, cache_dir)['ZCORN'].min() == 0
+
+    # a change in an included file gives a new cache, which replaces the old one
+    _write_grid(tmp_path, ni, nj, nk, np.full(ni * nj * nk, 0.3))
+    changed = read_grid(filename, cache_dir)
+    assert np.all(changed['PORO'].compressed() == 0.3)
+    assert len(os.listdir(cache_dir)) == 1
+
+
+def test_cache_types(tmp_path):
+    # the dimensions of an .egrid file are a tuple, which is restored as such
+    grid = {'DIMENS': (4, 3, 2), 'ZCORN': np.arange(192.), 'ACTNUM': np.ones(24, dtype=bool)}
+    cache = str(tmp_path / 'GRID.EGRID-0.0')
+    _save_cache(cache, grid)
+    cached = _load_cache(cache)
+    assert cached['DIMENS'] == (4, 3, 2) and all(type(el) is int for el in cached['DIMENS'])
+    assert np.array_equal(cached['ZCORN'], grid['ZCORN']) and cached['ACTNUM'].dtype == bool
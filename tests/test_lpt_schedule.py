@@ -0,0 +1,55 @@
+"""Test and benchmark of the longest-expected-first ordering of parallel forward runs."""
+import time
+
+import numpy as np
+
+from ensemble.ensemble import Ensemble, _makespan
+from simulator.simple_models import lin_1d
+
+
+class _SleepLin(lin_1d):
+    """Linear model whose run time is given by the state (synthetic run time)."""
+
+    def run_fwd_sim(self, state, member_i, del_folder=True):
+        time.sleep(float(state['runtime'][0]))
+        return super().run_fwd_sim(state, member_i, del_folder)
+
+
+def _forecast_time(ensemble):
+    start = time.perf_counter()
+    ensemble.calc_prediction()
+    return time.perf_counter() - start
+
+
+def test_makespan():
+    run_times = [1, 1, 1, 1, 1, 1, 6]
+    assert _makespan(run_times, 3) == 8
+    assert _makespan(sorted(run_times, reverse=True), 3) == 6
+
+
+def test_lpt_benchmark(tmp_path, monkeypatch, record_property):
+    monkeypatch.chdir(tmp_path)
+    # six short members and one long at the end, which is the worst case for the index order
+    np.savez('runtime.npz', runtime=np.array([[0.1] * 6 + [0.6]]))
+    sim = _SleepLin({'reporttype': 'idx', 'reportpoint': [0], 'datatype': ['runtime'], 'parallel': 3})
+    keys = {'state': 'runtime', 'prior_runtime': [['mean', 0.0], ['var', 1.0], ['grid', [1, 1]]],
+            'importstaticvar': 'runtime.npz', 'disable_tqdm': True, 'schedule': 'lpt'}
+    ensemble = Ensemble(keys, sim)
+    try:
+        _forecast_time(ensemble)  # start the pool and record the run time history
+        expected = ensemble._expected_run_times(list(range(7)))
+        order = ensemble._lpt_order(list(range(7)), None, 3)
+
+        ensemble.schedule['order'] = 'index'
+        time_index = _forecast_time(ensemble)
+        ensemble.schedule['order'] = 'lpt'
+        time_lpt = _forecast_time(ensemble)
+    finally:
+        ensemble.close_pool()
+
+    # the long member is dispatched first, which brings the makespan from 0.8 s to 0.6 s
+    assert order[0] == 6 and sorted(order) == list(range(7))
+    assert np.isclose(_makespan(expected, 3), 0.8, atol=0.05)
+    assert np.isclose(_makespan(expected[order], 3), 0.6, atol=0.05)
+    record_property('forecast_time_index', time_index)
+    record_property('forecast_time_lpt', time_lpt)
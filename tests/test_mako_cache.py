@@ -0,0 +1,93 @@
+"""Test of the per-member rendering of the deck templates with the template cache."""
+import os
+import shutil
+import time
+from pathlib import Path
+
+import numpy as np
+from mako.lookup import TemplateLookup
+from mako.runtime import Context
+
+from simulator import eclipse as eclipse_module
+from simulator.eclipse import eclipse
+
+TUTORIALS = Path(__file__).resolve().parents[1] / 'docs' / 'tutorials'
+
+
+def _render_uncached(file, folder, state):
+    # the rendering before the template cache: a new lookup, and compilation, for every member
+    lkup = TemplateLookup(directories=os.getcwd(), input_encoding='utf-8')
+    tmpl = lkup.get_template('%s.mako' % file)
+    with open('{0}{1}'.format(folder + file, '.DATA'), 'w') as f:
+        tmpl.render_context(Context(f, **state))
+
+
+def _make_sim(file, **kwargs):
+    return eclipse({'reporttype': 'days', 'reportpoint': [1], 'datatype': ['WOPR PRO1'], 'runfile': file, **kwargs})
+
+
+def _check_render(template, file, states, **kwargs):
+    shutil.copy(template, f'{file}.mako')
+    sim = _make_sim(file, **kwargs)
+    for member, state in enumerate(states):
+        folder = f'En_{member}' + os.sep
+        os.makedirs(folder)
+        _render_uncached(file, folder, state)
+        uncached = Path(f'{folder}{file}.DATA').read_text()
+        sim._runMako(folder, dict(state))
+        assert Path(f'{folder}{file}.DATA').read_text() == uncached
+
+
+def test_render_3well(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    states = [{'injbhp': [300. + i, 310.], 'prodbhp': [150. - i]} for i in range(20)]
+    _check_render(TUTORIALS / 'popt' / '3WELL.mako', '3WELL', states)
+    # the compiled templates are only stored if asked for
+    assert not os.path.exists('mako_modules')
+
+
+def test_render_runfile(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    rng = np.random.default_rng(0)
+    states = [{'permx': rng.normal(4, 1, 60 * 60 * 5)} for _ in range(3)]
+    _check_render(TUTORIALS / 'pipt' / 'RUNFILE.mako', 'RUNFILE', states, mako_module_dir='mako_modules')
+    assert any(name.startswith('RUNFILE') for name in os.listdir('mako_modules'))
+
+
+def test_render_benchmark(tmp_path, monkeypatch, record_property):
+    monkeypatch.chdir(tmp_path)
+    shutil.copy(TUTORIALS / 'popt' / '3WELL.mako', '3WELL.mako')
+    sim = _make_sim('3WELL')
+    states = [{'injbhp': [300. + i, 310.], 'prodbhp': [150. - i]} for i in range(50)]
+    for member in range(len(states)):
+        os.makedirs(f'En_{member}')
+
+    start = time.perf_counter()
+    for member, state in enumerate(states):
+        _render_uncached('3WELL', f'En_{member}' + os.sep, state)
+    time_uncached = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for member, state in enumerate(states):
+        sim._runMako(f'En_{member}' + os.sep, dict(state))
+    time_cached = time.perf_counter() - start
+
+    record_property('members', len(states))
+    record_property('time_uncached', time_uncached)
+    record_property('time_cached', time_cached)
+
+
+def test_template_cache(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    Path('DECK.mako').write_text('WCONPROD\n${rate} /\n')
+    tmpl = eclipse_module._get_template('DECK.mako')
+    assert eclipse_module._get_template('DECK.mako') is tmpl
+
+    # a modified template is compiled again
+    Path('DECK.mako').write_text('WCONINJE\n${rate} /\n')
+    mtime = os.stat('DECK.mako').st_mtime_ns
+    os.utime('DECK.mako', ns=(mtime + 10 ** 9, mtime + 10 ** 9))
+    new_tmpl = eclipse_module._get_template('DECK.mako')
+    assert new_tmpl is not tmpl
+    assert new_tmpl.render(rate=100) == 'WCONINJE\n100 /\n'
+    assert eclipse_module._get_template('DECK.mako') is new_tmpl
@@ -0,0 +1,37 @@
+"""Test that the persistent pool of forward-run workers is shut down when the assimilation loop fails."""
+import numpy as np
+import psutil
+import pytest
+
+from ensemble.ensemble import Ensemble
+from pipt.loop.assimilation import Assimilate
+from simulator.simple_models import lin_1d
+
+
+class _FailingEnsemble(Ensemble):
+    """Ensemble whose forecast fails after the forward runs, e.g., in the extraction of the results."""
+
+    def calc_prediction(self, *args, **kwargs):
+        super().calc_prediction(*args, **kwargs)
+        self.workers = [proc.pid for proc in self._pool._processes.values()]
+        raise RuntimeError('forecast failed')
+
+
+def test_pool_closed_on_error(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    np.savez('x.npz', x=np.random.default_rng(0).random((3, 4)))
+    sim = lin_1d({'reporttype': 'idx', 'reportpoint': [0], 'datatype': ['x'], 'parallel': 2})
+    keys = {'state': 'x', 'prior_x': [['mean', 0.0], ['var', 1.0], ['grid', [3, 1]]], 'importstaticvar': 'x.npz',
+            'disable_tqdm': True}
+    ensemble = _FailingEnsemble(keys, sim)
+    ensemble.restart = False
+    ensemble.iteration = 0
+    ensemble.keys_da = {'assimindex': [[0]], 'obsname': 'idx', 'truedataindex': [0]}
+
+    with pytest.raises(RuntimeError, match='forecast failed'):
+        Assimilate(ensemble).run()
+
+    assert ensemble._pool is None
+    assert len(ensemble.workers) == 2
+    assert not any(psutil.pid_exists(pid) and psutil.Process(pid).status() != psutil.STATUS_ZOMBIE
+                   for pid in ensemble.workers)
@@ -0,0 +1,33 @@
+"""Test of the ensemble prediction assembled as the forward runs of the members finish."""
+import numpy as np
+
+from ensemble.ensemble import Ensemble
+from simulator.simple_models import lin_1d
+
+
+class _GapLin(lin_1d):
+    """Linear model that does not predict the data of member 1, and predicts integer data."""
+
+    def run_fwd_sim(self, state, member_i, del_folder=True):
+        pred = super().run_fwd_sim(state, member_i, del_folder)
+        for el in pred:
+            el['count'] = np.array([member_i])
+            if member_i == 1:
+                el['x'] = None
+        return pred
+
+
+def test_missing_member_data(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    state = np.random.default_rng(0).random((3, 4))
+    np.savez('x.npz', x=state)
+    sim = _GapLin({'reporttype': 'idx', 'reportpoint': [0, 1, 2], 'datatype': ['x']})
+    keys = {'state': 'x', 'prior_x': [['mean', 0.0], ['var', 1.0], ['grid', [3, 1]]], 'importstaticvar': 'x.npz',
+            'disable_tqdm': True}
+    ensemble = Ensemble(keys, sim)
+    ensemble.calc_prediction()
+
+    x = np.concatenate([el['x'] for el in ensemble.pred_data])
+    assert np.isnan(x[:, 1]).all()
+    assert np.array_equal(np.delete(x, 1, axis=1), np.delete(state, 1, axis=1))
+    assert all(np.array_equal(el['count'], [[0., 1., 2., 3.]]) for el in ensemble.pred_data)
@@ -0,0 +1,70 @@
+"""Test of the ensemble state handed to the forward-run workers in shared memory."""
+import os
+import subprocess
+import sys
+
+import numpy as np
+
+from ensemble.ensemble import Ensemble
+from simulator.simple_models import lin_1d
+
+
+class _TruncLin(lin_1d):
+    """Linear model that truncates the state in place before it is used."""
+
+    def run_fwd_sim(self, state, member_i, del_folder=True):
+        np.clip(state['x'], 0.2, 0.8, out=state['x'])
+        return super().run_fwd_sim(state, member_i, del_folder)
+
+
+def _ensemble(parallel):
+    sim = _TruncLin({'reporttype': 'idx', 'reportpoint': [0, 1, 2], 'datatype': ['x'], 'parallel': parallel})
+    keys = {'state': 'x', 'prior_x': [['mean', 0.0], ['var', 1.0], ['grid', [3, 1]]],
+            'importstaticvar': 'x.npz', 'disable_tqdm': True}
+    return Ensemble(keys, sim)
+
+
+def test_state_changed_in_place(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    state = np.random.default_rng(0).random((3, 8))
+    np.savez('x.npz', x=state)
+
+    sequential = _ensemble(1)
+    sequential.calc_prediction()
+    parallel = _ensemble(2)
+    try:
+        parallel.calc_prediction()
+    finally:
+        parallel.close_pool()
+
+    for seq, par in zip(sequential.pred_data, parallel.pred_data):
+        assert np.array_equal(seq['x'], par['x'])
+    assert np.array_equal(parallel.pred_data[0]['x'][0], np.clip(state[0], 0.2, 0.8))
+    # the changes stay with the member
+    assert np.array_equal(parallel.state['x'], state)
+
+
+# forecasts in a fresh interpreter, where the workers are started before the first shared memory block is made
+_SCRIPT = '''
+import numpy as np
+from ensemble.ensemble import Ensemble
+from simulator.simple_models import lin_1d
+np.savez('x.npz', x=np.random.default_rng(0).random((3, 4)))
+sim = lin_1d({'reporttype': 'idx', 'reportpoint': [0], 'datatype': ['x'], 'parallel': 2})
+ensemble = Ensemble({'state': 'x', 'prior_x': [['mean', 0.0], ['var', 1.0], ['grid', [3, 1]]],
+                     'importstaticvar': 'x.npz', 'disable_tqdm': True}, sim)
+sim.setup_fwd_run(redund_sim=None)
+ensemble._get_pool(2)
+for future in [ensemble._submit(int) for _ in range(2)]:
+    future.result()
+ensemble.calc_prediction()
+ensemble.calc_prediction()
+ensemble.close_pool()
+'''
+
+
+def test_block_not_leaked(tmp_path):
+    env = {**os.environ, 'PYTHONPATH': os.pathsep.join(sys.path)}
+    proc = subprocess.run([sys.executable, '-c', _SCRIPT], cwd=tmp_path, env=env, capture_output=True, text=True)
+    assert proc.returncode == 0, proc.stderr
+    assert 'resource_tracker' not in proc.stderr
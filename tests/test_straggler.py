@@ -0,0 +1,87 @@
+"""Test of the speculative copies, and the killing, of straggling ensemble members."""
+import os
+import subprocess
+import sys
+import time
+from shutil import rmtree
+
+import numpy as np
+import psutil
+
+from ensemble.ensemble import Ensemble
+from simulator.simple_models import lin_1d
+
+
+class _SlowLin(lin_1d):
+    """Linear model where the first run of member 0 hangs in a simulator process, until it is killed."""
+
+    def run_fwd_sim(self, state, member_i, del_folder=True):
+        folder = 'En_' + str(member_i)
+        os.mkdir(folder)  # fails if the run folder is used by another run
+        with open(f'ran_{member_i}', 'w') as f:
+            f.write(os.getcwd())
+        if member_i == 0 and not os.getcwd().endswith('_copy'):
+            proc = subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(60)'])
+            with open('sim_pids', 'a') as f:
+                f.write(f'{proc.pid}\n')
+            if proc.wait():
+                rmtree(folder)
+                return False
+        pred_data = super().run_fwd_sim(state, member_i, del_folder)
+        rmtree(folder)
+        return pred_data
+
+
+def test_speculative_copy(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    state = np.random.default_rng(0).random((3, 4))
+    np.savez('x.npz', x=state)
+    sim = _SlowLin({'reporttype': 'idx', 'reportpoint': [0, 1, 2], 'datatype': ['x'], 'parallel': 2})
+    keys = {'state': 'x', 'prior_x': [['mean', 0.0], ['var', 1.0], ['grid', [3, 1]]], 'importstaticvar': 'x.npz',
+            'disable_tqdm': True,
+            'straggler': [['action', 'speculate'], ['min_finished', 0.5], ['factor', 2.0], ['poll', 0.2]]}
+    ens = Ensemble(keys, sim)
+    try:
+        ens.calc_prediction()
+        ens.calc_prediction()
+    finally:
+        ens.close_pool()
+
+    assert np.array_equal(np.concatenate([el['x'] for el in ens.pred_data]), state)
+    # the copy of member 0 runs as member 0, and its files are moved to the working folder
+    assert sorted(el for el in os.listdir() if el.startswith(('ran_', 'En_'))) == ['ran_0', 'ran_1', 'ran_2', 'ran_3']
+    assert open('ran_0').read() == str(tmp_path / 'En_0_copy')
+
+
+def test_kill(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    state = np.random.default_rng(0).random((3, 4))
+    np.savez('x.npz', x=state)
+    sim = _SlowLin({'reporttype': 'idx', 'reportpoint': [0, 1, 2], 'datatype': ['x'], 'parallel': 2})
+    keys = {'state': 'x', 'prior_x': [['mean', 0.0], ['var', 1.0], ['grid', [3, 1]]], 'importstaticvar': 'x.npz',
+            'disable_tqdm': True,
+            'straggler': [['action', 'kill'], ['min_finished', 0.5], ['factor', 2.0], ['poll', 0.2]]}
+    ens = Ensemble(keys, sim)
+    t_start = time.time()
+    try:
+        ens.calc_prediction()
+        pool = ens._pool
+        workers = set(pool._processes)
+        # the pool is reused for the next forecast, where member 0 is killed again
+        ens.calc_prediction()
+        assert ens._pool is pool and set(pool._processes) == workers
+    finally:
+        ens.close_pool()
+    assert time.time() - t_start < 30
+
+    # the simulator processes of member 0 are terminated
+    pids = [int(el) for el in open('sim_pids').read().split()]
+    assert len(pids) == 2
+    assert not any(psutil.pid_exists(pid) and psutil.Process(pid).status() != psutil.STATUS_ZOMBIE for pid in pids)
+
+    # member 0 is treated as crashed, and replaced by one of the other members
+    x = np.concatenate([el['x'] for el in ens.pred_data])
+    assert any(np.array_equal(x[:, 0], state[:, i]) for i in range(1, 4))
+    assert np.array_equal(ens.state['x'], x)
+    assert np.array_equal(x[:, 1:], state[:, 1:])
+    assert not [el for el in os.listdir() if el.startswith('En_')]